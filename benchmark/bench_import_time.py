@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Measures the time 'from spycilab import *' adds to the start of a pipeline script
+(sum of the import times reported by 'python -X importtime', minimum of several runs).
+Usage: ./benchmark/bench_import_time.py [--repeat N] [--budget MS]
+
+The script exits with 1 if the import takes longer than the budget (if given).
+"""
+import argparse
+import pathlib
+import subprocess
+import sys
+
+package_dir = pathlib.Path(__file__).parent.parent
+
+
+def import_time_us(code: str) -> int:
+    """
+    :return: sum of the time spent importing each module (in microseconds) as reported by 'python -X importtime'
+    """
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=package_dir, capture_output=True,
+                       text=True, check=True)
+    total = 0
+    for line in r.stderr.splitlines():
+        if line.startswith("import time:") and "self [us]" not in line:
+            total += int(line.split("|")[0].split(":")[1])
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs (the minimum is reported).")
+    parser.add_argument("--budget", type=float, default=None, help="Fail if the import takes longer (in ms).")
+    args = parser.parse_args()
+
+    baseline = min(import_time_us("pass") for _ in range(args.repeat))
+    star = min(import_time_us("from spycilab import *") for _ in range(args.repeat))
+    ms = (star - baseline) / 1000
+    print(f"'from spycilab import *': {ms:.1f} ms")
+    if args.budget is not None and ms > args.budget:
+        print(f"slower than the budget of {args.budget:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
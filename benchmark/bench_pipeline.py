@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Measures model construction, validation and generation of synthetic pipelines at scale
+and compares the results with stored baselines.
+Usage: ./benchmark/bench_pipeline.py [--sizes 10 1000 10000] [--repeat N] [--threshold 0.25] [--save-baseline]
+
+Every pipeline consists of groups of about 50 jobs: one prepare job (fan-out to all builds of the group),
+build and test jobs, a package job needing all builds of the group (fan-in) and a deploy job.
+All job configs extend a chain of 8 base configs, every group has its own rule set (condition trees of depth 3-4).
+
+Measured phases:
+  construct     creating JobConfig objects (resolving extends) and jobs
+  update_jobs   JobStore.update_jobs()
+  check_jobs    Pipeline.check_jobs()
+  to_yaml       Pipeline.to_yaml()
+  write_output  Pipeline.write_output() (generation, serialization and writing, forced)
+
+The script exits with 1 if a phase is slower than its baseline by more than the threshold.
+Baselines are machine specific and not committed, save one with --save-baseline (e.g. on the base commit)
+on the machine the benchmark is run on.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
+
+from spycilab import *
+
+BASELINE_FILE = pathlib.Path(__file__).parent / "baseline.json"
+GROUP_SIZE = 50
+EXTENDS_DEPTH = 8
+PHASES = ["construct", "update_jobs", "check_jobs", "to_yaml", "write_output"]
+MIN_DIFFERENCE = 0.002  # differences below 2 ms are noise
+
+
+def create_stages() -> StageStore:
+    s = StageStore()
+    for name in ["prepare", "build", "test", "package", "deploy"]:
+        s.add(name, Stage(name.capitalize()))
+    return s
+
+
+def create_variables() -> VariableStore:
+    v = VariableStore()
+    v.mode = Variable("debug", description="build mode", options=["debug", "release", "profile"])
+    v.platform = Variable("linux", description="target platform", options=["linux", "windows", "macos"])
+    v.nightly = BoolVariable(False, description="nightly build")
+    v.component = Variable(None, description="build only this component")
+    return v
+
+
+def create_rules(v: VariableStore, group: int) -> list[Rule]:
+    component = f"component-{group}"
+    return [
+        Rule(v.is_merge_request() & v.CI_OPEN_MERGE_REQUESTS.defined_and_not_empty(), when=When.never),
+        Rule((v.component.defined_and_not_empty() & v.component.not_equal_to(component))
+             | (v.platform.equal_to("macos") & v.mode.equal_to("profile")), when=When.never),
+        Rule((v.mode.equal_to("release") & v.CI_COMMIT_TAG.full_match(f"release-{group}\\.[0-9]+"))
+             | (v.nightly.is_true() & (v.platform.equal_to("linux") | v.platform.equal_to("windows"))),
+             when=When.always),
+        Rule(v.CI_COMMIT_BRANCH.full_match(f"{component}/.*") | v.component.equal_to(component)),
+    ]
+
+
+def create_extends_chain() -> JobConfig:
+    config = JobConfig(tags=["docker"], yaml_override={"retry": 1})
+    for i in range(1, EXTENDS_DEPTH):
+        config = JobConfig(extends=config, yaml_override={f"level_{i}": i},
+                           tags=["docker", f"level-{i}"] if i % 3 == 0 else None,
+                           allow_failure=False if i == EXTENDS_DEPTH - 1 else None)
+    return config
+
+
+def create_jobs(num_jobs: int, s: StageStore, v: VariableStore) -> JobStore:
+    j = JobStore()
+    base = create_extends_chain()
+    groups = max(1, num_jobs // GROUP_SIZE)
+    builds_per_group = max(1, (num_jobs // groups - 3) // 2)
+
+    def config(**kwargs) -> JobConfig:
+        return JobConfig(extends=base, yaml_override={"interruptible": True}, **kwargs)
+
+    for g in range(groups):
+        rules = create_rules(v, g)
+        sources = Artifacts(paths=[f"sources/{g}/"], lifetime="1 day")
+        j.add(f"prepare_{g}", Job(f"Prepare {g}", config(stage=s.prepare, rules=rules, artifacts=sources)))
+        binaries = []
+        for b in range(builds_per_group):
+            out = Artifacts(paths=[f"build/{g}/{b}/"], lifetime="1 day")
+            binaries.append(out)
+            j.add(f"build_{g}_{b}", Job(f"Build {g}/{b}", config(stage=s.build, rules=rules, artifacts=out,
+                                                                 needs=sources)))
+            j.add(f"test_{g}_{b}", Job(f"Test {g}/{b}", config(stage=s.test, rules=rules, needs=out)))
+        package = Artifacts(paths=[f"package/{g}.tar.gz"])
+        j.add(f"package_{g}", Job(f"Package {g}", config(stage=s.package, rules=rules, artifacts=package,
+                                                          needs=binaries)))
+        j.add(f"deploy_{g}", Job(f"Deploy {g}", config(stage=s.deploy, rules=rules, needs=package,
+                                                        when=When.manual)))
+    return j
+
+
+def run_once(num_jobs: int, directory: str) -> tuple[dict[str, float], int]:
+    """
+    Build and generate a fresh pipeline.
+    :return: seconds spent in each phase and the number of jobs
+    """
+    t = {}
+    s = create_stages()
+    v = create_variables()
+    start = time.perf_counter()
+    j = create_jobs(num_jobs, s, v)
+    t["construct"] = time.perf_counter() - start
+
+    p = Pipeline(jobs=j, stages=s, variables=v)
+    p.output = os.path.join(directory, f"bench_{num_jobs}.yml")
+
+    start = time.perf_counter()
+    p.jobs.update_jobs(p.run_script)
+    t["update_jobs"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    p.check_jobs()
+    t["check_jobs"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    p.to_yaml()
+    t["to_yaml"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        p.write_output(force=True)
+    t["write_output"] = time.perf_counter() - start
+    return t, len(p.jobs.all())
+
+
+def measure(num_jobs: int, repeat: int) -> tuple[dict[str, float], int]:
+    """
+    :return: best time of each phase over all repetitions and the number of jobs
+    """
+    best = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for _ in range(repeat):
+            t, count = run_once(num_jobs, directory)
+            for k, value in t.items():
+                best[k] = min(best.get(k, value), value)
+    return best, count
+
+
+def load_baseline() -> dict:
+    try:
+        with open(BASELINE_FILE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark pipeline construction and generation.")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000],
+                            help="number of jobs of the synthetic pipelines")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="take the best of N runs")
+    arg_parser.add_argument("--threshold", type=float, default=0.25,
+                            help="allowed slowdown relative to the baseline (0.25 = 25%%)")
+    arg_parser.add_argument("--save-baseline", action="store_true", help=f"store results in '{BASELINE_FILE.name}'")
+    args = arg_parser.parse_args()
+
+    baseline = load_baseline()
+    if not baseline and not args.save_baseline:
+        print(f"No baseline found, save one with --save-baseline (stored in '{BASELINE_FILE}').")
+    regressions = []
+    for size in args.sizes:
+        result, count = measure(size, args.repeat)
+        base = baseline.get(str(size), {})
+        print(f"{count} jobs:")
+        for phase in PHASES:
+            t = result[phase]
+            line = f"  {phase:<13} {t * 1000:9.1f} ms"
+            if phase in base:
+                ratio = t / base[phase] if base[phase] > 0 else 1.0
+                line += f"   baseline {base[phase] * 1000:9.1f} ms ({ratio - 1:+.0%})"
+                if ratio > 1 + args.threshold and t - base[phase] > MIN_DIFFERENCE:
+                    line += "  REGRESSION"
+                    regressions.append(f"{phase} ({count} jobs)")
+            print(line)
+        baseline[str(size)] = result
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baseline, f, indent=1)
+        print(f"baseline written to '{BASELINE_FILE}'")
+    elif regressions:
+        print(f"ERROR: {len(regressions)} regression(s): {', '.join(regressions)}")
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
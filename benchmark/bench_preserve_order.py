@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Compares the size of generated pipelines with one stage preserving the order of its jobs
+(fixed-width prefixes) with the previous encoding (the k-th job got k zero-width spaces).
+Usage: ./benchmark/bench_preserve_order.py [NUMBER_OF_JOBS ...]
+"""
+import io
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
+
+from spycilab import *
+from spycilab.yaml_emitter import YamlEmitter
+
+
+def create_pipeline(num_jobs: int, preserve_order: bool) -> Pipeline:
+    s = StageStore()
+    s.test = Stage("Test", preserve_order=preserve_order)
+    j = JobStore()
+    previous = None
+    for i in range(num_jobs):
+        # every job needs the previous one, references contain the prefix as well
+        previous = j.add(f"test_{i}", Job(f"Test {i}", JobConfig(stage=s.test, needs=[previous] if previous else [])))
+    p = Pipeline(jobs=j, stages=s)
+    p.jobs.update_jobs(p.run_script)
+    return p
+
+
+def output_size(p: Pipeline) -> int:
+    f = io.StringIO()
+    YamlEmitter(f).dump(p.to_yaml())
+    return len(f.getvalue().encode())
+
+
+def legacy_prefixes(count: int) -> list[str]:
+    return ["\u200B" * (i + 1) for i in range(count)]
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10, 100, 800]
+    order_prefixes = Stage.order_prefixes
+    for n in sizes:
+        plain = output_size(create_pipeline(n, False))
+        ordered = output_size(create_pipeline(n, True))
+        Stage.order_prefixes = staticmethod(legacy_prefixes)
+        try:
+            legacy = output_size(create_pipeline(n, True))
+        finally:
+            Stage.order_prefixes = staticmethod(order_prefixes)
+        print(f"{n} jobs ({plain / 1024:.0f} KiB without preserving order):")
+        print(f"  fixed-width prefixes:  {(ordered - plain) / 1024:10.1f} KiB overhead")
+        print(f"  zero-width space runs: {(legacy - plain) / 1024:10.1f} KiB overhead")
+
+
+if __name__ == "__main__":
+    main()
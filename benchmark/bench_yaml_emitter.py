@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Compares the built-in YAML emitter with PyYAML's yaml.dump() on a synthetic pipeline.
+Usage: ./benchmark/bench_yaml_emitter.py [NUMBER_OF_JOBS]
+"""
+import io
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
+
+import yaml
+
+from spycilab import *
+from spycilab.yaml_emitter import YamlEmitter
+
+
+def create_pipeline(num_jobs: int) -> Pipeline:
+    s = StageStore()
+    s.build = Stage("Build")
+    s.test = Stage("Test")
+    v = VariableStore()
+    v.mode = Variable("debug", description="build mode", options=["debug", "release"])
+    rules = [
+        Rule(v.is_merge_request() & v.CI_OPEN_MERGE_REQUESTS.defined_and_not_empty(), when=When.never),
+        Rule(v.mode.equal_to("release") | v.CI_COMMIT_TAG.full_match("release-[0-9]+"), when=When.always),
+    ]
+    j = JobStore()
+    for i in range(num_jobs):
+        out = Artifacts(paths=[f"build/{i}/"], lifetime="1 day")
+        j.add(f"build_{i}", Job(f"Build {i}", JobConfig(stage=s.build, rules=rules, tags=["docker"], artifacts=out)))
+        j.add(f"test_{i}", Job(f"Test {i}", JobConfig(stage=s.test, rules=rules, needs=out,
+                                                      yaml_override={"retry": 2})))
+    p = Pipeline(jobs=j, stages=s, variables=v)
+    p.jobs.update_jobs(p.run_script)
+    return p
+
+
+def measure(func, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        t = time.perf_counter() - start
+        best = t if best is None else min(best, t)
+    return best
+
+
+def main():
+    num_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    data = create_pipeline(num_jobs).to_yaml()
+
+    def pyyaml():
+        s = io.StringIO()
+        yaml.dump(data, s, indent=2, sort_keys=False)
+        return s.getvalue()
+
+    def emitter():
+        s = io.StringIO()
+        YamlEmitter(s).dump(data)
+        return s.getvalue()
+
+    if pyyaml() != emitter():
+        print("ERROR: outputs differ")
+        exit(1)
+
+    t_pyyaml = measure(pyyaml)
+    t_emitter = measure(emitter)
+    print(f"{2 * num_jobs} jobs, {len(emitter()) / 1024:.0f} KiB")
+    print(f"  yaml.dump():   {t_pyyaml * 1000:8.1f} ms")
+    print(f"  YamlEmitter:   {t_emitter * 1000:8.1f} ms")
+    print(f"  speedup:       {t_pyyaml / t_emitter:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,38 @@
-from .variable import *
-from .stage import *
-from .job import *
-from .artifact import *
-from .pipeline import *
-from .rule import *
+import importlib
 
-__all__ = [
-    "Variable",
-    "BoolVariable",
-    "VariableStore",
-    "PipelineSource",
-    "Condition",
-    "Rule",
-    "When",
-    "Stage",
-    "StageStore",
-    "Trigger",
-    "JobConfig",
-    "Job",
-    "job_work",
-    "JobStore",
-    "Artifacts",
-    "Pipeline"
-]
\ No newline at end of file
+# public names and the submodule they are defined in,
+# submodules are only imported when one of their names is accessed for the first time
+_EXPORTS = {
+    "Variable": "variable",
+    "BoolVariable": "variable",
+    "VariableStore": "variable",
+    "PipelineSource": "variable",
+    "Condition": "variable",
+    "Rule": "rule",
+    "When": "rule",
+    "Stage": "stage",
+    "StageStore": "stage",
+    "Trigger": "job",
+    "JobConfig": "job",
+    "Job": "job",
+    "job_work": "job",
+    "JobStore": "job",
+    "Artifacts": "artifact",
+    "Pipeline": "pipeline",
+    "section": "section"
+}
+
+__all__ = list(_EXPORTS.keys())
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value  # next access does not go through __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals().keys()) | set(__all__))
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import csv
+import json
+import os
+import re
+import statistics
+import typing
+
+from .graph import JobGraph
+from .job import Job
+from .rule import When
+from .stage import Stage
+
+if typing.TYPE_CHECKING:
+    from .pipeline import Pipeline
+
+
+class DurationAnalyzer:
+    """
+    Estimates the wall-clock time of a pipeline from historical job durations (unlimited runners),
+    for the jobs enabled by rules with the current variable values.
+    Reports the critical path and the jobs whose speedup would shorten the pipeline most
+    (only jobs on the critical path shorten it).
+    Jobs that don't run without interaction or failure ('manual', 'on_failure') are left out.
+    """
+
+    def __init__(self, pipeline: Pipeline, samples: dict[str, list[float]], default_duration: float | None = None,
+                 dag: bool = False):
+        """
+        :param pipeline: pipeline to analyze (variables are expected to be set already)
+        :param samples: durations in seconds by job name (Job.name or internal name, see load_samples())
+        :param default_duration: duration of jobs without samples (default: median duration of all jobs with samples)
+        :param dag: use needs derived from the inputs of jobs without 'needs' (see NeedsInference)
+        """
+        self.pipeline = pipeline
+        self.skipped = {}  # job -> when
+        jobs = []
+        for j in pipeline.jobs.all():
+            when = j.eval_when(default=j.config.when or When.on_success)
+            if when in (When.never, When.manual, When.on_failure):
+                self.skipped[j] = when
+            else:
+                jobs.append(j)
+
+        instances = {}  # job name -> instance name (parallel matrix) -> samples
+        for name, durations in samples.items():
+            instance = self.instance_name(name)
+            instances.setdefault(self.normalize_name(name), {}).setdefault(instance, []).extend(durations)
+        self.durations = {}
+        self.unknown = []
+        for j in jobs:
+            d = self.job_duration(j, instances)
+            if d is None:
+                self.unknown.append(j)
+            else:
+                self.durations[j] = d
+        if default_duration is None:
+            if not self.durations:
+                raise RuntimeError("No durations known for any job of the pipeline (durations are matched by job name).")
+            default_duration = statistics.median(self.durations.values())
+        self.default_duration = default_duration
+        for j in self.unknown:
+            self.durations[j] = default_duration
+
+        inferred_needs = None
+        if dag:
+            needs = pipeline.infer_needs()
+            inferred_needs = {j: [n for n, _, _ in x] for j, x in needs.items()}
+        self.graph = JobGraph(jobs, pipeline.stages, inferred_needs)
+
+    @staticmethod
+    def instance_name(name: str) -> str:
+        # GitLab job names may contain ordering prefixes (see Stage.order_prefixes())
+        return name.lstrip(Stage.ORDER_DIGITS)
+
+    @staticmethod
+    def normalize_name(name: str) -> str:
+        # without the suffix of jobs of a parallel matrix
+        return re.sub(r": \[.*\]$", "", DurationAnalyzer.instance_name(name))
+
+    @staticmethod
+    def job_duration(j: Job, instances: dict[str, dict[str, list[float]]]) -> float | None:
+        """
+        :param instances: samples by job name and instance name
+        :return: median of the samples of a job, the longest instance for jobs of a parallel matrix (they run in parallel)
+        """
+        samples = instances.get(j.name) or instances.get(j.internal_name)
+        if not samples:
+            return None
+        return max(statistics.median(v) for v in samples.values())
+
+    @staticmethod
+    def load_samples(paths: list[str]) -> dict[str, list[float]]:
+        """
+        Load job durations (seconds) from files:
+         - JSON reports written by 'run --report' (directories are searched for them, see 'run-all --report-dir')
+         - JSON lists of jobs with 'name' and 'duration' (e.g. exported from the GitLab jobs API)
+         - JSON mappings of job names to durations
+         - CSV files with columns 'name' (or 'job') and 'duration' (or 'wall_time')
+        Every successful run of a job is a sample (reports with a non-zero 'return_code' and jobs with a 'status'
+        other than 'success' are skipped).
+        :return: durations by job name (matrix jobs by instance name, e.g. 'Test: [linux]')
+        """
+        files = []
+        for p in paths:
+            if os.path.isdir(p):
+                files.extend(os.path.join(p, f) for f in sorted(os.listdir(p)) if f.endswith(".json"))
+            else:
+                files.append(p)
+
+        samples = {}
+
+        def add(name, duration):
+            if name is not None and duration is not None:
+                samples.setdefault(str(name), []).append(float(duration))
+
+        for file in files:
+            if file.endswith(".csv"):
+                with open(file, "r", newline="") as f:
+                    for row in csv.DictReader(f):
+                        if row.get("status") not in (None, "", "success"):
+                            continue
+                        name = row.get("name") or row.get("job")
+                        duration = row.get("duration") or row.get("wall_time")
+                        add(name, duration or None)
+                continue
+            with open(file, "r") as f:
+                data = json.load(f)
+            if isinstance(data, dict) and "wall_time" in data:
+                if data.get("return_code", 0) == 0:
+                    add(data.get("name"), data["wall_time"])
+            elif isinstance(data, dict):
+                for name, duration in data.items():
+                    add(name, duration)
+            elif isinstance(data, list):
+                for entry in data:
+                    if entry.get("status", "success") == "success" and entry.get("return_code", 0) == 0:
+                        add(entry.get("name"), entry.get("duration", entry.get("wall_time")))
+            else:
+                raise ValueError(f"unsupported durations file '{file}'")
+        return samples
+
+    def impact(self) -> list[tuple[Job, float, float]]:
+        """
+        :return: jobs of the critical path with how much shorter the pipeline would be if the job was twice as fast
+            and if it took no time (upper bound), largest savings first
+        """
+        total, path = self.graph.critical_path(self.durations)
+        result = []
+        for j in path:
+            savings = []
+            for factor in [0.5, 0]:
+                durations = dict(self.durations)
+                durations[j] *= factor
+                savings.append(total - self.graph.critical_path(durations)[0])
+            result.append((j, savings[0], savings[1]))
+        result.sort(key=lambda x: (-x[1], -x[2]))
+        return result
+
+    def report(self, top: int = 5):
+        total, path = self.graph.critical_path(self.durations)
+        times = self.graph.schedule(self.durations)
+        print(f"Jobs: {len(self.graph.jobs)} running, {len(self.skipped)} not running "
+              f"({', '.join(f'{j.internal_name} ({w})' for j, w in self.skipped.items()) or '-'})")
+        if self.unknown:
+            print(f"No durations for {len(self.unknown)} job(s), assuming {self.default_duration:.1f} s: "
+                  f"{', '.join(j.internal_name for j in self.unknown)}")
+        print(f"Estimated wall-clock time: {total:.1f} s (sum of all jobs: {sum(self.durations.values()):.1f} s)")
+        print("Critical path:")
+        for j in path:
+            start, finish = times[j]
+            print(f"  {j.internal_name:<30} {start:9.1f} s -> {finish:9.1f} s  ({finish - start:.1f} s)")
+        print("Speedup impact (pipeline saving if the job was twice as fast / took no time):")
+        for j, half, zero in self.impact()[:top]:
+            print(f"  {j.internal_name:<30} {half:9.1f} s  {zero:9.1f} s")
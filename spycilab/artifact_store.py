@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import glob
+import os
+import shutil
+import subprocess
+import threading
+
+from .artifact import Artifacts
+from .job import Job
+from .rule import When
+
+FICLONE = 0x40049409  # ioctl request for reflinks on Linux (btrfs, xfs, ...)
+
+
+class LocalArtifactStore:
+    """
+    Passes artifacts between jobs that are run locally, every job runs in its own working directory.
+    A working directory is a copy of the source tree (files tracked by git and untracked files that are not ignored),
+    the artifacts a job receives (same rules as in GitLab) are placed on top of it.
+    After a job finished, the declared artifact paths are taken from its working directory into the store.
+    Artifacts are placed as reflinks if the file system supports them, otherwise as hardlinks, large artifacts
+    are never duplicated on disk (a job must not modify received artifacts in place).
+    Source files are reflinked or copied, but never hardlinked, so jobs can't modify the original tree.
+    """
+
+    def __init__(self, root: str = ".spycilab"):
+        """
+        :param root: directory for the store ('artifacts/<JOB>') and working directories of jobs ('work/<JOB>')
+        """
+        self.source_root = os.getcwd()
+        self.root = os.path.abspath(root)
+        self.artifacts_dir = os.path.join(self.root, "artifacts")
+        self.work_dir = os.path.join(self.root, "work")
+        self.can_reflink = True
+        self.can_hardlink = True
+        self.counts = {"reflinked": 0, "hardlinked": 0, "copied": 0}
+        self.lock = threading.Lock()  # jobs are prepared and collected from multiple threads
+        self.collected = set()  # internal names of jobs whose artifacts are in the store
+        self.sources = None
+
+    def reset(self):
+        """
+        Remove artifacts and working directories of previous runs.
+        """
+        for d in [self.artifacts_dir, self.work_dir]:
+            shutil.rmtree(d, ignore_errors=True)
+            os.makedirs(d)
+        self.collected.clear()
+
+    def reflink(self, src: str, dst: str) -> bool:
+        try:
+            import fcntl
+        except ImportError:  # not available on Windows
+            return False
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            try:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            except OSError:
+                failed = True
+            else:
+                failed = False
+        if failed:
+            os.remove(dst)
+            return False
+        shutil.copystat(src, dst)
+        return True
+
+    def place(self, src: str, dst: str, hardlink: bool):
+        """
+        Place a file (or symlink) at dst, replacing what is there.
+        :param hardlink: allow hardlinks if reflinks are not supported
+        """
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if os.path.lexists(dst):
+            os.remove(dst)  # never write through an existing (hard)link
+        if os.path.islink(src):
+            os.symlink(os.readlink(src), dst)
+            return
+        if self.can_reflink:
+            if self.reflink(src, dst):
+                method = "reflinked"
+            else:
+                self.can_reflink = False
+        if not self.can_reflink:
+            method = "copied"
+            if hardlink and self.can_hardlink:
+                try:
+                    os.link(src, dst)
+                    method = "hardlinked"
+                except OSError:  # e.g. different file systems
+                    self.can_hardlink = False
+            if method == "copied":
+                shutil.copy2(src, dst)
+        with self.lock:
+            self.counts[method] += 1
+
+    def source_files(self) -> list[str]:
+        """
+        :return: files of the source tree relative to the current directory
+        """
+        if self.sources is not None:
+            return self.sources
+        try:
+            r = subprocess.run(["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+                               capture_output=True, check=True)
+            files = [f for f in r.stdout.decode().split("\0") if f]
+        except (OSError, subprocess.CalledProcessError):  # not a git repository
+            files = []
+            for d, dirs, names in os.walk("."):
+                dirs[:] = [x for x in dirs if x != ".git" and os.path.abspath(os.path.join(d, x)) != self.root]
+                # symlinks to directories are placed as symlinks
+                links = [x for x in dirs if os.path.islink(os.path.join(d, x))]
+                dirs[:] = [x for x in dirs if x not in links]
+                files.extend(os.path.relpath(os.path.join(d, n)) for n in names + links)
+        own = os.path.relpath(self.root) + os.sep
+        # only regular files and symlinks (e.g. no sockets), deleted files are still listed by git
+        self.sources = [f for f in files if not os.path.normpath(f).startswith(own)
+                        and (os.path.islink(f) or os.path.isfile(f))]
+        return self.sources
+
+    def workdir(self, j: Job) -> str:
+        return os.path.join(self.work_dir, j.internal_name)
+
+    def prepare(self, j: Job, producers: list[Job]) -> str:
+        """
+        Create the working directory of a job.
+        :param producers: jobs whose artifacts the job receives
+        :return: path of the working directory
+        """
+        workdir = self.workdir(j)
+        shutil.rmtree(workdir, ignore_errors=True)
+        for f in self.source_files():
+            self.place(os.path.join(self.source_root, f), os.path.join(workdir, f), hardlink=False)
+        for p in producers:
+            if p.internal_name not in self.collected:
+                continue
+            stored = os.path.join(self.artifacts_dir, p.internal_name)
+            for d, _, names in os.walk(stored):
+                for n in names:
+                    src = os.path.join(d, n)
+                    self.place(src, os.path.join(workdir, os.path.relpath(src, stored)), hardlink=True)
+        return workdir
+
+    @staticmethod
+    def should_collect(artifacts: Artifacts, success: bool) -> bool:
+        when = artifacts.when or When.on_success
+        if when == When.always:
+            return True
+        return success == (when == When.on_success)
+
+    def collect(self, j: Job, workdir: str, success: bool) -> int:
+        """
+        Take the artifact paths of a finished job into the store.
+        :return: number of files taken
+        """
+        artifacts = j.config.artifacts
+        if artifacts is None or not artifacts.paths or not self.should_collect(artifacts, success):
+            return 0
+        stored = os.path.join(self.artifacts_dir, j.internal_name)
+        count = 0
+        for pattern in artifacts.paths:
+            for match in glob.glob(os.path.join(glob.escape(workdir), pattern), recursive=True):
+                if os.path.isdir(match) and not os.path.islink(match):
+                    files = [os.path.join(d, n) for d, _, names in os.walk(match) for n in names]
+                else:
+                    files = [match]
+                for f in files:
+                    self.place(f, os.path.join(stored, os.path.relpath(f, workdir)), hardlink=True)
+                    count += 1
+        with self.lock:
+            self.collected.add(j.internal_name)
+        return count
+
+    def summary(self) -> str:
+        return ", ".join(f"{n} {k}" for k, n in self.counts.items())
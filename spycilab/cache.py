@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import glob
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+
+from .job import Job
+from .variable import VariableStore
+
+
+class ResultCache:
+    """
+    Local content-addressed store for job results.
+    A result is identified by a hash over the job's internal name, the values of all variables
+    except run specific ones (see RUN_SPECIFIC), the values of the job's parallel matrix variables,
+    the source of the job's work and the content of the job's declared input paths (JobConfig.cache_inputs).
+    On a hit the job's artifact paths are restored instead of running the job.
+    """
+    VERSION = "3"
+    # predefined variables identifying a single commit, pipeline or job (IDs, URLs, tokens), not part of the key,
+    # so results are reused across commits (refs and the pipeline source are part of the key)
+    RUN_SPECIFIC = [
+        "CI_PIPELINE_URL",
+        "CI_REGISTRY_PASSWORD",
+        "CI_REPOSITORY_URL",
+        "CI_MERGE_REQUEST_ID",
+        "CI_OPEN_MERGE_REQUESTS",
+        "CI_COMMIT_AUTHOR",
+        "CI_COMMIT_DESCRIPTION",
+        "CI_COMMIT_MESSAGE",
+        "CI_COMMIT_SHA",
+        "CI_JOB_NAME",
+        "CI_JOB_TOKEN",
+        "CI_JOB_URL",
+    ]
+    CONFIG_ENV = "SPYCILAB_CACHE_CONFIG"  # cache settings (JSON) passed to job processes that don't load config files
+    META_FILE = "meta.json"
+    FILES_DIR = "files"
+
+    def __init__(self, directory: str = ".spycilab-cache", max_size: int | None = None, max_age: float | None = None):
+        """
+        :param directory: where to store results
+        :param max_size: maximum size of all stored results in bytes (least recently used results are evicted first)
+        :param max_age: maximum time in seconds since a result was last used before it is evicted
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.max_age = max_age
+
+    @staticmethod
+    def from_config(config: dict) -> ResultCache:
+        """
+        Create cache from the 'cache' section of a config file.
+        """
+        max_size = config.get("max_size_mb")
+        max_age = config.get("max_age_days")
+        return ResultCache(directory=config.get("directory", ".spycilab-cache"),
+                           max_size=None if max_size is None else int(max_size * 1024 * 1024),
+                           max_age=None if max_age is None else max_age * 24 * 60 * 60)
+
+    @staticmethod
+    def check_path(path: str):
+        if os.path.isabs(path) or ".." in os.path.normpath(path).split(os.sep):
+            raise RuntimeError(f"Cached path '{path}' has to be relative and inside the project directory.")
+
+    @staticmethod
+    def expand_paths(paths: list[str]) -> list[str]:
+        """
+        :return: all existing files/directories matching the given paths (paths may contain glob patterns)
+        """
+        expanded = set()
+        for p in paths:
+            ResultCache.check_path(p)
+            expanded.update(os.path.normpath(e) for e in glob.glob(p, recursive=True))
+        # skip paths that are already contained in another (directory) path
+        result = []
+        for e in sorted(expanded):
+            if not result or not e.startswith(result[-1] + os.sep):
+                result.append(e)
+        return result
+
+    @staticmethod
+    def result_paths(j: Job) -> list[str]:
+        """
+        :return: paths that make up the result of the given job
+        """
+        paths = []
+        a = j.config.artifacts
+        if a is not None:
+            if a.paths is not None:
+                paths.extend(a.paths)
+            if a.junit_report is not None:
+                paths.append(a.junit_report)
+        return paths
+
+    @staticmethod
+    def work_source(j: Job) -> str:
+        work = j.config.work
+        if work is None:
+            return ""
+        try:
+            return inspect.getsource(work)
+        except (OSError, TypeError):
+            code = getattr(work, "__code__", None)
+            if code is None:
+                return repr(work)
+            return f"{code.co_code.hex()}{code.co_consts}"
+
+    @staticmethod
+    def hash_path(h, path: str):
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for f in sorted(files):
+                    ResultCache.hash_path(h, os.path.join(root, f))
+        else:
+            h.update(path.encode())
+            h.update(b"\0")
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            h.update(b"\0")
+
+    def key(self, j: Job, variables: VariableStore) -> str:
+        """
+        :return: hash identifying the result of the given job with the current variable values and inputs
+        """
+        h = hashlib.sha256()
+        h.update(f"spycilab-cache-v{self.VERSION}\0{j.internal_name}\0".encode())
+        for v in sorted(variables.all(), key=lambda v: v.name):
+            if v.name in self.RUN_SPECIFIC:
+                continue
+            h.update(f"{v.name}={v.value!r}\0".encode())
+        # values of the matrix job being run (not necessarily pipeline variables)
+        for name in sorted({k for entry in j.config.parallel_matrix or [] for k in entry}):
+            h.update(f"matrix:{name}={os.environ.get(name)!r}\0".encode())
+        h.update(self.work_source(j).encode())
+        h.update(b"\0")
+        inputs = j.config.cache_inputs or []
+        for p in inputs:
+            h.update(f"input:{p}\0".encode())
+            for e in self.expand_paths([p]):
+                self.hash_path(h, e)
+        return h.hexdigest()
+
+    def entry_dir(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def restore(self, j: Job, key: str) -> bool:
+        """
+        Restore the result of a job from the cache.
+        :return: True if result was found and restored
+        """
+        entry = self.entry_dir(key)
+        meta_file = os.path.join(entry, self.META_FILE)
+        if not os.path.isfile(meta_file):
+            return False
+
+        files = os.path.join(entry, self.FILES_DIR)
+        with open(meta_file, "r") as f:
+            meta = json.load(f)
+        for p in meta["paths"]:
+            src = os.path.join(files, p)
+            if os.path.isdir(p) and not os.path.islink(p):
+                shutil.rmtree(p)
+            elif os.path.lexists(p):
+                os.remove(p)
+            parent = os.path.dirname(p)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            if os.path.isdir(src):
+                shutil.copytree(src, p, symlinks=True)
+            else:
+                shutil.copy2(src, p)
+        os.utime(meta_file)  # mark as recently used
+        return True
+
+    def store(self, j: Job, key: str) -> bool:
+        """
+        Store the result (artifact paths) of a job that finished successfully.
+        :return: True if result was stored
+        """
+        declared = self.result_paths(j)
+        paths = self.expand_paths(declared)
+        if declared and not paths:
+            print(f"Warning: no result paths of job '{j.internal_name}' exist, result is not cached.")
+            return False
+
+        entry = self.entry_dir(key)
+        if os.path.isdir(entry):
+            return True
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_entry = f"{entry}.tmp{os.getpid()}"
+        files = os.path.join(tmp_entry, self.FILES_DIR)
+        os.makedirs(files)
+        size = 0
+        for p in paths:
+            dst = os.path.join(files, p)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            if os.path.isdir(p):
+                shutil.copytree(p, dst, symlinks=True)
+            else:
+                shutil.copy2(p, dst)
+        for root, _, fs in os.walk(files):
+            for f in fs:
+                size += os.path.getsize(os.path.join(root, f))
+        with open(os.path.join(tmp_entry, self.META_FILE), "w") as f:
+            json.dump({"job": j.internal_name, "created": time.time(), "size": size, "paths": paths}, f)
+        try:
+            os.replace(tmp_entry, entry)
+        except OSError:
+            # stored concurrently by someone else
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+        return True
+
+    def evict(self):
+        """
+        Remove results that are older than the maximum age,
+        then remove least recently used results until the maximum size is not exceeded.
+        """
+        if not os.path.isdir(self.directory):
+            return
+        now = time.time()
+        entries = []
+        for key in os.listdir(self.directory):
+            meta_file = os.path.join(self.entry_dir(key), self.META_FILE)
+            try:
+                last_used = os.path.getmtime(meta_file)
+                with open(meta_file, "r") as f:
+                    size = json.load(f)["size"]
+            except (OSError, ValueError, KeyError):
+                continue
+            if self.max_age is not None and now - last_used > self.max_age:
+                shutil.rmtree(self.entry_dir(key), ignore_errors=True)
+            else:
+                entries.append((last_used, size, key))
+
+        if self.max_size is not None:
+            entries.sort()
+            total = sum(e[1] for e in entries)
+            for _, size, key in entries:
+                if total <= self.max_size:
+                    break
+                shutil.rmtree(self.entry_dir(key), ignore_errors=True)
+                total -= size
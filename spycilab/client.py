@@ -0,0 +1,70 @@
+"""
+Thin client for a pipeline started with 'pipeline.py serve'.
+Usage: python -m spycilab.client [--socket PATH] <pipeline arguments>
+e.g. python -m spycilab.client run build_app -v MY_VAR=value
+The command runs in a process forked from the server, with the client's stdin/stdout/stderr,
+working directory and environment. The client exits with the exit code of that command.
+Only the standard library is used here to keep startup as fast as possible.
+"""
+
+import json
+import os
+import socket
+import struct
+import sys
+
+DEFAULT_SOCKET = ".spycilab.sock"
+HEADER = struct.Struct("!I")  # length of the JSON request following the header
+
+
+def recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed unexpectedly")
+        data += chunk
+    return data
+
+
+def send_request(sock: socket.socket, args: list[str]) -> int:
+    """
+    Send command to server, passing stdin/stdout/stderr.
+    :return: exit code of the command
+    """
+    request = json.dumps({"args": args, "cwd": os.getcwd(), "env": dict(os.environ)}).encode()
+    socket.send_fds(sock, [HEADER.pack(len(request))], [0, 1, 2])
+    sock.sendall(request)
+    response = b""
+    while not response.endswith(b"\n"):
+        chunk = sock.recv(64)
+        if not chunk:
+            raise ConnectionError("server closed connection without exit code")
+        response += chunk
+    return int(response)
+
+
+def main(argv: list[str] | None = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    socket_path = os.environ.get("SPYCILAB_SOCKET", DEFAULT_SOCKET)
+    if len(argv) >= 2 and argv[0] == "--socket":
+        socket_path = argv[1]
+        argv = argv[2:]
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError as e:
+            print(f"Could not connect to pipeline server at '{socket_path}' ({e}), is 'pipeline.py serve' running?",
+                  file=sys.stderr)
+            return 1
+        try:
+            return send_request(sock, argv)
+        except (ConnectionError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
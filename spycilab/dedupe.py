@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import typing
+
+if typing.TYPE_CHECKING:
+    from .job import Job
+
+
+class TemplateDeduplicator:
+    """
+    Shrinks generated pipelines by moving blocks that are identical in several jobs
+    ('rules', 'artifacts' and the keys set by yaml_override) into hidden templates ('.spycilab-*'),
+    which the jobs reference through 'extends'.
+    A job never defines a key it gets from a template, so GitLab's merging of 'extends' yields the original job.
+    Template names are derived from their content, so they don't change when other jobs are added or removed.
+    """
+    PREFIX = ".spycilab-"
+    MIN_USES = 2  # blocks used by fewer jobs stay in the job
+
+    def __init__(self, jobs: list[tuple[Job, dict]]):
+        """
+        :param jobs: jobs with their generated yaml
+        """
+        self.jobs = jobs
+
+    @staticmethod
+    def blocks(j: Job, y: dict) -> list[tuple[str, dict]]:
+        """
+        :return: blocks of a job's yaml that can be moved to templates (kind, block)
+        """
+        blocks = []
+        for k in ["rules", "artifacts"]:
+            if k in y:
+                blocks.append((k, {k: y[k]}))
+        if j.yaml_override:
+            override = {k: y[k] for k in j.yaml_override.keys() if k in y and k not in ("rules", "artifacts")}
+            if override:
+                blocks.append(("override", override))
+        return blocks
+
+    @staticmethod
+    def key(block: dict) -> str:
+        return json.dumps(block, separators=(",", ":"), default=repr)
+
+    def template_name(self, kind: str, key: str) -> str:
+        return f"{self.PREFIX}{kind}-{hashlib.sha256(key.encode()).hexdigest()[:10]}"
+
+    def dedupe(self, p: dict) -> dict:
+        """
+        :param p: generated pipeline yaml containing the jobs
+        :return: new pipeline yaml with templates inserted before the first job
+        """
+        job_blocks = {}
+        uses = {}
+        for j, y in self.jobs:
+            if "extends" in y:
+                continue  # jobs extending something on their own are left alone
+            job_blocks[j.display_name()] = [(kind, block, self.key(block)) for kind, block in self.blocks(j, y)]
+            for kind, block, key in job_blocks[j.display_name()]:
+                uses[key] = uses.get(key, 0) + 1
+
+        templates = {}
+        jobs = {}
+        for j, y in self.jobs:
+            extends = []
+            moved = set()
+            for kind, block, key in job_blocks.get(j.display_name(), []):
+                if uses[key] >= self.MIN_USES:
+                    name = self.template_name(kind, key)
+                    templates.setdefault(name, block)
+                    extends.append(name)
+                    moved.update(block.keys())
+            if not extends:
+                jobs[j.display_name()] = y
+                continue
+            new_y = {}
+            for k, v in y.items():
+                if k in moved:
+                    continue
+                new_y[k] = v
+                if k == "stage":
+                    new_y["extends"] = extends
+            if "extends" not in new_y:
+                new_y = {"extends": extends, **new_y}
+            jobs[j.display_name()] = new_y
+
+        result = {}
+        for k, v in p.items():
+            if k in jobs:
+                if templates:
+                    result.update(templates)
+                    templates = {}
+                result[k] = jobs[k]
+            else:
+                result[k] = v
+        return result
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import typing
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from enum import Enum
+
+from .artifact import Artifacts
+from .job import Job
+from .graph import JobGraph
+from .rule import When
+
+if typing.TYPE_CHECKING:
+    from .pipeline import Pipeline
+
+
+class JobStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCESS = "success"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+
+class LocalExecutor:
+    """
+    Runs all jobs of a pipeline that are enabled by rules on the local machine.
+    Every job runs in its own process (the pipeline script with subcommand 'run'),
+    jobs run in parallel as soon as all jobs they depend on are finished.
+    """
+
+    def __init__(self, pipeline: Pipeline, max_parallel: int = 1, with_prefix: bool = False,
+                 report_dir: str | None = None, log_dir: str | None = None, isolate: bool = False,
+                 script: str | None = None):
+        """
+        :param pipeline: the pipeline to run (variables are expected to be set already)
+        :param max_parallel: maximum number of jobs running at the same time
+        :param with_prefix: run jobs with their run prefix
+        :param report_dir: directory to write measurements of each job to (<JOB>.json)
+        :param log_dir: directory to write output of each job to (<JOB>.log)
+        :param isolate: run every job in its own working directory, artifacts are passed through a LocalArtifactStore
+        :param script: pipeline script to run jobs with (default: the running program, see main_command())
+        """
+        if max_parallel < 1:
+            raise ValueError(f"number of parallel jobs must be at least 1 (got {max_parallel})")
+        self.pipeline = pipeline
+        self.max_parallel = max_parallel
+        self.with_prefix = with_prefix
+        self.report_dir = report_dir
+        if script is not None:
+            if not os.path.isfile(script):
+                raise RuntimeError(f"Pipeline script '{script}' does not exist.")
+            self.command = [sys.executable, os.path.abspath(script)]
+        else:
+            self.command = self.main_command()
+        self.store = None
+        if isolate:
+            from .artifact_store import LocalArtifactStore
+            self.store = LocalArtifactStore()
+            if report_dir is not None:
+                self.report_dir = os.path.abspath(report_dir)  # jobs don't run in the current directory
+        self.when = {}
+        for j in pipeline.jobs.all():
+            self.when[j] = self.eval_when(j)
+        self.graph = JobGraph([j for j, w in self.when.items() if w != When.never], pipeline.stages)
+        self.status = {j: JobStatus.PENDING for j in self.graph.jobs}
+        self.skip_reason = {}
+        self.logs = None
+        if max_parallel > 1 or log_dir is not None:
+            # output of jobs running in parallel is streamed line by line with prefix
+            from .logmux import LogMultiplexer
+            names = [f"{j.internal_name}_{len(j.config.matrix_combinations())}" if j.config.parallel_matrix
+                     else j.internal_name for j in self.graph.jobs]
+            width = max((len(n) for n in names), default=0)
+            self.logs = LogMultiplexer(log_dir=log_dir, name_width=width)
+
+    @staticmethod
+    def main_command() -> list[str]:
+        """
+        :return: command starting the running program (the pipeline script, or its module if started with 'python -m')
+        """
+        import __main__
+        spec = getattr(__main__, "__spec__", None)
+        if spec is not None and spec.name != "__main__":
+            return [sys.executable, "-m", spec.name.removesuffix(".__main__")]
+        file = getattr(__main__, "__file__", None)
+        if file is None or not os.path.isfile(file):
+            raise RuntimeError("Can't run jobs: the pipeline was not started from a script file "
+                               "(set Pipeline.script to the pipeline script).")
+        return [sys.executable, os.path.abspath(file)]
+
+    @staticmethod
+    def eval_when(j: Job) -> When:
+        return j.eval_when(default=j.config.when or When.on_success)
+
+    def job_command(self, j: Job, matrix_index: int | None = None, workdir: str | None = None) -> list[str]:
+        """
+        :param matrix_index: index of the job in its parallel matrix (starting at 1)
+        :param workdir: working directory of the job (containing a copy of the pipeline script)
+        :return: command running the given job in a new process
+        """
+        name = j.internal_name if matrix_index is None else f"{j.internal_name}_{matrix_index}"
+        cmd = list(self.command)
+        if workdir is not None and self.store is not None and cmd[1] != "-m":
+            relative = os.path.relpath(cmd[1], self.store.source_root)
+            if not relative.startswith(os.pardir):
+                cmd[1] = os.path.join(workdir, relative)
+        cmd += ["--no-config", "run", j.internal_name]
+        if matrix_index is not None:
+            cmd.extend(["--matrix-index", str(matrix_index)])
+        if self.with_prefix:
+            cmd.append(self.pipeline.prefix_flag_name)
+        if self.report_dir is not None:
+            cmd.extend(["--report", os.path.join(self.report_dir, f"{name}.json")])
+        return cmd
+
+    def job_environment(self) -> dict[str, str]:
+        """
+        :return: environment for a job process, all variables are passed on with their current values
+        """
+        env = os.environ.copy()
+        for v in self.pipeline.vars.all():
+            if v.value is None:
+                env.pop(v.name, None)
+            else:
+                env[v.name] = v.value
+        # job processes don't load config files (variables are already set), but use the configured cache
+        import json
+        from .cache import ResultCache
+        cache_config = dict(self.pipeline.cache_config or {})
+        cache_config["directory"] = os.path.abspath(cache_config.get("directory", ".spycilab-cache"))  # jobs might run elsewhere (--isolate)
+        env[ResultCache.CONFIG_ENV] = json.dumps(cache_config)
+        return env
+
+    def artifact_producers(self, j: Job) -> list[Job]:
+        """
+        :return: jobs whose artifacts the given job receives (same as GitLab: its 'dependencies' if restricted,
+            otherwise jobs needed through their artifacts or all jobs of earlier stages if the job has no 'needs')
+        """
+        dependencies = j.dependency_jobs()
+        if dependencies is not None:
+            return dependencies
+        if j.config.needs is None:
+            return self.graph.dependencies[j]
+        return [n.produced_by for n in j.config.needs if isinstance(n, Artifacts)]
+
+    def run_job(self, j: Job, env: dict[str, str]) -> int:
+        workdir = None
+        if self.store is not None:
+            workdir = self.store.prepare(j, self.artifact_producers(j))
+        combinations = j.config.matrix_combinations()
+        if not combinations:
+            ret = self.run_command(j.internal_name, self.job_command(j, workdir=workdir), env, workdir)
+        else:
+            # jobs of a parallel matrix are run one after another, the job fails if any of them fails
+            ret = 0
+            for i in range(1, len(combinations) + 1):
+                r = self.run_command(f"{j.internal_name}_{i}", self.job_command(j, i, workdir), env, workdir)
+                if r != 0 and ret == 0:
+                    ret = r
+        if self.store is not None:
+            self.store.collect(j, workdir, ret == 0)
+        return ret
+
+    def run_command(self, name: str, cmd: list[str], env: dict[str, str], cwd: str | None = None) -> int:
+        if self.logs is not None:
+            return self.logs.run(name, cmd, env, cwd)
+        return subprocess.run(cmd, env=env, cwd=cwd).returncode
+
+    def message(self, text: str):
+        if self.logs is not None:
+            self.logs.write_line(text)
+        else:
+            print(text, flush=True)
+
+    def decide(self, j: Job) -> bool | None:
+        """
+        Decide whether a pending job should run.
+        :return: True if job should run, False if job should be skipped, None if dependencies are not finished yet
+        """
+        if j in self.graph.missing_needs:
+            missing = ", ".join(n.internal_name for n in self.graph.missing_needs[j])
+            self.skip_reason[j] = f"needs jobs that are disabled by rules ({missing})"
+            return False
+
+        any_failed = False
+        any_skipped = False
+        for d in self.graph.dependencies[j]:
+            match self.status[d]:
+                case JobStatus.PENDING | JobStatus.RUNNING:
+                    return None
+                case JobStatus.FAILED:
+                    if not d.config.allow_failure:
+                        any_failed = True
+                case JobStatus.SKIPPED:
+                    any_skipped = True
+
+        match self.when[j]:
+            case When.always:
+                return True
+            case When.manual:
+                self.skip_reason[j] = "manual job"
+                return False
+            case When.on_failure:
+                if not any_failed:
+                    self.skip_reason[j] = "no previous job failed"
+                return any_failed
+            case _:
+                if any_failed or any_skipped:
+                    self.skip_reason[j] = "previous job failed or was skipped"
+                    return False
+                return True
+
+    def run(self) -> int:
+        """
+        Run all jobs.
+        :return: 0 if all jobs succeeded (or were allowed to fail), 1 otherwise
+        """
+        self.graph.topological_order()  # check for cycles before running anything
+        env = self.job_environment()
+        if self.store is not None:
+            self.store.reset()
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as pool:
+            while True:
+                # start all jobs that are ready (or skip them)
+                decided = True
+                while decided:
+                    decided = False
+                    for j in self.graph.jobs:
+                        if self.status[j] != JobStatus.PENDING:
+                            continue
+                        d = self.decide(j)
+                        if d is None:
+                            continue
+                        decided = True
+                        if d:
+                            self.message(f"# [run-all] Starting job '{j.name}' ({j.internal_name})")
+                            self.status[j] = JobStatus.RUNNING
+                            running[pool.submit(self.run_job, j, env)] = j
+                        else:
+                            self.message(f"# [run-all] Skipping job '{j.name}' ({j.internal_name}): {self.skip_reason[j]}")
+                            self.status[j] = JobStatus.SKIPPED
+
+                if not running:
+                    break
+
+                done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+                for f in done:
+                    j = running.pop(f)
+                    if f.result() == 0:
+                        self.status[j] = JobStatus.SUCCESS
+                    else:
+                        self.status[j] = JobStatus.FAILED
+                    self.message(f"# [run-all] Job '{j.name}' ({j.internal_name}) {self.status[j].value}")
+
+        if self.store is not None:
+            self.message(f"# [run-all] Working directories in '{os.path.relpath(self.store.work_dir)}' (files: {self.store.summary()})")
+        return self.summary()
+
+    def summary(self) -> int:
+        print("\n# [run-all] Summary:")
+        ret = 0
+        for j in self.graph.jobs:
+            s = self.status[j]
+            note = ""
+            if s == JobStatus.FAILED:
+                if j.config.allow_failure:
+                    note = " (allowed to fail)"
+                else:
+                    ret = 1
+            elif s == JobStatus.SKIPPED:
+                note = f" ({self.skip_reason[j]})"
+            print(f"  - {j.name} ({j.internal_name}): {s.value}{note}")
+        return ret
@@ -0,0 +1,73 @@
+"""
+State of the yaml generation of a pipeline.
+Generating never modifies the model (jobs, stages, variables), everything that only applies to one output
+(names of jobs with ordering prefixes, the default run script, cached yaml of shared objects) is kept here.
+The current generation is stored in a context variable, so pipelines can be generated repeatedly
+and concurrently (e.g. several variants in different threads).
+"""
+
+from __future__ import annotations
+
+import contextvars
+
+_current: contextvars.ContextVar[Generation | None] = contextvars.ContextVar("spycilab_generation", default=None)
+
+
+class Generation:
+    """
+    Context manager making a generation the current one (of this thread/context).
+    Caches the yaml output of objects shared by many jobs (conditions and rules) while it is active,
+    outside of a generation nothing is cached.
+    Mutating a cached object (see invalidate()) clears the whole cache,
+    as the output of a condition is part of the output of all conditions and rules containing it.
+    """
+
+    def __init__(self, run_script: str | None = None, run_scripts: dict | None = None,
+                 display_names: dict | None = None, needs: dict | None = None):
+        """
+        :param run_script: pipeline script of jobs that have no run script of their own
+        :param run_scripts: scripts replacing the default run script of single jobs (e.g. launcher), job -> script
+        :param display_names: names of jobs in the output (e.g. with ordering prefix), job -> name
+        :param needs: needs of jobs without 'needs' (see NeedsInference.infer())
+        """
+        self.run_script = run_script
+        self.run_scripts = {} if run_scripts is None else run_scripts
+        self.display_names = {} if display_names is None else display_names
+        self.needs = {} if needs is None else needs
+        self.memo = {}  # id(object) -> (object, yaml), objects are kept alive so ids are not reused
+        self.token = None
+
+    def __enter__(self) -> Generation:
+        self.token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _current.reset(self.token)
+        self.token = None
+        return False
+
+
+def current() -> Generation | None:
+    return _current.get()
+
+
+def lookup(obj, compute):
+    """
+    :param obj: object the yaml is generated for
+    :param compute: generates the yaml of obj
+    :return: cached yaml of obj (the result of compute() if not cached)
+    """
+    g = _current.get()
+    if g is None:
+        return compute()
+    entry = g.memo.get(id(obj))
+    if entry is None:
+        entry = (obj, compute())
+        g.memo[id(obj)] = entry
+    return entry[1]
+
+
+def invalidate():
+    g = _current.get()
+    if g is not None:
+        g.memo.clear()
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import typing
+from collections import deque
+
+from .artifact import Artifacts
+from .job import Job
+from .rule import Rule
+from .stage import StageStore
+
+
+class JobGraph:
+    """
+    Dependency graph of a set of jobs.
+    A job with 'needs' depends exactly on the jobs it needs (directly or through artifacts),
+    a job without 'needs' depends on all jobs of earlier stages (same as GitLab).
+    """
+
+    def __init__(self, jobs: typing.Iterable[Job], stages: StageStore, inferred_needs: dict[Job, list[Job]] | None = None):
+        """
+        :param jobs: jobs to build the graph for (e.g. only the jobs enabled by rules)
+        :param stages: stages defining the order of jobs without 'needs'
+        :param inferred_needs: jobs that jobs without 'needs' depend on instead of all jobs of earlier stages
+            (see NeedsInference), needed jobs that are not part of the graph are ignored
+        """
+        self.jobs = list(jobs)
+        self.stage_index = {}
+        for i, s in enumerate(stages.all()):
+            self.stage_index[s] = i
+
+        job_set = set(self.jobs)
+        jobs_by_stage = [[] for _ in self.stage_index]
+        for j in self.jobs:
+            jobs_by_stage[self.get_stage_index(j)].append(j)
+
+        self.dependencies = {}
+        self.missing_needs = {}
+        for j in self.jobs:
+            if j.config.needs is None and inferred_needs is not None and j in inferred_needs:
+                deps = [n for n in inferred_needs[j] if n in job_set]
+            elif j.config.needs is None:
+                deps = []
+                for stage_jobs in jobs_by_stage[:self.get_stage_index(j)]:
+                    deps.extend(stage_jobs)
+            else:
+                deps = []
+                missing = []
+                for n in self.needed_jobs(j):
+                    if n in job_set:
+                        deps.append(n)
+                    else:
+                        missing.append(n)
+                if missing:
+                    self.missing_needs[j] = missing
+            self.dependencies[j] = deps
+
+        self.dependents = {j: [] for j in self.jobs}
+        for j, deps in self.dependencies.items():
+            for d in deps:
+                self.dependents[d].append(j)
+
+    @staticmethod
+    def needed_jobs(j: Job) -> list[Job]:
+        """
+        :return: jobs explicitly needed by the given job (artifacts are resolved to their producer)
+        """
+        needed = []
+        if j.config.needs is not None:
+            for n in j.config.needs:
+                if isinstance(n, Artifacts):
+                    needed.append(n.produced_by)
+                elif isinstance(n, Job):
+                    needed.append(n)
+                else:
+                    raise RuntimeError(f"Job '{j.name}': Invalid type for need '{type(n)}'")
+        return needed
+
+    def get_stage_index(self, j: Job) -> int:
+        i = self.stage_index.get(j.config.stage)
+        if i is None:
+            raise RuntimeError(f"Job '{j.name}' has no stage or its stage was not added to the stage store.")
+        return i
+
+    def topological_order(self) -> list[Job]:
+        """
+        :return: all jobs ordered such that every job comes after its dependencies
+        """
+        in_degree = {j: len(deps) for j, deps in self.dependencies.items()}
+        ready = deque(j for j in self.jobs if in_degree[j] == 0)
+        order = []
+        while ready:
+            j = ready.popleft()
+            order.append(j)
+            for d in self.dependents[j]:
+                in_degree[d] -= 1
+                if in_degree[d] == 0:
+                    ready.append(d)
+
+        if len(order) != len(self.jobs):
+            cyclic = [j.internal_name for j in self.jobs if in_degree[j] > 0]
+            raise RuntimeError(f"Jobs {cyclic} have cyclic dependencies.")
+        return order
+
+    def schedule(self, durations: dict[Job, float] | None = None) -> dict[Job, tuple[float, float]]:
+        """
+        Every job starts as soon as all jobs it depends on are finished (unlimited runners).
+        :param durations: duration of every job (default: 1 for every job)
+        :return: earliest start and finish of every job
+        """
+        times = {}
+        for j in self.topological_order():
+            start = max((times[d][1] for d in self.dependencies[j]), default=0)
+            times[j] = (start, start + (1 if durations is None else durations.get(j, 0)))
+        return times
+
+    def critical_path(self, durations: dict[Job, float] | None = None) -> tuple[float, list[Job]]:
+        """
+        :param durations: duration of every job (default: 1 for every job, the length is the number of jobs in the path)
+        :return: length of the longest chain of dependent jobs and its jobs (first to last)
+        """
+        times = self.schedule(durations)
+        if not times:
+            return 0, []
+        j = max(self.jobs, key=lambda x: times[x][1])
+        length = times[j][1]
+        path = [j]
+        while times[j][0] > 0:
+            # the job finishing last delayed the start
+            j = next(d for d in self.dependencies[j] if times[d][1] == times[j][0])
+            path.append(j)
+        return length, path[::-1]
+
+
+class NeedsInference:
+    """
+    Derives minimal 'needs' for jobs relying on stage order ('generate --dag'),
+    so they start as soon as their inputs are ready instead of waiting for all jobs of earlier stages.
+    The inputs of a job are the producers of the artifacts it downloads (see Job.dependency_jobs())
+    and its ordering hints ('after'), hints already implied by other needs are left out
+    (only needs of jobs with the same rules imply anything, other jobs might not be part of the pipeline).
+    Jobs without inputs get 'needs: []' and start immediately.
+    Jobs downloading all artifacts of earlier stages ('dependencies=False') and jobs exceeding
+    the limit of needs keep the stage order.
+    """
+    MAX_NEEDS = 50  # default limit of GitLab
+
+    def __init__(self, jobs: typing.Iterable[Job], stages: StageStore, max_needs: int = MAX_NEEDS):
+        """
+        :param jobs: all jobs of the pipeline
+        :param stages: stages of the pipeline
+        :param max_needs: jobs needing more jobs keep the stage order
+        """
+        self.jobs = list(jobs)
+        self.stages = stages
+        self.max_needs = max_needs
+        self.stage_order = []  # jobs keeping the stage order (without 'needs')
+
+    @staticmethod
+    def inputs(j: Job) -> list[tuple[Job, bool]] | None:
+        """
+        :return: jobs a job without 'needs' has to wait for with whether it downloads their artifacts,
+            None if it has to wait for all jobs of earlier stages
+        """
+        if j.config.trigger is None:
+            producers = j.dependency_jobs()
+            if producers is None:
+                return None
+        else:
+            producers = []
+        inputs = [(p, True) for p in producers]
+        for a in j.config.after or []:
+            if a not in producers and all(a is not i for i, _ in inputs):
+                inputs.append((a, False))
+        return inputs
+
+    def infer(self) -> dict[Job, list[tuple[Job, bool, bool]]]:
+        """
+        :return: needs of every job without 'needs' that doesn't keep the stage order:
+            job -> [(needed job, download artifacts, optional)],
+            a needed job is optional if its rules differ (it might not be part of the pipeline)
+        """
+        job_set = set(self.jobs)
+        candidates = {}
+        self.stage_order = []
+        for j in self.jobs:
+            if j.config.needs is not None:
+                continue
+            inputs = self.inputs(j)
+            if inputs is None:
+                self.stage_order.append(j)
+                continue
+            for n, artifacts in inputs:
+                if artifacts and n not in job_set:
+                    raise RuntimeError(f"Job '{j.internal_name}' depends on artifacts of job '{n.internal_name}' "
+                                       f"that is not part of the pipeline.")
+            # ordering of jobs outside of the pipeline (e.g. another child pipeline) is kept by the parent
+            candidates[j] = [(n, artifacts) for n, artifacts in inputs if n in job_set]
+
+        # jobs a job certainly waits for (bit set over the job index): a job waited for through another job is only
+        # implied if every job in between has the same rules (so it is part of the pipeline whenever the job is),
+        # reachability only grows for jobs falling back to the stage order later (inputs are in earlier stages),
+        # so reductions stay valid
+        graph = JobGraph(self.jobs, self.stages, {j: [n for n, _ in c] for j, c in candidates.items()})
+        index = {j: i for i, j in enumerate(self.jobs)}
+        ancestors = {}
+        for j in graph.topological_order():
+            reachable = 0
+            for d in graph.dependencies[j]:
+                reachable |= 1 << index[d]
+                if Rule.sets_equal(j.config.rules, d.config.rules):
+                    reachable |= ancestors[d]
+            ancestors[j] = reachable
+
+        needs = {}
+        for j, inputs in candidates.items():
+            optional = {n: not Rule.sets_equal(j.config.rules, n.config.rules) for n, _ in inputs}
+            implied = 0
+            for n, _ in inputs:
+                if not optional[n]:  # an optional need might not exist
+                    implied |= ancestors[n]
+            reduced = [(n, artifacts, optional[n]) for n, artifacts in inputs if artifacts or not implied >> index[n] & 1]
+            if len(reduced) > self.max_needs:
+                self.stage_order.append(j)
+                continue
+            needs[j] = reduced
+        return needs
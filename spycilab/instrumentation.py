@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+import typing
+
+from .job import Job
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+class JobInstrumentation:
+    """
+    Measures wall time, CPU time, peak memory (RSS) and resource usage of child processes while running a job,
+    optionally profiling the job's work with cProfile.
+    """
+
+    def __init__(self, j: Job, profile_file: str | None = None, name: str | None = None):
+        """
+        :param j: job to measure
+        :param profile_file: write cProfile statistics of the job's work to this file (can be read with pstats)
+        :param name: name of the job in the report (default: Job.name), e.g. with the variable values of a matrix job
+        """
+        self.job = j
+        self.name = j.name if name is None else name
+        self.profile_file = profile_file
+        self.result = None
+        self.started = None
+        self.wall_time = None
+        self.cpu_time = None
+        self.peak_rss = None
+        self.children = None
+
+    @staticmethod
+    def rss_bytes(max_rss: int) -> int:
+        # ru_maxrss is given in kilobytes on Linux but in bytes on macOS
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+    def run(self) -> typing.Any:
+        """
+        Run the job and measure it.
+        :return: result of the job's work
+        """
+        children_before = resource.getrusage(resource.RUSAGE_CHILDREN) if resource else None
+        self.started = time.time()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if self.profile_file is not None:
+            import cProfile
+            profiler = cProfile.Profile()
+            try:
+                result = profiler.runcall(self.job.run)
+            finally:
+                profiler.dump_stats(self.profile_file)
+        else:
+            result = self.job.run()
+        self.cpu_time = time.process_time() - cpu_start
+        self.wall_time = time.perf_counter() - wall_start
+
+        if resource:
+            self.peak_rss = self.rss_bytes(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+            children = resource.getrusage(resource.RUSAGE_CHILDREN)
+            self.children = {
+                "user_time": children.ru_utime - children_before.ru_utime,
+                "system_time": children.ru_stime - children_before.ru_stime,
+                # peak of the largest child process that has terminated so far
+                "peak_rss_bytes": self.rss_bytes(children.ru_maxrss),
+            }
+        return result
+
+    def report(self, ret: int) -> dict:
+        """
+        :param ret: return code of the job
+        """
+        return {
+            "job": self.job.internal_name,
+            "name": self.name,
+            "return_code": ret,
+            "started": self.started,
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "peak_rss_bytes": self.peak_rss,
+            "children": self.children,
+        }
+
+    def write_report(self, file: str, ret: int):
+        directory = os.path.dirname(file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(file, "w") as f:
+            json.dump(self.report(ret), f, indent=2)
+
+    def properties(self, ret: int) -> dict[str, str]:
+        """
+        :return: measurements as flat key/value pairs (e.g. for JUnit properties)
+        """
+        properties = {}
+        for k, v in self.report(ret).items():
+            if isinstance(v, dict):
+                for child_k, child_v in v.items():
+                    properties[f"{k}.{child_k}"] = str(child_v)
+            elif v is not None:
+                properties[k] = str(v)
+        return properties
+
+    def write_junit(self, file: str, ret: int):
+        """
+        Add a test suite with the measurements as properties to a JUnit report.
+        If the file exists already (e.g. written by the job) the test suite is appended to it.
+        """
+        import xml.etree.ElementTree as ElementTree
+        root = None
+        if os.path.isfile(file):
+            root = ElementTree.parse(file).getroot()
+            if root.tag == "testsuite":
+                suites = ElementTree.Element("testsuites")
+                suites.append(root)
+                root = suites
+        if root is None:
+            root = ElementTree.Element("testsuites")
+
+        suite = ElementTree.SubElement(root, "testsuite", {
+            "name": f"spycilab.{self.job.internal_name}",
+            "tests": "1",
+            "failures": "0" if ret == 0 else "1",
+            "time": f"{self.wall_time:.3f}",
+        })
+        properties = ElementTree.SubElement(suite, "properties")
+        for k, v in self.properties(ret).items():
+            ElementTree.SubElement(properties, "property", {"name": k, "value": v})
+        case = ElementTree.SubElement(suite, "testcase", {
+            "name": self.name,
+            "classname": f"spycilab.{self.job.internal_name}",
+            "time": f"{self.wall_time:.3f}",
+        })
+        if ret != 0:
+            ElementTree.SubElement(case, "failure", {"message": f"job returned {ret}"})
+
+        directory = os.path.dirname(file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        ElementTree.ElementTree(root).write(file, encoding="utf-8", xml_declaration=True)
@@ -5,8 +5,9 @@
 
 from __future__ import annotations
 
-import typing
+from collections.abc import Callable
 
+from . import generation
 from .overridable_yaml_object import OverridableYamlObject
 from .typed_store import TypedStore
 from .artifact import Artifacts
@@ -58,7 +59,7 @@ class JobConfig:
     """
 
     def __init__(self, stage: Stage = None,
-                 work: typing.Callable[[], bool | int] | None = None,
+                 work: Callable[[], bool | int] | None = None,
                  rules: None | list[Rule] | Rule = None,
                  artifacts: None | Artifacts = None,
                  needs: None | list[Artifacts | Job] | Artifacts | Job = None,
@@ -69,6 +70,11 @@ class JobConfig:
                  when: When | None = None,
                  allow_failure: bool | None = None,
                  trigger: Trigger = None,
+                 cache_inputs: None | list[str] | str = None,
+                 parallel_matrix: None | list[dict[str, str | list[str]]] | dict[str, str | list[str]] = None,
+                 dependencies: None | bool | list[Artifacts] | Artifacts = None,
+                 after: None | list[Job] | Job = None,
+                 standalone: bool | None = None,
                  yaml_override: dict | None = None):
         """
         :param stage: in which stage should the job appear
@@ -81,6 +87,15 @@ class JobConfig:
         :param extends: other job configs to inherit from, last element has the highest precedence
         :param when: when to run this job
         :param allow_failure: allow the job to fail
+        :param cache_inputs: paths the result of this job depends on, setting this (even to an empty list) enables local result caching
+        :param parallel_matrix: run the job once for every combination of variable values ('parallel: matrix'),
+            each entry maps variable names to a value or a list of values
+        :param dependencies: artifacts this job downloads ('dependencies'), by default (None or True) the artifacts it needs,
+            so a job without 'needs' downloads nothing, False downloads all artifacts of earlier stages (GitLab's default)
+        :param after: jobs of earlier stages this job has to wait for without using their artifacts,
+            only used for deriving 'needs' of jobs without 'needs' (see 'generate --dag')
+        :param standalone: the work only reads variables from the environment (not through Variable objects),
+            so it may be started from a launch manifest without loading the pipeline script (see 'generate --manifest')
         :param yaml_override: additional/overwriting yaml keywords for this job
         """
 
@@ -103,11 +118,19 @@ class JobConfig:
         self.when = when
         self.allow_failure = allow_failure
         self.trigger = trigger
+        self.cache_inputs = make_list(cache_inputs)
+        self.parallel_matrix = make_list(parallel_matrix)
+        self.dependencies = dependencies if isinstance(dependencies, bool) else make_list(dependencies)
+        self.after = make_list(after)
+        self.standalone = standalone
         self.yaml_override = yaml_override
 
         if (self.work is not None) and (self.trigger is not None):
             raise ValueError(f"can't have both 'work' and 'trigger'")
 
+        if self.parallel_matrix is not None:
+            self.check_matrix()
+
         if extends:
             extends = make_list(extends)
             for k, v in self.__dict__.items():
@@ -144,6 +167,38 @@ class JobConfig:
 
                     self.__dict__[k] = extend_v
 
+    MAX_MATRIX_JOBS = 200  # limit of GitLab
+
+    def check_matrix(self):
+        import re
+        for entry in self.parallel_matrix:
+            if not isinstance(entry, dict) or not entry:
+                raise ValueError(f"invalid 'parallel_matrix' entry {entry!r}, expected mapping of variable names to values")
+            for k, values in entry.items():
+                if not isinstance(k, str) or re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", k) is None:
+                    raise ValueError(f"invalid variable name {k!r} in 'parallel_matrix'")
+                values = values if isinstance(values, list) else [values]
+                if not values or not all(isinstance(v, str) for v in values):
+                    raise ValueError(f"values of variable '{k}' in 'parallel_matrix' must be a string or a non-empty list of strings")
+        count = len(self.matrix_combinations())
+        if count > self.MAX_MATRIX_JOBS:
+            raise ValueError(f"'parallel_matrix' results in {count} jobs, at most {self.MAX_MATRIX_JOBS} are allowed")
+
+    def matrix_combinations(self) -> list[dict[str, str]]:
+        """
+        :return: variable values of every job of the parallel matrix (in the order GitLab creates the jobs), empty if there is no matrix
+        """
+        if not self.parallel_matrix:
+            return []
+        import itertools
+        combinations = []
+        for entry in self.parallel_matrix:
+            keys = list(entry.keys())
+            values = [v if isinstance(v, list) else [v] for v in entry.values()]
+            for combination in itertools.product(*values):
+                combinations.append(dict(zip(keys, combination)))
+        return combinations
+
     def copy(self) -> JobConfig:
         j = JobConfig()
         j.stage = self.stage
@@ -156,6 +211,11 @@ class JobConfig:
         j.when = self.when
         j.allow_failure = self.allow_failure
         j.trigger = self.trigger
+        j.cache_inputs = self.cache_inputs
+        j.parallel_matrix = self.parallel_matrix
+        j.dependencies = self.dependencies.copy() if isinstance(self.dependencies, list) else self.dependencies
+        j.after = self.after.copy() if self.after is not None else None
+        j.standalone = self.standalone
         j.yaml_override = self.yaml_override.copy()
         return j
 
@@ -174,7 +234,7 @@ class Job(OverridableYamlObject):
         self.internal_name = None
         self.name = name
         self.config = config
-        self.run_script = None # set by JobStore
+        self.run_script = None # default: '<pipeline run script> run <internal name>' (see get_script())
 
         # check artifacts
         if self.config.artifacts is not None:
@@ -202,19 +262,74 @@ class Job(OverridableYamlObject):
             print("Nothing to do.")
             return 0
 
-    def get_script(self):
+    def eval_when(self, default: When = When.always) -> When:
+        """
+        Evaluate the rules of this job with the current variable values.
+        :param default: 'when' if there are no rules or the matching rule has no 'when'
+        :return: 'when' of the first matching rule, never if no rule matches
+        """
+        mode = default
+        if self.config.rules:
+            mode = When.never
+            for r in self.config.rules:
+                if r.eval():
+                    mode = r.when or default
+                    break
+        return mode
+
+    def dependency_jobs(self) -> list[Job] | None:
+        """
+        :return: jobs whose artifacts this job downloads, None if not restricted (trigger jobs and 'dependencies=False')
+        """
+        if self.config.trigger is not None or self.config.dependencies is False:
+            return None
+        if isinstance(self.config.dependencies, list):
+            artifacts = self.config.dependencies
+        else:
+            artifacts = [n for n in self.config.needs or [] if isinstance(n, Artifacts)]
+        jobs = []
+        for a in artifacts:
+            if not isinstance(a, Artifacts):
+                raise RuntimeError(f"Job '{self.name}': Invalid type for dependency '{type(a)}'")
+            if a.produced_by is None:
+                raise RuntimeError(f"Job '{self.name}': depends on artifact '{a.paths}' that is not produced by any job")
+            if a.produced_by not in jobs:
+                jobs.append(a.produced_by)
+        return jobs
+
+    def display_name(self) -> str:
+        """
+        :return: name of this job in the generated yaml (name with ordering prefix during generation, see Generation)
+        """
+        g = generation.current()
+        if g is None:
+            return self.name
+        return g.display_names.get(self, self.name)
+
+    def get_script(self, run_script: str | None = None):
+        """
+        :param run_script: pipeline script used if this job has no run script of its own
+            (default: run script of the current generation, see Generation)
+        """
+        g = generation.current()
+        if run_script is None and g is not None:
+            script = g.run_scripts.get(self, self.run_script)  # replaced default run script (e.g. launcher)
+            run_script = g.run_script
+        else:
+            script = self.run_script
+        if script is None:
+            if run_script is None:
+                raise RuntimeError(f"Job '{self.name}' has no run script.")
+            script = f"{run_script} run {self.internal_name}"
         prefix = ""
         if self.config.run_prefix:
             prefix = self.config.run_prefix + " "
-        return f"{prefix}{self.run_script}"
+        return f"{prefix}{script}"
 
     def to_yaml_impl(self):
         if self.internal_name is None:
             raise RuntimeError(f"Job '{self.name}' has no internal name.")
 
-        if self.run_script is None:
-            raise RuntimeError(f"Job '{self.name}' has no run script.")
-
         if self.config.stage is None:
             raise RuntimeError(f"Job '{self.name}' has no stage.")
 
@@ -233,6 +348,9 @@ class Job(OverridableYamlObject):
             y["script"] = self.get_script()
         if variables:
             y["variables"] = variables
+        if self.config.parallel_matrix is not None:
+            y["parallel"] = {"matrix": [{k: (list(v) if isinstance(v, list) else v) for k, v in entry.items()}
+                                        for entry in self.config.parallel_matrix]}
         if self.config.rules is not None:
             y["rules"] = [r.to_yaml() for r in self.config.rules]
         if self.config.artifacts is not None:
@@ -242,16 +360,34 @@ class Job(OverridableYamlObject):
             for n in self.config.needs:
                 if isinstance(n, Artifacts):
                     needed_job = n.produced_by
-                    y["needs"].append(needed_job.name)
+                    y["needs"].append(needed_job.display_name())
                 elif isinstance(n, Job):
                     needed_job = n
-                    y["needs"].append({"job": n.name, "artifacts": False})
+                    y["needs"].append({"job": n.display_name(), "artifacts": False})
                 else:
                     raise RuntimeError(f"Job '{self.name}': Invalid type for need '{type(n)}'")
                 # check for divergent rules
                 if self.config.needs_check_diverging_rules:
                     if not Rule.sets_equal(self.config.rules, needed_job.config.rules):
                         raise RuntimeError(f"Job '{self.name}': needs '{needed_job.name}', but rules diverge.")
+        else:
+            g = generation.current()
+            if g is not None and self in g.needs:
+                # derived from the inputs of this job instead of waiting for earlier stages (see NeedsInference)
+                y["needs"] = []
+                for n, artifacts, optional in g.needs[self]:
+                    if artifacts and not optional:
+                        y["needs"].append(n.display_name())
+                    else:
+                        need = {"job": n.display_name(), "artifacts": artifacts}
+                        if optional:
+                            need["optional"] = True
+                        y["needs"].append(need)
+
+        # only download the artifacts that are used, not all artifacts of earlier stages
+        dependencies = self.dependency_jobs()
+        if dependencies is not None:
+            y["dependencies"] = [d.display_name() for d in dependencies]
 
         if self.config.tags is not None:
             y["tags"] = self.config.tags
@@ -267,7 +403,8 @@ class JobStore(TypedStore[Job]):
     def update_jobs(self, run_script:str | None = None):
         """
         Make sure jobs know their own name
-        :return:
+        :param run_script: set run script of jobs without one explicitly
+            (not needed for generating, jobs without run script use the one of the pipeline)
         """
         for k, v in self.__dict__.items():
             if isinstance(v, Job):
@@ -277,7 +414,7 @@ class JobStore(TypedStore[Job]):
 
 
 def job_work(job:Job):
-    def decorator(func:typing.Callable[[], bool | int]):
+    def decorator(func:Callable[[], bool | int]):
         job.config.work = func
         return func
 
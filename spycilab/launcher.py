@@ -0,0 +1,179 @@
+"""
+Runs a single job from a launch manifest (written by 'pipeline.py generate --manifest FILE')
+without importing the pipeline script, only the module containing the job's work is imported.
+Usage: python -m spycilab.launcher --manifest FILE [--no-input-env] [--no-forward-env] [--no-config]
+                                    run JOB [--with-prefix] [--matrix-index N] [-v VAR=VALUE ...]
+Jobs that can't be run from the manifest (not marked as standalone) are run through the pipeline script.
+Variables are passed to the work through the environment only (variable objects are not updated),
+the workflow rules are not checked.
+"""
+
+import importlib
+import json
+import os
+import shlex
+import subprocess
+import sys
+
+USAGE = "usage: python -m spycilab.launcher --manifest FILE [--no-input-env] [--no-forward-env] [--no-config] run JOB [--with-prefix] [--matrix-index N] [-v VAR=VALUE ...]"
+
+
+class Launcher:
+    def __init__(self, manifest: dict, manifest_file: str):
+        self.manifest = manifest
+        self.manifest_file = manifest_file
+        self.values = {k: v["default"] for k, v in manifest["variables"].items()}
+
+    def set_variable(self, name: str, value: str | None, source: str):
+        if name not in self.values:
+            raise RuntimeError(f"{source}: no such variable '{name}'")
+        self.values[name] = value
+
+    def setup_variables(self, variable_args: list[str], input_env: bool, forward_env: bool, config: bool):
+        if input_env:
+            for k in self.values.keys():
+                env_v = os.environ.get(k)
+                if env_v is not None:
+                    self.values[k] = env_v
+        if config:
+            for c in self.manifest["config_files"]:
+                if os.path.isfile(c):
+                    import yaml  # only needed if there is a config file
+                    with open(c, "r") as f:
+                        content = yaml.safe_load(f) or {}
+                    for k, value in (content.get("variables") or {}).items():
+                        self.set_variable(k, value, f"In file {c}")
+                    print(f"Loaded config '{c}'.")
+        for v in variable_args:
+            name, sep, value = v.partition("=")
+            if not sep:
+                raise RuntimeError(f"Invalid expression for variable mapping '{v}'. Expected VAR=VALUE")
+            self.set_variable(name, value, "Arguments")
+        for k, value in self.values.items():
+            options = self.manifest["variables"][k]["options"]
+            if value is not None and options is not None and value not in options:
+                raise ValueError(f"Invalid value '{value}' for variable '{k}', valid options are {options}")
+        if forward_env:
+            for k, value in self.values.items():
+                if value is not None:
+                    os.environ[k] = value
+
+    def show_variables(self):
+        print(f"CI Variables :")
+        for k, v in self.manifest["variables"].items():
+            if v["show"]:
+                value = self.values[k]
+                print(f"  {k}: " + ("<NOT DEFINED>" if value is None else f"'{value}'"))
+        print("  ... (some may be hidden)\n")
+
+    def load_work(self, reference: str):
+        for p in reversed(self.manifest["sys_path"]):
+            if p not in sys.path:
+                sys.path.insert(0, p)
+        module, _, name = reference.partition(":")
+        obj = importlib.import_module(module)
+        for attr in name.split("."):
+            obj = getattr(obj, attr)
+        return obj
+
+    def fallback(self, job: str, args: list[str], global_args: list[str]) -> int:
+        """
+        Run job through the pipeline script.
+        """
+        run_script = self.manifest["run_script"]
+        cmd = " ".join([run_script] + [shlex.quote(a) for a in global_args + ["run", job] + args])
+        print(f"Running through pipeline script: {cmd}", flush=True)
+        return subprocess.run(cmd, shell=True).returncode
+
+    def run(self, job: str, with_prefix: bool) -> int:
+        entry = self.manifest["jobs"][job]
+        if with_prefix and entry["run_prefix"]:
+            cmd = f"{entry['run_prefix']} {shlex.quote(sys.executable)} -m spycilab.launcher --manifest {shlex.quote(self.manifest_file)} run {job}"
+            print(f"Running (with prefix): {cmd}")
+            env = os.environ.copy()
+            env["SPYCILAB_WITH_PREFIX"] = "true"
+            return subprocess.run(cmd, shell=True, env=env).returncode
+
+        from .section import section
+        with section("CI Variables", name="spycilab_variables", collapsed=True):
+            self.show_variables()
+        print(f"# Starting job '{entry['name']}' ({job})\n", flush=True)
+        if entry["work"] is None:
+            print("Nothing to do.")
+            job_result = 0
+        else:
+            with section(f"Running '{entry['name']}'", name="spycilab_work"):
+                job_result = self.load_work(entry["work"])()
+        if isinstance(job_result, bool):  # check bool first, because 'bool' is a subclass of 'int'
+            ret = 0 if job_result else 1
+        elif isinstance(job_result, int):
+            ret = job_result
+        else:
+            print(f"Warning: Job '{job}' did not return bool or integer.", file=sys.stderr)
+            ret = 0
+
+        if ret == 0:
+            print(f"# Job finished successfully.", flush=True)
+        else:
+            print(f"# Job FAILED.", flush=True)
+        return ret
+
+
+def main(argv: list[str] | None = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    manifest_file = None
+    global_args = []
+    i = 0
+    while i < len(argv) and argv[i] != "run":
+        if argv[i] == "--manifest" and i + 1 < len(argv):
+            manifest_file = argv[i + 1]
+            i += 1
+        elif argv[i] in ("--no-input-env", "--no-forward-env", "--no-config"):
+            global_args.append(argv[i])
+        else:
+            print(USAGE, file=sys.stderr)
+            return 2
+        i += 1
+    run_args = argv[i + 1:]
+    if manifest_file is None or not run_args:
+        print(USAGE, file=sys.stderr)
+        return 2
+
+    job = run_args[0]
+    with_prefix = False
+    variable_args = []
+    i = 1
+    while i < len(run_args):
+        if run_args[i] == "--with-prefix":
+            with_prefix = True
+        elif run_args[i] == "--matrix-index" and i + 1 < len(run_args):
+            i += 1  # matrix jobs are run through the pipeline script
+        elif run_args[i] == "-v" and i + 1 < len(run_args):
+            variable_args.append(run_args[i + 1])
+            i += 1
+        else:
+            print(USAGE, file=sys.stderr)
+            return 2
+        i += 1
+
+    with open(manifest_file, "r") as f:
+        manifest = json.load(f)
+    launcher = Launcher(manifest, manifest_file)
+    entry = manifest["jobs"].get(job)
+    if entry is None:
+        print(f"job '{job}' does not exist (are you using the internal name?)", file=sys.stderr)
+        return 1
+    if not entry["fast"] or "--matrix-index" in run_args:
+        return launcher.fallback(job, run_args[1:], global_args)
+
+    if "CI_JOB_NAME" in launcher.values:  # set by GitLab, the environment takes precedence
+        launcher.values["CI_JOB_NAME"] = entry["name"]
+    launcher.setup_variables(variable_args, input_env="--no-input-env" not in global_args,
+                             forward_env="--no-forward-env" not in global_args,
+                             config="--no-config" not in global_args)
+    return launcher.run(job, with_prefix)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
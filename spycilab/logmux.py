@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import threading
+import time
+import typing
+
+
+class LogMultiplexer:
+    """
+    Runs job processes with their stdout/stderr captured through pipes and streams their output line by line:
+    every line is prefixed with a timestamp and the job's name before it is written to the shared output,
+    so output of jobs running in parallel does not interleave within lines.
+    Optionally all lines of a job are written to its own log file as well.
+    Memory usage is bounded, lines are never collected (very long lines are split into chunks of MAX_LINE bytes).
+    """
+    MAX_LINE = 64 * 1024
+
+    def __init__(self, log_dir: str | None = None, name_width: int = 0, timestamps: bool = True,
+                 output: typing.TextIO | None = None):
+        """
+        :param log_dir: directory to write a log file per job to (<NAME>.log)
+        :param name_width: width the job names are padded to in prefixes
+        :param timestamps: prefix lines with the current time
+        :param output: where to stream lines to (default: stdout)
+        """
+        self.log_dir = log_dir
+        self.name_width = name_width
+        self.timestamps = timestamps
+        self.output = output or sys.stdout
+        self.lock = threading.Lock()
+        if log_dir is not None:
+            os.makedirs(log_dir, exist_ok=True)
+
+    @staticmethod
+    def timestamp() -> str:
+        t = time.time()
+        return time.strftime("%H:%M:%S", time.localtime(t)) + f".{int(t * 1000) % 1000:03d}"
+
+    def write_line(self, line: str):
+        """
+        Write a line (without line break) to the shared output.
+        """
+        if self.timestamps:
+            line = f"{self.timestamp()} {line}"
+        with self.lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def log_file(self, name: str) -> str:
+        return os.path.join(self.log_dir, f"{name}.log")
+
+    def pump(self, name: str, pipe: typing.BinaryIO, separator: str, log: typing.TextIO | None):
+        """
+        Forward lines from a pipe until it is closed.
+        """
+        prefix = f"{name:<{self.name_width}} {separator} "
+        for raw in iter(lambda: pipe.readline(self.MAX_LINE), b""):
+            line = raw.decode(errors="replace").rstrip("\r\n")
+            self.write_line(prefix + line)
+            if log is not None:
+                with self.lock:  # two pipes write to the same log file
+                    log.write(f"{self.timestamp()} {separator} {line}\n")
+                    log.flush()
+        pipe.close()
+
+    def run(self, name: str, cmd: list[str], env: dict[str, str] | None = None, cwd: str | None = None) -> int:
+        """
+        Run a process and stream its output.
+        :param name: name to prefix lines with (and name of log file)
+        :param cwd: working directory of the process
+        :return: return code of the process
+        """
+        env = dict(os.environ if env is None else env)
+        env["PYTHONUNBUFFERED"] = "1"  # python jobs would buffer their output when writing to a pipe
+        log = open(self.log_file(name), "w") if self.log_dir is not None else None
+        try:
+            p = subprocess.Popen(cmd, env=env, cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                 stderr=subprocess.PIPE)
+            pumps = [threading.Thread(target=self.pump, args=(name, p.stdout, "|", log), daemon=True),
+                     threading.Thread(target=self.pump, args=(name, p.stderr, "!", log), daemon=True)]
+            for t in pumps:
+                t.start()
+            ret = p.wait()
+            for t in pumps:
+                t.join()
+            return ret
+        finally:
+            if log is not None:
+                log.close()
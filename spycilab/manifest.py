@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import sys
+import typing
+
+from .job import Job
+
+if typing.TYPE_CHECKING:
+    from .pipeline import Pipeline
+
+
+class LaunchManifest:
+    """
+    Everything needed to run a job without constructing the pipeline (see spycilab.launcher):
+    variables with their defaults, the work of each job as 'module:function' reference and the command
+    running the job through the pipeline script, which is used unless the job is marked as standalone
+    (JobConfig.standalone), if the work can't be referenced (e.g. lambdas or functions defined in the pipeline script itself)
+    or if the job uses the result cache.
+    """
+    VERSION = 1
+    LAUNCHER = "python3 -m spycilab.launcher"
+
+    def __init__(self, pipeline: Pipeline, file: str):
+        """
+        :param pipeline: pipeline with updated jobs (run scripts set)
+        :param file: where the manifest is written to (relative to the directory jobs are run from)
+        """
+        self.pipeline = pipeline
+        self.file = file
+
+    @staticmethod
+    def work_reference(j: Job) -> str | None:
+        """
+        :return: 'module:qualified_name' of the job's work if it can be imported without the pipeline script
+        """
+        work = j.config.work
+        module = getattr(work, "__module__", None)
+        name = getattr(work, "__qualname__", None)
+        if module is None or name is None or module == "__main__" or "<" in name:
+            return None
+        try:
+            obj = importlib.import_module(module)
+            for attr in name.split("."):
+                obj = getattr(obj, attr)
+        except (ImportError, AttributeError):
+            return None
+        if obj is not work:
+            return None
+        return f"{module}:{name}"
+
+    def job_entry(self, j: Job) -> dict:
+        entry = {
+            "name": j.name,
+            "run_prefix": j.config.run_prefix,
+            "work": None,
+            "fast": False,
+        }
+        if j.config.cache_inputs is None and j.config.trigger is None:
+            if j.config.work is None:
+                entry["fast"] = True
+            elif j.config.standalone:
+                # other work might read Variable objects, which are only set up by the pipeline script
+                entry["work"] = self.work_reference(j)
+                entry["fast"] = entry["work"] is not None
+        return entry
+
+    def to_json(self) -> dict:
+        script_dir = os.path.relpath(os.path.dirname(os.path.abspath(sys.argv[0])))
+        return {
+            "version": self.VERSION,
+            "run_script": self.pipeline.run_script,
+            "sys_path": [script_dir.replace(os.sep, "/")],
+            "config_files": self.pipeline.config_files,
+            "variables": {v.name: {"default": v.default_value, "options": v.options, "show": v.show}
+                          for v in self.pipeline.vars.all()},
+            "jobs": {j.internal_name: self.job_entry(j) for j in self.pipeline.jobs.all()},
+        }
+
+    def write(self) -> dict:
+        manifest = self.to_json()
+        directory = os.path.dirname(self.file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.file, "w") as f:
+            json.dump(manifest, f, indent=1)
+        return manifest
+
+    def use_launcher(self, manifest: dict):
+        """
+        Let jobs that can be run from the manifest be started through the launcher in the generated pipeline.
+        Only default run scripts are replaced (see Pipeline.job_scripts), the jobs are not modified.
+        """
+        for j in self.pipeline.jobs.all():
+            entry = manifest["jobs"][j.internal_name]
+            if entry["fast"] and j.run_script in (None, f"{self.pipeline.run_script} run {j.internal_name}"):
+                self.pipeline.job_scripts[j] = f"{self.LAUNCHER} --manifest {self.file} run {j.internal_name}"
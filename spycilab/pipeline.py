@@ -3,10 +3,11 @@
 # Date: November 17th 2024
 ##########################
 
-import argparse
+from __future__ import annotations
+
 import sys
 import os
-import subprocess
+import time
 
 from .overridable_yaml_object import OverridableYamlObject
 from .variable import Variable, VariableStore
@@ -18,6 +19,8 @@ from .rule import Rule, When
 # NOTE: import yaml only when needed to minimize dependencies in pipeline
 
 class Pipeline(OverridableYamlObject):
+    OUTPUT_VERSION = "1"  # increase if generated output changes for the same yaml tree
+
     def __init__(self, jobs: JobStore, stages: StageStore, variables: None | VariableStore = None,
                  workflow: list[Rule] = None, yaml_override: dict | None = None):
         super().__init__(yaml_override)
@@ -36,6 +39,17 @@ class Pipeline(OverridableYamlObject):
         self.run_script = "./pipeline.py"
         self.jobs.update_jobs(None)
         self.output = ".gitlab-ci.yml"
+        self.cache_config = None  # 'cache' section from config file
+        self.use_cache = True
+        self.report_file = None  # write measurements of job run to this file (JSON)
+        self.profile_file = None  # write cProfile statistics of job run to this file
+        self.junit_file = None  # add measurements of job run as properties to this JUnit report
+        self.script = None  # pipeline script 'run-all' runs jobs with (default: the running program)
+        self.matrix_job_name = None  # name of the matrix job being run (see apply_matrix())
+        self.dedupe = False  # move blocks shared by several jobs into hidden templates (see TemplateDeduplicator)
+        self.job_scripts = {}  # scripts replacing the default run script of single jobs in the output, job -> script
+        self.dag = False  # derive 'needs' of jobs without 'needs' from their inputs (see NeedsInference)
+        self.timings = {}  # seconds spent in each phase (validation and generation)
         # try loading config files in that order
         self.config_files = [".spycilab.yaml", ".spycilab.yml", ".local.spycilab.yaml", ".local.spycilab.yml"]
 
@@ -52,6 +66,9 @@ class Pipeline(OverridableYamlObject):
                 output = self.config.get("output")
                 if output is not None:
                     self.output = output
+                cache = self.config.get("cache")
+                if cache is not None:
+                    self.cache_config = cache if isinstance(cache, dict) else {}
 
                 variables = self.config.get("variables")
                 if variables is not None:
@@ -111,10 +128,7 @@ class Pipeline(OverridableYamlObject):
         if self.workflow is not None:
             self.pipeline_enabled = False
             for r in self.workflow:
-                eval_result = True
-                if r.condition is not None:
-                    eval_result = r.condition.eval()
-                if eval_result:
+                if r.eval():
                     match r.when:
                         case When.never:
                             self.pipeline_enabled = False
@@ -124,24 +138,99 @@ class Pipeline(OverridableYamlObject):
                             raise RuntimeError(f"invalid 'when'-type for pipeline workflow '{r.when}'")
                     break
 
-    def write_output(self):
-        import yaml  # import yaml only when needed to minimize dependencies in pipeline
-        print(f"writing generated gitlab-ci yaml to '{self.output}'")
-        with open(self.output, "w") as f:
-            f.write("############################################\n")
-            f.write("# AUTOGENERATED BY spycilab - DO NOT EDIT! #\n")
-            f.write("############################################\n\n")
-            yaml.dump(self.to_yaml(), f, indent=2, sort_keys=False)
+    @staticmethod
+    def fingerprint(y: dict) -> str:
+        """
+        :return: stable hash of a generated yaml tree
+        """
+        import hashlib
+        import json
+        h = hashlib.sha256(f"spycilab-output-v{Pipeline.OUTPUT_VERSION}\0".encode())
+        h.update(json.dumps(y, ensure_ascii=False, default=repr).encode())
+        return h.hexdigest()
 
-    def check_jobs(self):
-        all_jobs = list(self.jobs.all())
-        for ji, j in enumerate(all_jobs):
-            for other_ji in range(ji + 1, len(all_jobs)):
-                if j.name == all_jobs[other_ji].name:
-                    raise RuntimeError(
-                        f"Job '{j.internal_name}' and '{all_jobs[other_ji].internal_name}' have the same name ('{j.name}')")
+    @staticmethod
+    def hash_text(text: str) -> str:
+        import hashlib
+        return hashlib.sha256(text.encode()).hexdigest()
 
-    def main(self, cmd_args: list[str] | None = None):
+    def fingerprint_file(self) -> str:
+        return self.output + ".fingerprint"
+
+    def write_output(self, force: bool = False):
+        """
+        Write generated yaml to output file.
+        Nothing is serialized if the fingerprint of the generated tree (stored next to the output file)
+        did not change and the output file was not modified since, the output file is only rewritten if its content changes.
+        :param force: always serialize and write output file
+        """
+        import json
+        start = time.perf_counter()
+        y = self.to_yaml()
+        self.timings["generate"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fingerprint = self.fingerprint(y)
+        current = None
+        try:
+            with open(self.output, "r") as f:
+                current = f.read()
+            with open(self.fingerprint_file(), "r") as f:
+                stored = json.load(f)
+            unchanged = stored.get("fingerprint") == fingerprint and stored.get("output") == self.hash_text(current)
+        except (OSError, ValueError, AttributeError):
+            unchanged = False
+        self.timings["fingerprint"] = time.perf_counter() - start
+        if unchanged and not force:
+            print(f"'{self.output}' is up to date")
+            return
+
+        from .yaml_emitter import YamlEmitter
+        start = time.perf_counter()
+        import io
+        f = io.StringIO()
+        f.write("############################################\n")
+        f.write("# AUTOGENERATED BY spycilab - DO NOT EDIT! #\n")
+        f.write("############################################\n\n")
+        try:
+            YamlEmitter(f).dump(y)
+        except YamlEmitter.Unsupported:
+            # values not supported by the built-in emitter (e.g. floats in yaml_override)
+            import yaml  # import yaml only when needed to minimize dependencies in pipeline
+            yaml.dump(y, f, indent=2, sort_keys=False)
+        content = f.getvalue()
+        self.timings["serialize"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if content != current or force:
+            print(f"writing generated gitlab-ci yaml to '{self.output}'")
+            with open(self.output, "w") as f:
+                f.write(content)
+        else:
+            print(f"'{self.output}' is up to date")
+        with open(self.fingerprint_file(), "w") as f:
+            json.dump({"fingerprint": fingerprint, "output": self.hash_text(content)}, f)
+        self.timings["write"] = time.perf_counter() - start
+
+    def check_jobs(self):
+        from .validation import PipelineValidator
+        validator = PipelineValidator(self.jobs, self.stages)
+        errors = validator.validate()
+        for k, t in validator.timings.items():
+            self.timings[f"validate:{k}"] = t
+        if len(errors) == 1:
+            raise RuntimeError(errors[0])
+        elif errors:
+            raise RuntimeError(f"Pipeline has {len(errors)} problems:\n" + "\n".join(f"  - {e}" for e in errors))
+
+    def print_timings(self):
+        print("Timings:")
+        for k, t in self.timings.items():
+            print(f"  {k}: {t * 1000:.1f} ms")
+        print(f"  total: {sum(self.timings.values()) * 1000:.1f} ms")
+
+    def create_arg_parser(self):
+        import argparse
         arg_parser = argparse.ArgumentParser(description="This is the pipeline generator and runner.")
         sub_parsers = arg_parser.add_subparsers(required=True, title="subcommands")
         arg_parser.add_argument("--no-input-env", required=False, action="store_true",
@@ -155,22 +244,85 @@ class Pipeline(OverridableYamlObject):
         run_arg_parser.add_argument("job", help="internal name of the job to run")
         run_arg_parser.add_argument(self.prefix_flag_name, action="store_true",
                                     help="Starts a subprocess which runs the job with its specified run prefix.")
+        run_arg_parser.add_argument("--no-cache", action="store_true",
+                                    help="Do not use the local result cache, always run the job.")
+        run_arg_parser.add_argument("--report", metavar="FILE",
+                                    help="Write wall time, CPU time and memory usage of the job to a JSON file.")
+        run_arg_parser.add_argument("--profile", metavar="FILE",
+                                    help="Profile the job with cProfile and write statistics to file (read with pstats).")
+        run_arg_parser.add_argument("--junit", metavar="FILE", nargs="?", const="",
+                                    help="Add measurements as properties to a JUnit report (default: the job's 'junit_report' artifact).")
+        run_arg_parser.add_argument("--matrix-index", type=int, metavar="N",
+                                    help="Run the N-th job (starting at 1, like CI_NODE_INDEX) of the job's parallel matrix.")
         run_arg_parser.set_defaults(command="run")
         self.add_variable_argument(run_arg_parser)
+        # run-all sub command
+        run_all_arg_parser = sub_parsers.add_parser("run-all", description="Run all jobs enabled by rules locally, in parallel as far as 'needs' and stages allow.")
+        run_all_arg_parser.add_argument("--jobs", "-j", type=int, default=1,
+                                        help="Maximum number of jobs running in parallel.")
+        run_all_arg_parser.add_argument(self.prefix_flag_name, action="store_true",
+                                        help="Run jobs with their specified run prefix.")
+        run_all_arg_parser.add_argument("--isolate", action="store_true",
+                                        help="Run every job in its own working directory (in .spycilab/work), pass artifacts between jobs.")
+        run_all_arg_parser.add_argument("--log-dir", metavar="DIR",
+                                        help="Write output of every job to DIR/<JOB>.log.")
+        run_all_arg_parser.add_argument("--report-dir", metavar="DIR",
+                                        help="Write measurements of every job to DIR/<JOB>.json (see 'run --report').")
+        run_all_arg_parser.set_defaults(command="run-all")
+        self.add_variable_argument(run_all_arg_parser)
         # generate sub command
         gen_arg_parser = sub_parsers.add_parser("generate", description="Generate GitLab-CI YAML file.")
         gen_arg_parser.add_argument("--output", required=False,
                                     help="File to write generated YAML to. This option overrides setting in configuration file.")
         gen_arg_parser.add_argument("--run-script", default=self.run_script,
                                     help="Script to run in generated pipeline. This option overrides setting in configuration file.")
+        gen_arg_parser.add_argument("--force", action="store_true",
+                                    help="Write output file even if the pipeline did not change.")
+        gen_arg_parser.add_argument("--split-by", choices=["stage", "needs"],
+                                    help="Split jobs into child pipelines (one file each) triggered by the generated pipeline.")
+        gen_arg_parser.add_argument("--split-dir", default="ci-children",
+                                    help="Directory to write child pipelines to (relative to repository root).")
+        gen_arg_parser.add_argument("--manifest", metavar="FILE",
+                                    help="Also write a launch manifest, jobs are then started through 'python3 -m spycilab.launcher' without loading the whole pipeline where possible.")
+        gen_arg_parser.add_argument("--dedupe", action="store_true",
+                                    help="Move rules, artifacts and yaml overrides shared by several jobs into hidden templates the jobs extend.")
+        gen_arg_parser.add_argument("--dag", action="store_true",
+                                    help="Let jobs without 'needs' only wait for the jobs producing their artifacts and their 'after' jobs instead of all earlier stages, and report the critical path.")
+        gen_arg_parser.add_argument("--timings", action="store_true",
+                                    help="Print time spent validating and generating the pipeline.")
         gen_arg_parser.set_defaults(command="generate")
         # list sub command
         list_arg_parser = sub_parsers.add_parser("list", description="List all pipeline jobs")
         list_arg_parser.set_defaults(command="list")
         list_arg_parser.add_argument("--all", action="store_true", help="Show all jobs, even ones disabled by rules.")
         self.add_variable_argument(list_arg_parser)
-        self.args = arg_parser.parse_args(cmd_args)
-
+        # simulate sub command
+        sim_arg_parser = sub_parsers.add_parser("simulate", description="Evaluate the rules of all jobs for a batch of variable scenarios.")
+        sim_arg_parser.add_argument("scenarios", help="CSV or YAML file with variable values for each scenario")
+        sim_arg_parser.add_argument("--csv", action="store_true", help="Print result matrix as CSV.")
+        sim_arg_parser.add_argument("--no-numpy", action="store_true", help="Do not use numpy even if it is available.")
+        sim_arg_parser.set_defaults(command="simulate")
+        self.add_variable_argument(sim_arg_parser)
+        # analyze sub command
+        analyze_arg_parser = sub_parsers.add_parser("analyze", description="Estimate the wall-clock time and the critical path of the pipeline from job durations.")
+        analyze_arg_parser.add_argument("durations", nargs="+",
+                                        help="Files with job durations: reports of 'run --report' (or directories of them, see 'run-all --report-dir'), JSON or CSV exports of GitLab jobs ('name', 'duration').")
+        analyze_arg_parser.add_argument("--default-duration", type=float, metavar="SECONDS",
+                                        help="Duration of jobs without durations (default: median of known durations).")
+        analyze_arg_parser.add_argument("--dag", action="store_true", help="Use needs derived from job inputs (see 'generate --dag').")
+        analyze_arg_parser.add_argument("--top", type=int, default=5, help="Number of jobs to show in the speedup impact ranking.")
+        analyze_arg_parser.set_defaults(command="analyze")
+        self.add_variable_argument(analyze_arg_parser)
+        # serve sub command
+        serve_arg_parser = sub_parsers.add_parser("serve", description="Keep the pipeline loaded and handle commands sent by 'python -m spycilab.client' through a Unix socket.")
+        serve_arg_parser.add_argument("--socket", default=".spycilab.sock", help="Path of the Unix socket to listen on.")
+        serve_arg_parser.set_defaults(command="serve")
+        return arg_parser
+
+    def setup(self):
+        """
+        Set variables (environment, config files, arguments) and check pipeline according to parsed arguments.
+        """
         if not self.args.no_input_env:
             self.process_variables_from_env()
 
@@ -180,7 +332,7 @@ class Pipeline(OverridableYamlObject):
 
         if self.args.command == "generate" and self.args.run_script:
             self.run_script = self.args.run_script
-        self.jobs.update_jobs(self.run_script)
+        self.jobs.update_jobs()
         self.check_jobs()
 
         if self.args.__dict__.get("v"):
@@ -193,6 +345,17 @@ class Pipeline(OverridableYamlObject):
 
         self.check_workflow()
 
+    def main(self, cmd_args: list[str] | None = None):
+        arg_parser = self.create_arg_parser()
+        self.args = arg_parser.parse_args(cmd_args)
+
+        if self.args.command == "serve":
+            # every request is handled in a forked process that does its own setup
+            from .server import PipelineServer
+            exit(PipelineServer(self, self.args.socket).serve())
+
+        self.setup()
+
         match self.args.command:
             case "list":
                 if not self.pipeline_enabled:
@@ -201,28 +364,96 @@ class Pipeline(OverridableYamlObject):
             case "generate":
                 if self.args.output:
                     self.output = self.args.output
-                self.write_output()
+                self.dedupe = self.args.dedupe
+                self.dag = self.args.dag
+                if self.args.manifest:
+                    from .manifest import LaunchManifest
+                    manifest = LaunchManifest(self, self.args.manifest)
+                    manifest.use_launcher(manifest.write())
+                if self.args.split_by:
+                    from .split import PipelineSplitter
+                    PipelineSplitter(self, self.args.split_by, self.args.split_dir).write(force=self.args.force)
+                else:
+                    self.write_output(force=self.args.force)
+                if self.dag:
+                    self.print_dag_report()
+                if self.args.timings:
+                    self.print_timings()
             case "run":
                 j = self.jobs.get(self.args.job)
                 if j is None:
                     print(f"job '{self.args.job}' does not exist (are you using the internal name?)", file=sys.stderr)
                     exit(1)
+                if self.args.matrix_index is not None:
+                    self.matrix_job_name = self.apply_matrix(j, self.args.matrix_index)
+                if self.args.no_cache:
+                    self.use_cache = False
+                self.report_file = self.args.report
+                self.profile_file = self.args.profile
+                if self.args.junit == "":
+                    if j.config.artifacts is None or j.config.artifacts.junit_report is None:
+                        print(f"job '{self.args.job}' has no 'junit_report' artifact, pass a file to --junit", file=sys.stderr)
+                        exit(1)
+                    self.junit_file = j.config.artifacts.junit_report
+                else:
+                    self.junit_file = self.args.junit
                 if self.args.with_prefix:
                     if not j.config.run_prefix:
                         print(f"job '{self.args.job}' doesn't have any prefix, running normally ...")
                     else:
-                        full_run_cmd = j.get_script()
-                        print(f"Running (with prefix): {full_run_cmd}")
-                        new_env = os.environ.copy()
-                        new_env["SPYCILAB_WITH_PREFIX"] = "true"
-                        exit(subprocess.run(full_run_cmd, shell=True, env=new_env).returncode)
+                        exit(self.run_with_prefix(j))
                 elif j.config.run_prefix and not os.environ.get("SPYCILAB_WITH_PREFIX") == "true":
                     print(f"Warning: job '{self.args.job}' has a run prefix ({j.config.run_prefix}), consider running with flag {self.prefix_flag_name}.")
 
                 exit(self.run(j))
+            case "run-all":
+                if not self.pipeline_enabled:
+                    print("** Pipeline disabled by workflow rules **")
+                    exit(0)
+                from .executor import LocalExecutor
+                exit(LocalExecutor(self, max_parallel=self.args.jobs, with_prefix=self.args.with_prefix,
+                                   report_dir=self.args.report_dir, log_dir=self.args.log_dir,
+                                   isolate=self.args.isolate, script=self.script).run())
+            case "simulate":
+                from .simulate import RuleSimulator, print_table
+                scenarios = RuleSimulator.load_scenarios(self.args.scenarios)
+                simulator = RuleSimulator(self, scenarios, use_numpy=False if self.args.no_numpy else None)
+                print_table(simulator.table(), as_csv=self.args.csv)
+            case "analyze":
+                from .analyze import DurationAnalyzer
+                samples = DurationAnalyzer.load_samples(self.args.durations)
+                DurationAnalyzer(self, samples, default_duration=self.args.default_duration,
+                                 dag=self.args.dag).report(top=self.args.top)
             case _:
                 arg_parser.print_help()
 
+    def apply_matrix(self, j: Job, index: int) -> str:
+        """
+        Set variables like GitLab does for a job of a parallel matrix.
+        Matrix variables that are pipeline variables are updated as well, all are set in the environment.
+        :param index: index of the job in the matrix, starting at 1
+        :return: name of the matrix job (like GitLab names it, e.g. 'Test: [linux, debug]')
+        """
+        combinations = j.config.matrix_combinations()
+        if not combinations:
+            raise RuntimeError(f"Job '{j.internal_name}' has no parallel matrix")
+        if not 1 <= index <= len(combinations):
+            raise RuntimeError(f"Job '{j.internal_name}': matrix index {index} out of range (1 to {len(combinations)})")
+        values = dict(combinations[index - 1])
+        print(f"# Matrix job {index}/{len(combinations)}: " + ", ".join(f"{k}={v}" for k, v in values.items()))
+        name = f"{j.name}: [{', '.join(values.values())}]"
+        if not self.vars.CI_JOB_NAME.value:
+            values["CI_JOB_NAME"] = name
+        values["CI_NODE_INDEX"] = str(index)
+        values["CI_NODE_TOTAL"] = str(len(combinations))
+        for k, value in values.items():
+            v = self.vars.get(k)
+            if isinstance(v, Variable):
+                v.value = value
+                v.check_value()
+            os.environ[k] = value
+        return name
+
     def show_variables(self):
         """
          show all variables that want to be shown
@@ -249,25 +480,65 @@ class Pipeline(OverridableYamlObject):
             jbs.sort()
             print(f"{s.name}:")
             for j in jbs:
-                mode = When.always
-                if j.config.rules:
-                    mode = When.never
-                    for r in j.config.rules:
-                        if r.eval():
-                            mode = r.when or When.always
-                            break
-
+                mode = j.eval_when()
                 if self.args.all or mode != When.never:
-                    print(f"  - {j.name} ({j.internal_name}): {mode}")
+                    matrix = f" (matrix of {len(j.config.matrix_combinations())} jobs)" if j.config.parallel_matrix else ""
+                    print(f"  - {j.name} ({j.internal_name}): {mode}{matrix}")
+
+    def run_with_prefix(self, j: Job) -> int:
+        """
+        Run the job in a subprocess started with its run prefix, options of the 'run' command are passed on
+        (variables are passed through the environment).
+        """
+        import shlex
+        options = []
+        if not self.use_cache:
+            options.append("--no-cache")
+        if self.args.matrix_index is not None:
+            options += ["--matrix-index", str(self.args.matrix_index)]
+        for option, file in [("--report", self.report_file), ("--profile", self.profile_file), ("--junit", self.junit_file)]:
+            if file:
+                options += [option, os.path.abspath(file)]  # the prefix might change the working directory
+        full_run_cmd = " ".join([j.get_script(self.run_script)] + [shlex.quote(o) for o in options])
+        print(f"Running (with prefix): {full_run_cmd}")
+        new_env = os.environ.copy()
+        new_env["SPYCILAB_WITH_PREFIX"] = "true"
+        import subprocess
+        return subprocess.run(full_run_cmd, shell=True, env=new_env).returncode
 
     def run(self, j: Job) -> int:
-        self.show_variables()
+        from .section import section
+        with section("CI Variables", name="spycilab_variables", collapsed=True):
+            self.show_variables()
 
         # set specific built-in env variables
         if not self.vars.CI_JOB_NAME.value:
             self.vars.CI_JOB_NAME.value = j.name
         print(f"# Starting job '{j.name}' ({j.internal_name})\n", flush=True)
-        job_result = j.run()
+        cache = None
+        if self.use_cache and j.config.cache_inputs is not None:
+            with section("Restoring result from cache", name="spycilab_setup", collapsed=True):
+                from .cache import ResultCache
+                cache_config = self.cache_config
+                if cache_config is None and os.environ.get(ResultCache.CONFIG_ENV):
+                    import json
+                    cache_config = json.loads(os.environ[ResultCache.CONFIG_ENV])  # set by 'run-all'
+                cache = ResultCache.from_config(cache_config or {})
+                cache_key = cache.key(j, self.vars)
+                restored = cache.restore(j, cache_key)
+            if restored:
+                print(f"# Job result restored from cache ({cache_key[:12]}).", flush=True)
+                print(f"# Job finished successfully.", flush=True)
+                return 0
+
+        instrumentation = None
+        with section(f"Running '{j.name}'", name="spycilab_work"):
+            if self.report_file or self.profile_file or self.junit_file:
+                from .instrumentation import JobInstrumentation
+                instrumentation = JobInstrumentation(j, profile_file=self.profile_file, name=self.matrix_job_name)
+                job_result = instrumentation.run()
+            else:
+                job_result = j.run()
         if isinstance(job_result,
                       bool):  # important to check bool first, because 'bool' is a subclass of 'int' (https://peps.python.org/pep-0285/)
             ret = 0 if job_result else 1
@@ -277,6 +548,20 @@ class Pipeline(OverridableYamlObject):
             print(f"Warning: Job '{j.internal_name}' did not return bool or integer.", file=sys.stderr)
             ret = 0
 
+        if instrumentation is not None or (ret == 0 and cache is not None):
+            with section("Storing results", name="spycilab_teardown", collapsed=True):
+                if instrumentation is not None:
+                    if self.report_file:
+                        instrumentation.write_report(self.report_file, ret)
+                    if self.junit_file:
+                        instrumentation.write_junit(self.junit_file, ret)
+                    print(f"# Job took {instrumentation.wall_time:.2f} s (CPU time {instrumentation.cpu_time:.2f} s).", flush=True)
+
+                if ret == 0 and cache is not None:
+                    if cache.store(j, cache_key):
+                        print(f"# Job result stored in cache ({cache_key[:12]}).", flush=True)
+                    cache.evict()
+
         if ret == 0:
             print(f"# Job finished successfully.", flush=True)
         else:
@@ -285,6 +570,75 @@ class Pipeline(OverridableYamlObject):
         return ret
 
     def to_yaml_impl(self):
+        from .generation import Generation
+        # the model is not modified, output specific state is kept in the generation
+        # (yaml of shared conditions and rules is only generated once per generation)
+        with Generation(run_script=self.run_script, run_scripts=self.job_scripts,
+                        display_names=self.display_names(), needs=self.infer_needs() if self.dag else None):
+            return self.generate_yaml()
+
+    def infer_needs(self) -> dict[Job, list[tuple[Job, bool, bool]]]:
+        from .graph import NeedsInference
+        return NeedsInference(self.jobs.all(), self.stages).infer()
+
+    def print_dag_report(self):
+        """
+        Compare the critical path (longest chain of jobs waiting for each other) of the stage order
+        with the one of the derived needs.
+        """
+        from .graph import JobGraph, NeedsInference
+        inference = NeedsInference(self.jobs.all(), self.stages)
+        needs = inference.infer()
+        immediate = sum(1 for n in needs.values() if not n)
+        print(f"Derived needs of {len(needs)} job(s), {immediate} without inputs start immediately.")
+        if inference.stage_order:
+            print(f"Keeping stage order: {', '.join(j.internal_name for j in inference.stage_order)}")
+        graphs = [("stages", JobGraph(self.jobs.all(), self.stages)),
+                  ("needs", JobGraph(self.jobs.all(), self.stages, {j: [x for x, _, _ in n] for j, n in needs.items()}))]
+        for name, graph in graphs:
+            length, path = graph.critical_path()
+            print(f"Critical path ({name}): {length} job(s): {' -> '.join(j.internal_name for j in path)}")
+
+    def display_names(self) -> dict[Job, str]:
+        """
+        Enable job sorting:
+          gitlab will always sort jobs in a stage alphabetically,
+          so the trick is to prepend invisible characters (e.g. unicode zero-width-space character)
+          to adjust the sorting (see Stage.order_prefixes())
+        :return: names of jobs in stages preserving order with their ordering prefix, job -> name
+        """
+        ordered_jobs = {}
+        for j in self.jobs.all():
+            j_stage = j.config.stage
+            if j_stage and j_stage.preserve_order:
+                ordered_jobs.setdefault(j_stage, []).append(j)
+        names = {}
+        for stage_jobs in ordered_jobs.values():
+            for j, prefix in zip(stage_jobs, Stage.order_prefixes(len(stage_jobs))):
+                names[j] = prefix + j.name
+        return names
+
+    def variant(self, **attributes) -> Pipeline:
+        """
+        Create a variant of this pipeline generating a different output, e.g.
+            for script in ["./pipeline.py", "python3 pipeline.py"]:
+                p.variant(run_script=script, output=...).write_output()
+        Jobs, stages and variables are shared with this pipeline (generating doesn't modify them),
+        so variants can be generated one after another or concurrently in threads.
+        :param attributes: attributes to change (e.g. run_script, output, dedupe, yaml_override)
+        :return: the variant
+        """
+        import copy
+        p = copy.copy(self)
+        p.timings = {}
+        p.job_scripts = dict(self.job_scripts)
+        for k, v in attributes.items():
+            if not hasattr(self, k):
+                raise AttributeError(f"pipeline has no attribute '{k}'")
+            setattr(p, k, v)
+        return p
+
+    def generate_yaml(self):
         # collect variables as arguments
         vars_yaml = self.vars.to_yaml()
         p = {}
@@ -304,21 +658,11 @@ class Pipeline(OverridableYamlObject):
         # stages
         p["stages"] = self.stages.to_yaml()
 
-        zero_width_space = "\u200B"
-        stage_orderings = {}
-        # Enable Job Sorting
-        #   gitlab will always sort jobs in a stage alphabetically,
-        #   so the trick is to prepend invisible characters (unicode zero-width-space character)
-        #   to adjust the sorting
+        # add jobs (with ordering prefix, see display_names())
         for j in self.jobs.all():
-            j_stage = j.config.stage
-            if j_stage and j_stage.preserve_order:
-                if stage_orderings.get(j_stage) is None:
-                    stage_orderings[j_stage] = zero_width_space
-                j.name = stage_orderings[j_stage] + j.name
-                stage_orderings[j_stage] += zero_width_space
+            p[j.display_name()] = j.to_yaml()
 
-        # add jobs
-        for j in self.jobs.all():
-            p[j.name] = j.to_yaml()
+        if self.dedupe:
+            from .dedupe import TemplateDeduplicator
+            p = TemplateDeduplicator([(j, p[j.display_name()]) for j in self.jobs.all()]).dedupe(p)
         return p
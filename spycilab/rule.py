@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from collections.abc import Callable
+
+from . import generation
 from .overridable_yaml_object import OverridableYamlObject
 
 from .variable import Condition
@@ -22,11 +25,22 @@ class Rule(OverridableYamlObject):
         self.allow_failure = allow_failure
         self.condition = condition
 
-    def eval(self):
+    def __setattr__(self, key, value):
+        if "condition" in self.__dict__:  # set last in __init__, filling in a new rule does not affect any cached yaml
+            generation.invalidate()  # cached yaml of this rule is outdated
+        object.__setattr__(self, key, value)
+
+    def compile(self) -> Callable[[], bool]:
+        """
+        :return: callable evaluating the condition of this rule (see Condition.compile())
+        """
         if self.condition is None:
-            return True
+            return lambda: True
         else:
-            return self.condition.eval()
+            return self.condition.compile()
+
+    def eval(self):
+        return self.compile()()
 
     @staticmethod
     def sets_equal(a:list[Rule]|None, b:list[Rule]|None) -> bool:
@@ -49,9 +63,21 @@ class Rule(OverridableYamlObject):
 
 
     def to_yaml_impl(self) -> dict:
+        # rule lists are shared by many jobs and compared for every 'needs' edge,
+        # only generate their yaml once per generation (copy, as overrides are applied to the result)
+        return dict(generation.lookup(self, self._to_yaml_impl))
+
+    def _to_yaml_impl(self) -> dict:
         y = {}
         if self.condition is not None:
-            y["if"] = self.condition.to_yaml()
+            condition = self.condition.simplify()
+            if condition is True and (self.when is not None or self.allow_failure is not None):
+                pass  # rule always matches, no need for a condition
+            elif isinstance(condition, bool):
+                # can't express a constant in GitLab, keep the original condition
+                y["if"] = self.condition.to_yaml(flatten=True)
+            else:
+                y["if"] = condition.to_yaml(flatten=True)
         if self.when is not None:
             y["when"] = str(self.when)
         if self.allow_failure is not None:
@@ -0,0 +1,57 @@
+import os
+import re
+import sys
+import time
+
+
+class section:
+    """
+    Context manager marking a part of the job log as collapsible section with its duration
+    (see https://docs.gitlab.com/ee/ci/jobs/job_logs.html#custom-collapsible-sections).
+    Markers are only emitted when running in GitLab CI (GITLAB_CI is set), the duration is always measured.
+    Can be used inside the work of a job:
+        with section("Compiling"):
+            ...
+    """
+    _counter = 0
+
+    def __init__(self, header: str, name: str | None = None, collapsed: bool = False):
+        """
+        :param header: text shown in the job log
+        :param name: identifier of the section (derived from the header by default)
+        :param collapsed: collapse section in job log by default
+        """
+        self.header = header
+        if name is None:
+            # names have to be unique within a job log and may only contain letters, digits, '_', '.' and '-'
+            section._counter += 1
+            name = f"{re.sub(r'[^a-zA-Z0-9_.-]+', '_', header).strip('_').lower()}_{section._counter}"
+        self.name = name
+        self.collapsed = collapsed
+        self.start = None
+        self.duration = None
+
+    @staticmethod
+    def enabled() -> bool:
+        return bool(os.environ.get("GITLAB_CI"))
+
+    @staticmethod
+    def emit(marker: str):
+        # markers are written directly to stdout, pending output of the job has to come first
+        sys.stdout.flush()
+        sys.stderr.flush()
+        sys.stdout.write(f"\x1b[0K{marker}\n")
+        sys.stdout.flush()
+
+    def __enter__(self) -> "section":
+        self.start = time.perf_counter()
+        if self.enabled():
+            options = "[collapsed=true]" if self.collapsed else ""
+            self.emit(f"section_start:{int(time.time())}:{self.name}{options}\r\x1b[0K{self.header}")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = time.perf_counter() - self.start
+        if self.enabled():
+            self.emit(f"section_end:{int(time.time())}:{self.name}\r\x1b[0K")
+        return False
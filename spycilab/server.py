@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import os
+import signal
+import socket
+import sys
+import traceback
+import typing
+
+from .client import HEADER, recv_exact
+
+if typing.TYPE_CHECKING:
+    from .pipeline import Pipeline
+
+
+class PipelineServer:
+    """
+    Keeps a constructed pipeline loaded and handles commands sent by 'python -m spycilab.client'.
+    Every request is handled in a process forked from the server, so it starts from the unmodified pipeline
+    without importing the pipeline script again. The forked process uses the stdin/stdout/stderr of the client
+    (passed along with the request), the client's working directory and environment.
+    """
+
+    def __init__(self, pipeline: Pipeline, socket_path: str):
+        self.pipeline = pipeline
+        self.socket_path = socket_path
+        self.sock = None
+
+    @staticmethod
+    def warm_up():
+        """
+        Import modules that are otherwise imported only when needed, so requests don't have to.
+        """
+        from . import cache, executor, simulate, yaml_emitter  # noqa: F401
+        try:
+            import yaml  # noqa: F401
+        except ImportError:
+            pass
+
+    def open_socket(self) -> socket.socket:
+        if os.path.exists(self.socket_path):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+                try:
+                    s.connect(self.socket_path)
+                    raise RuntimeError(f"Another server is already listening on '{self.socket_path}'.")
+                except ConnectionRefusedError:
+                    os.remove(self.socket_path)  # stale socket from a server that did not shut down cleanly
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.socket_path)
+        sock.listen()
+        return sock
+
+    def serve(self) -> int:
+        # jobs may be started from another directory
+        sys.argv[0] = os.path.abspath(sys.argv[0])
+        self.warm_up()
+        self.sock = self.open_socket()
+        # let the kernel reap finished request processes
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, self.terminate)
+        print(f"# [serve] Listening on '{self.socket_path}' (stop with Ctrl+C)", flush=True)
+        try:
+            while True:
+                conn, _ = self.sock.accept()
+                self.handle(conn)
+        except KeyboardInterrupt:
+            print("\n# [serve] Stopped.")
+            return 0
+        finally:
+            self.sock.close()
+            os.remove(self.socket_path)
+
+    @staticmethod
+    def terminate(signum, frame):
+        raise KeyboardInterrupt()
+
+    def handle(self, conn: socket.socket):
+        fds = []
+        try:
+            header, fds, _, _ = socket.recv_fds(conn, HEADER.size, 3)
+            if len(header) != HEADER.size or len(fds) != 3:
+                raise ConnectionError("invalid request header")
+            request = json.loads(recv_exact(conn, HEADER.unpack(header)[0]))
+        except (OSError, ValueError) as e:
+            print(f"# [serve] Invalid request: {e}", file=sys.stderr, flush=True)
+            for fd in fds:
+                os.close(fd)
+            conn.close()
+            return
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+        if os.fork() == 0:
+            self.run_request(conn, request, fds)
+        for fd in fds:
+            os.close(fd)
+        conn.close()
+
+    def run_request(self, conn: socket.socket, request: dict, fds: list[int]) -> typing.NoReturn:
+        """
+        Run the requested command in the forked process, send back the exit code and terminate.
+        """
+        self.sock.close()
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        code = 1
+        try:
+            os.chdir(request["cwd"])
+            os.environ.clear()
+            os.environ.update(request["env"])
+            self.pipeline.main(request["args"])
+            code = 0
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                conn.sendall(f"{code}\n".encode())
+            finally:
+                os._exit(0)
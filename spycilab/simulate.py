@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import csv
+import re
+import typing
+
+from .job import Job
+from .rule import Rule, When
+from .variable import Condition, Variable
+
+if typing.TYPE_CHECKING:
+    from .pipeline import Pipeline
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class _PythonBackend:
+    """
+    Column operations on plain lists.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+
+    def array(self, values: list[int]):
+        return values
+
+    def full(self, value: int):
+        return [value] * self.size
+
+    def true(self):
+        return [True] * self.size
+
+    def equal(self, a, b):
+        return [x == y for x, y in zip(a, b)]
+
+    def equal_code(self, a, code: int):
+        return [x == code for x in a]
+
+    def greater_code(self, a, code: int):
+        return [x > code for x in a]
+
+    def lookup(self, table: list[bool], codes):
+        return [table[c] for c in codes]
+
+    def b_not(self, a):
+        return [not x for x in a]
+
+    def b_and(self, a, b):
+        return [x and y for x, y in zip(a, b)]
+
+    def b_or(self, a, b):
+        return [x or y for x, y in zip(a, b)]
+
+    def assign(self, target, mask, value: int):
+        return [value if m else t for t, m in zip(target, mask)]
+
+    def to_list(self, a) -> list:
+        return list(a)
+
+
+class _NumpyBackend(_PythonBackend):
+    """
+    Column operations on numpy arrays.
+    """
+
+    def array(self, values: list[int]):
+        return numpy.array(values, dtype=numpy.int64)
+
+    def full(self, value: int):
+        return numpy.full(self.size, value, dtype=numpy.int64)
+
+    def true(self):
+        return numpy.ones(self.size, dtype=bool)
+
+    def equal(self, a, b):
+        return a == b
+
+    def equal_code(self, a, code: int):
+        return a == code
+
+    def greater_code(self, a, code: int):
+        return a > code
+
+    def lookup(self, table: list[bool], codes):
+        return numpy.array(table, dtype=bool)[codes]
+
+    def b_not(self, a):
+        return ~a
+
+    def b_and(self, a, b):
+        return a & b
+
+    def b_or(self, a, b):
+        return a | b
+
+    def assign(self, target, mask, value: int):
+        target = target.copy()
+        target[mask] = value
+        return target
+
+    def to_list(self, a) -> list:
+        return a.tolist()
+
+
+class RuleSimulator:
+    """
+    Evaluates the workflow and the rules of all jobs for many variable scenarios at once.
+    Variable values are stored column-wise (one column per variable, one row per scenario) and dictionary encoded,
+    so conditions become integer comparisons on whole columns (numpy is used if available)
+    and regular expressions are only matched once per distinct value.
+    Results for conditions and rule lists shared by multiple jobs are only computed once.
+    """
+    NONE_CODE = 0  # code for undefined variable
+    EMPTY_CODE = 1  # code for empty string
+    YAML_NULL = ("null", "Null", "NULL", "~")  # null values of YAML scenario files (read with yaml.BaseLoader)
+    WHEN_VALUES = [None, When.always, When.never, When.manual, When.on_success, When.on_failure]
+
+    def __init__(self, pipeline: Pipeline, scenarios: list[tuple[str, dict[str, str | None]]],
+                 use_numpy: bool | None = None):
+        """
+        :param pipeline: pipeline to simulate, current variable values are the base for every scenario
+        :param scenarios: scenario names with variable values (value None means variable is not defined)
+        :param use_numpy: use numpy for column operations (default: if available)
+        """
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        if use_numpy and numpy is None:
+            raise RuntimeError("numpy is not installed")
+        self.pipeline = pipeline
+        self.scenario_names = [s[0] for s in scenarios]
+        size = len(scenarios)
+        self.backend = _NumpyBackend(size) if use_numpy else _PythonBackend(size)
+
+        for name, assignments in scenarios:
+            for k in assignments.keys():
+                if not isinstance(pipeline.vars.get(k), Variable):
+                    raise RuntimeError(f"Scenario '{name}': no such variable '{k}'")
+
+        # dictionary encoding of all values
+        self.values = [None, ""]
+        self.codes = {"": self.EMPTY_CODE}
+        self.columns = {}
+        for v in pipeline.vars.all():
+            column = []
+            for name, assignments in scenarios:
+                value = assignments.get(v.name, v.value)
+                if value is not None and v.options is not None and value not in v.options:
+                    raise ValueError(
+                        f"Scenario '{name}': invalid value '{value}' for variable '{v.name}', valid options are {v.options}")
+                column.append(self.encode(value))
+            self.columns[v.name] = self.backend.array(column)
+
+        self.condition_results = {}
+        self.rules_results = {}
+
+    def encode(self, value: str | None) -> int:
+        if value is None:
+            return self.NONE_CODE
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+    def column(self, v: Variable):
+        c = self.columns.get(v.name)
+        if c is None:
+            raise RuntimeError(f"Variable '{v.name}' used in condition is not part of the pipeline's variable store.")
+        return c
+
+    def eval_condition(self, c: Condition):
+        """
+        :return: for every scenario whether the condition is true
+        """
+        result = self.condition_results.get(id(c))
+        if result is not None:
+            return result[1]
+
+        b = self.backend
+        match c.t:
+            case Condition.Type.EQUAL | Condition.Type.NOT_EQUAL:
+                if isinstance(c.s, Variable):
+                    r = b.equal(self.column(c.v), self.column(c.s))
+                elif c.s in self.codes:
+                    r = b.equal_code(self.column(c.v), self.codes[c.s])
+                else:
+                    r = b.equal_code(self.column(c.v), -1)  # value does not appear in any scenario
+                if c.t == Condition.Type.NOT_EQUAL:
+                    r = b.b_not(r)
+            case Condition.Type.DEFINED_AND_NOT_EMPTY:
+                r = b.greater_code(self.column(c.v), self.EMPTY_CODE)
+            case Condition.Type.NOT_DEFINED_OR_EMPTY:
+                r = b.b_not(b.greater_code(self.column(c.v), self.EMPTY_CODE))
+            case Condition.Type.FULL_MATCH:
+                fullmatch = re.compile(c.s).fullmatch
+                table = [v is not None and fullmatch(v) is not None for v in self.values]
+                r = b.lookup(table, self.column(c.v))
+            case Condition.Type.AND:
+                ops = c.operands()
+                r = self.eval_condition(ops[0])
+                for op in ops[1:]:
+                    r = b.b_and(r, self.eval_condition(op))
+            case Condition.Type.OR:
+                ops = c.operands()
+                r = self.eval_condition(ops[0])
+                for op in ops[1:]:
+                    r = b.b_or(r, self.eval_condition(op))
+            case _:
+                raise RuntimeError("Invalid type")
+
+        self.condition_results[id(c)] = (c, r)  # keep condition alive so its id is not reused
+        return r
+
+    def eval_rules(self, rules: list[Rule] | None, default: When = When.always):
+        """
+        Evaluate rules like Job.eval_when() does for every scenario.
+        :return: codes of the resulting 'when' (index into WHEN_VALUES) for every scenario
+        """
+        b = self.backend
+        if not rules:
+            return b.full(self.WHEN_VALUES.index(default))
+
+        key = (tuple(id(r) for r in rules), default)
+        result = self.rules_results.get(key)
+        if result is not None:
+            return result[1]
+
+        undecided = b.true()
+        when = b.full(self.WHEN_VALUES.index(When.never))
+        for r in rules:
+            if r.condition is None:
+                matched = undecided
+            else:
+                matched = b.b_and(undecided, self.eval_condition(r.condition))
+            when = b.assign(when, matched, self.WHEN_VALUES.index(r.when or default))
+            undecided = b.b_and(undecided, b.b_not(matched))
+
+        self.rules_results[key] = (rules, when)
+        return when
+
+    def workflow(self) -> list[bool]:
+        """
+        :return: for every scenario whether the pipeline is enabled by the workflow rules
+        """
+        if self.pipeline.workflow is None:
+            return [True] * len(self.scenario_names)
+        for r in self.pipeline.workflow:
+            if r.when not in (None, When.always, When.never):
+                raise RuntimeError(f"invalid 'when'-type for pipeline workflow '{r.when}'")
+        when = self.eval_rules(self.pipeline.workflow)
+        return [self.WHEN_VALUES[w] == When.always for w in self.backend.to_list(when)]
+
+    def job_matrix(self) -> list[tuple[Job, list[When]]]:
+        """
+        :return: all jobs (ordered by stage and name) with their resulting 'when' for every scenario
+        """
+        jobs_by_stage = {s: [] for s in self.pipeline.stages.all()}
+        for j in self.pipeline.jobs.all():
+            jobs_by_stage[j.config.stage].append(j)
+        matrix = []
+        for jobs in jobs_by_stage.values():
+            for j in sorted(jobs):
+                when = self.backend.to_list(self.eval_rules(j.config.rules))
+                matrix.append((j, [self.WHEN_VALUES[w] for w in when]))
+        return matrix
+
+    def table(self) -> list[list[str]]:
+        """
+        :return: rows of the result table (first row is header, second row is workflow)
+        """
+        rows = [["job"] + self.scenario_names]
+        enabled = self.workflow()
+        rows.append(["(workflow)"] + ["enabled" if e else "disabled" for e in enabled])
+        for j, when in self.job_matrix():
+            rows.append([f"{j.name} ({j.internal_name})"] +
+                        [str(w) if e else "-" for w, e in zip(when, enabled)])
+        return rows
+
+    @staticmethod
+    def load_scenarios(file: str) -> list[tuple[str, dict[str, str | None]]]:
+        """
+        Load scenarios from a CSV or YAML file.
+        CSV: header contains variable names (optional column 'scenario' for names), empty cells keep the current value.
+        YAML: either a mapping of scenario names to variable mappings or a list of variable mappings,
+        all values are read as strings (e.g. 'yes' stays 'yes'), a value null (or ~) means the variable is not defined.
+        """
+        scenarios = []
+        if file.lower().endswith(".csv"):
+            with open(file, "r", newline="") as f:
+                for i, row in enumerate(csv.DictReader(f)):
+                    name = row.pop("scenario", None) or f"#{i + 1}"
+                    scenarios.append((name, {k: v for k, v in row.items() if v != ""}))
+        else:
+            import yaml  # import yaml only when needed to minimize dependencies in pipeline
+            with open(file, "r") as f:
+                # variable values are strings, don't convert 'yes', '1.0', ... (BaseLoader only creates strings)
+                data = yaml.load(f, Loader=yaml.BaseLoader)
+            if isinstance(data, dict):
+                items = list(data.items())
+            elif isinstance(data, list):
+                items = [(f"#{i + 1}", d) for i, d in enumerate(data)]
+            else:
+                raise RuntimeError(f"In file {file}: expected a list or mapping of scenarios")
+            for name, assignments in items:
+                if not isinstance(assignments, dict):
+                    raise RuntimeError(f"In file {file}: scenario '{name}' is not a mapping of variables")
+                for k, v in assignments.items():
+                    if not isinstance(v, str):
+                        raise RuntimeError(f"In file {file}: value of variable '{k}' in scenario '{name}' is not a string")
+                scenarios.append((name, {k: None if v in RuleSimulator.YAML_NULL else v for k, v in assignments.items()}))
+        return scenarios
+
+
+def print_table(rows: list[list[str]], as_csv: bool = False):
+    if as_csv:
+        import sys
+        csv.writer(sys.stdout).writerows(rows)
+        return
+    widths = [max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
+    for r in rows:
+        print("  ".join(c.ljust(w) for c, w in zip(r, widths)).rstrip())
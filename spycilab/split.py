@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import os
+import re
+import typing
+
+from .graph import JobGraph
+from .job import Job, JobConfig, JobStore, Trigger
+from .rule import Rule, When
+from .stage import Stage, StageStore
+from .variable import Condition, Variable, VariableStore
+
+if typing.TYPE_CHECKING:
+    from .pipeline import Pipeline
+
+
+class PipelineSplitter:
+    """
+    Splits the jobs of a pipeline into child pipelines, each written to its own file.
+    The parent pipeline (written to the pipeline's output) only contains one trigger job per child pipeline
+    (strategy 'depend', so a trigger job finishes with its child pipeline).
+    Split modes:
+     - 'stage': one child pipeline per stage, trigger jobs run in the stage order
+     - 'needs': one child pipeline per connected group of jobs with explicit 'needs' (triggered immediately),
+                all other jobs (relying on stage order) are kept together in one child pipeline that waits for
+                every group having jobs in earlier stages
+    Trigger jobs only run if any job of their child pipeline can run (see trigger_rules()).
+    """
+    MODES = ["stage", "needs"]
+
+    def __init__(self, pipeline: Pipeline, mode: str, directory: str):
+        """
+        :param pipeline: pipeline to split (jobs must be updated already)
+        :param mode: how to split the pipeline (see MODES)
+        :param directory: where to write child pipeline files to (relative to repository root)
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Invalid split mode '{mode}', valid modes are {self.MODES}")
+        self.pipeline = pipeline
+        self.mode = mode
+        self.directory = directory
+        self.stage_index = {s: i for i, s in enumerate(pipeline.stages.all())}
+
+    def stage_groups(self) -> list[tuple[str, list[Job]]]:
+        groups = {s: [] for s in self.pipeline.stages.all()}
+        for j in self.pipeline.jobs.all():
+            groups[j.config.stage].append(j)
+        for j in self.pipeline.jobs.all():
+            for n in JobGraph.needed_jobs(j):
+                if n.config.stage is not j.config.stage:
+                    raise RuntimeError(f"Can't split pipeline by stage: job '{j.internal_name}' needs job '{n.internal_name}' "
+                                       f"of another stage (consider splitting by needs).")
+        return [(s.name, jobs) for s, jobs in groups.items() if jobs]
+
+    def needs_groups(self) -> list[tuple[str, list[Job]]]:
+        # union-find over explicit needs
+        parent = {j: j for j in self.pipeline.jobs.all()}
+
+        def find(j: Job) -> Job:
+            while parent[j] is not j:
+                parent[j] = parent[parent[j]]
+                j = parent[j]
+            return j
+
+        for j in self.pipeline.jobs.all():
+            for n in JobGraph.needed_jobs(j):
+                parent[find(n)] = find(j)
+
+        components = {}
+        for j in self.pipeline.jobs.all():
+            components.setdefault(find(j), []).append(j)
+
+        groups = []
+        main = []
+        for jobs in components.values():
+            if all(j.config.needs is not None for j in jobs):
+                groups.append((jobs[0].internal_name, jobs))
+            else:
+                main.extend(jobs)
+        if main:
+            groups.append(("main", main))
+        return groups
+
+    @staticmethod
+    def check_dependencies(groups: list[tuple[str, list[Job]]]):
+        # artifacts are not passed between child pipelines
+        group_of = {j: name for name, jobs in groups for j in jobs}
+        for name, jobs in groups:
+            for j in jobs:
+                for d in j.dependency_jobs() or []:
+                    if group_of.get(d) != name:
+                        raise RuntimeError(f"Can't split pipeline: job '{j.internal_name}' depends on artifacts of job "
+                                           f"'{d.internal_name}' that ends up in another child pipeline.")
+
+    @staticmethod
+    def condition_variables(c: Condition) -> list[Variable]:
+        if c.t in (Condition.Type.AND, Condition.Type.OR):
+            return [v for o in c.operands() for v in PipelineSplitter.condition_variables(o)]
+        return [v for v in (c.v, c.s) if isinstance(v, Variable)]
+
+    @staticmethod
+    def check_pipeline_source(groups: list[tuple[str, list[Job]]]):
+        # inside a child pipeline CI_PIPELINE_SOURCE is always 'parent_pipeline'
+        for _, jobs in groups:
+            for j in jobs:
+                for r in j.config.rules or []:
+                    if r.condition is None:
+                        continue
+                    if any(v.name == "CI_PIPELINE_SOURCE" for v in PipelineSplitter.condition_variables(r.condition)):
+                        raise RuntimeError(f"Can't split pipeline: rules of job '{j.internal_name}' check CI_PIPELINE_SOURCE, "
+                                           f"which is always 'parent_pipeline' in a child pipeline.")
+
+    def first_stage(self, jobs: list[Job]) -> Stage:
+        return min((j.config.stage for j in jobs), key=lambda s: self.stage_index[s])
+
+    @staticmethod
+    def trigger_rules(jobs: list[Job]) -> list[Rule] | None:
+        """
+        Conservative rules for triggering a child pipeline: it is triggered if any rule of any job
+        (not disabled by 'when: never') can match, earlier rules with 'when: never' are not taken into account.
+        :return: rules for the trigger job (None if it always has to run)
+        """
+        rules = []
+        conditions = set()
+        for j in jobs:
+            if j.config.when == When.never:
+                continue
+            if not j.config.rules:
+                return None
+            for r in j.config.rules:
+                if r.when == When.never:
+                    continue
+                if r.condition is None:
+                    return None
+                c = r.condition.to_yaml()
+                if c not in conditions:
+                    conditions.add(c)
+                    rules.append(Rule(r.condition))
+        if not rules:
+            return [Rule(when=When.never)]
+        return rules
+
+    @staticmethod
+    def file_name(name: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_.-]+", "-", name).strip("-").lower() + ".yml"
+
+    def create_child(self, jobs: list[Job], output: str) -> Pipeline:
+        from .pipeline import Pipeline
+        stages = StageStore()
+        job_stages = set(j.config.stage for j in jobs)
+        for k in self.pipeline.stages.all_identifier():
+            s = self.pipeline.stages.get(k)
+            if s in job_stages:
+                stages.add(k, s)
+        job_store = JobStore()
+        for j in jobs:
+            job_store.add(j.internal_name, j)
+        # variables are forwarded from the parent pipeline
+        child = Pipeline(jobs=job_store, stages=stages, variables=VariableStore())
+        child.output = output
+        child.dedupe = self.pipeline.dedupe
+        child.run_script = self.pipeline.run_script
+        child.job_scripts = self.pipeline.job_scripts
+        child.dag = self.pipeline.dag  # trigger jobs of the parent keep the stage order
+        return child
+
+    def split(self) -> tuple[Pipeline, list[Pipeline]]:
+        """
+        :return: parent pipeline and child pipelines
+        """
+        from .pipeline import Pipeline
+        groups = self.stage_groups() if self.mode == "stage" else self.needs_groups()
+        self.check_dependencies(groups)
+        self.check_pipeline_source(groups)
+
+        children = []
+        triggers = JobStore()
+        trigger_stage = {}
+        main_trigger = None
+        used_files = set()
+        for name, jobs in groups:
+            file = self.file_name(name)
+            i = 1
+            while file in used_files:
+                i += 1
+                file = self.file_name(f"{name}-{i}")
+            used_files.add(file)
+            output = os.path.join(self.directory, file).replace(os.sep, "/")
+            children.append(self.create_child(jobs, output))
+
+            trigger = Job(f"{name} pipeline", JobConfig(
+                trigger=Trigger(include=output, strategy_depend=True, forward_pipeline_variables=True),
+                rules=self.trigger_rules(jobs),
+                needs_check_diverging_rules=False))
+            triggers.add("trigger_" + re.sub(r"\W+", "_", file[:-len(".yml")]), trigger)
+            trigger_stage[trigger] = self.first_stage(jobs)
+            if self.mode == "needs":
+                if name == "main" and jobs is groups[-1][1]:
+                    main_trigger = trigger
+                else:
+                    # group only consists of jobs with explicit needs, no need to wait for anything
+                    trigger.yaml_override = {"needs": []}
+
+        if main_trigger is not None:
+            # jobs without 'needs' wait for all jobs of earlier stages
+            main_jobs = groups[-1][1]
+            last = max(self.stage_index[j.config.stage] for j in main_jobs if j.config.needs is None)
+            needed = [t for t in triggers.all() if t is not main_trigger and self.stage_index[trigger_stage[t]] < last]
+            trigger_stage[main_trigger] = max((trigger_stage[t] for t in needed + [main_trigger]),
+                                              key=lambda s: self.stage_index[s])
+            main_trigger.yaml_override = {"needs": [{"job": t.name, "optional": True} for t in needed]}
+
+        # new stage objects, trigger jobs are not ordered like the jobs of their stage
+        stages = StageStore()
+        parent_stages = {}
+        used_stages = set(trigger_stage.values())
+        for k in self.pipeline.stages.all_identifier():
+            s = self.pipeline.stages.get(k)
+            if s in used_stages:
+                parent_stages[s] = stages.add(k, Stage(s.name))
+        for t in triggers.all():
+            t.config.stage = parent_stages[trigger_stage[t]]
+
+        parent = Pipeline(jobs=triggers, stages=stages, variables=self.pipeline.vars,
+                          workflow=self.pipeline.workflow, yaml_override=self.pipeline.yaml_override)
+        parent.output = self.pipeline.output
+        parent.dedupe = self.pipeline.dedupe
+        parent.run_script = self.pipeline.run_script
+        parent.jobs.update_jobs()
+        return parent, children
+
+    def write(self, force: bool = False):
+        parent, children = self.split()
+        os.makedirs(self.directory, exist_ok=True)
+        for c in children:
+            c.write_output(force)
+        parent.write_output(force)
@@ -6,10 +6,36 @@
 from .typed_store import TypedStore
 
 class Stage:
+    # invisible characters prepended to names of jobs in stages preserving order, in ascending code point order
+    # (no joiners or byte order marks that could change how names are displayed)
+    ORDER_DIGITS = "\u200B\u200C\u2060\u2061\u2062\u2063\u2064"
+
     def __init__(self, name:str, preserve_order:bool = False):
         self.name = name
         self.preserve_order = preserve_order
 
+    @staticmethod
+    def order_prefixes(count: int) -> list[str]:
+        """
+        GitLab sorts the jobs of a stage by name, prefixing the names with these strings keeps the given order.
+        All prefixes have the same length (digits of the job's index in base len(ORDER_DIGITS)),
+        so names are compared by their prefix first, no matter what the names are.
+        :param count: number of jobs in the stage
+        :return: prefix of every job in order
+        """
+        base = len(Stage.ORDER_DIGITS)
+        width = 1
+        while base ** width < count:
+            width += 1
+        prefixes = []
+        for i in range(count):
+            digits = []
+            for _ in range(width):
+                i, d = divmod(i, base)
+                digits.append(Stage.ORDER_DIGITS[d])
+            prefixes.append("".join(reversed(digits)))
+        return prefixes
+
     def to_yaml(self):
         return self.name
 
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import time
+import typing
+from collections import deque
+
+from .artifact import Artifacts
+from .job import Job, JobStore
+from .stage import StageStore
+
+
+class PipelineValidator:
+    """
+    Checks all jobs of a pipeline in a single pass over indexes that are built once
+    and collects every problem instead of stopping at the first one.
+    Time spent in each check is recorded in 'timings' (seconds).
+    """
+
+    def __init__(self, jobs: JobStore, stages: StageStore):
+        self.jobs = list(jobs.all())
+        self.stages = stages
+        self.errors = []
+        self.timings = {}
+        self.stage_index = {}
+        self.job_set = set()
+        self.needed = {}
+
+    def validate(self) -> list[str]:
+        """
+        :return: all problems found (empty if pipeline is valid)
+        """
+        self.errors = []
+        self.timings = {}
+        self.timed("index", self.build_index)
+        self.timed("names", self.check_names)
+        self.timed("needs", self.check_needs)
+        self.timed("dependencies", self.check_dependencies)
+        self.timed("cycles", self.check_cycles)
+        return self.errors
+
+    def timed(self, name: str, check: typing.Callable[[], None]):
+        start = time.perf_counter()
+        check()
+        self.timings[name] = time.perf_counter() - start
+
+    def build_index(self):
+        self.stage_index = {s: i for i, s in enumerate(self.stages.all())}
+        self.job_set = set(self.jobs)
+        self.needed = {}
+        for j in self.jobs:
+            if j.config.stage is None:
+                self.errors.append(f"Job '{j.internal_name}' has no stage.")
+            elif j.config.stage not in self.stage_index:
+                self.errors.append(f"Job '{j.internal_name}': stage '{j.config.stage.name}' was not added to the stage store.")
+
+    def check_names(self):
+        by_name = {}
+        for j in self.jobs:
+            other = by_name.setdefault(j.name, j)
+            if other is not j:
+                self.errors.append(f"Job '{other.internal_name}' and '{j.internal_name}' have the same name ('{j.name}')")
+
+    def check_needs(self):
+        for j in self.jobs:
+            if j.config.needs is None:
+                continue
+            needed = []
+            for n in j.config.needs:
+                if isinstance(n, Artifacts):
+                    needed_job = n.produced_by
+                    if needed_job is None:
+                        self.errors.append(f"Job '{j.internal_name}' needs artifact {n.paths} that is not produced by any job.")
+                        continue
+                elif isinstance(n, Job):
+                    needed_job = n
+                else:
+                    self.errors.append(f"Job '{j.internal_name}': Invalid type for need '{type(n)}'")
+                    continue
+
+                if needed_job not in self.job_set:
+                    self.errors.append(f"Job '{j.internal_name}' needs job '{needed_job.name}' that is not part of the pipeline.")
+                    continue
+                needed.append(needed_job)
+
+                stage = self.stage_index.get(j.config.stage)
+                needed_stage = self.stage_index.get(needed_job.config.stage)
+                if stage is not None and needed_stage is not None and needed_stage > stage:
+                    self.errors.append(f"Job '{j.internal_name}' (stage '{j.config.stage.name}') needs job "
+                                       f"'{needed_job.internal_name}' of later stage '{needed_job.config.stage.name}'.")
+            self.needed[j] = needed
+
+    def check_dependencies(self):
+        for j in self.jobs:
+            self.check_after(j)
+            # dependencies derived from 'needs' are checked with the needs
+            if not isinstance(j.config.dependencies, list):
+                continue
+            needed = [n.produced_by for n in j.config.needs or [] if isinstance(n, Artifacts)]
+            for a in j.config.dependencies:
+                if not isinstance(a, Artifacts):
+                    self.errors.append(f"Job '{j.internal_name}': Invalid type for dependency '{type(a)}'")
+                    continue
+                producer = a.produced_by
+                if producer is None:
+                    self.errors.append(f"Job '{j.internal_name}' depends on artifact {a.paths} that is not produced by any job.")
+                elif producer not in self.job_set:
+                    self.errors.append(f"Job '{j.internal_name}' depends on job '{producer.name}' that is not part of the pipeline.")
+                elif j.config.needs is not None:
+                    if producer not in needed:
+                        self.errors.append(f"Job '{j.internal_name}' depends on artifact {a.paths} of job "
+                                           f"'{producer.internal_name}' without needing it.")
+                else:
+                    stage = self.stage_index.get(j.config.stage)
+                    producer_stage = self.stage_index.get(producer.config.stage)
+                    if stage is not None and producer_stage is not None and producer_stage >= stage:
+                        self.errors.append(f"Job '{j.internal_name}' (stage '{j.config.stage.name}') depends on artifact "
+                                           f"{a.paths} of job '{producer.internal_name}' that is not in an earlier stage.")
+
+    def check_after(self, j: Job):
+        if j.config.after is None:
+            return
+        if j.config.needs is not None:
+            self.errors.append(f"Job '{j.internal_name}' has 'needs' and 'after' (add the jobs to 'needs' instead).")
+            return
+        for a in j.config.after:
+            if not isinstance(a, Job):
+                self.errors.append(f"Job '{j.internal_name}': Invalid type for 'after' '{type(a)}'")
+            elif a not in self.job_set:
+                self.errors.append(f"Job '{j.internal_name}' comes after job '{a.name}' that is not part of the pipeline.")
+            else:
+                stage = self.stage_index.get(j.config.stage)
+                after_stage = self.stage_index.get(a.config.stage)
+                if stage is not None and after_stage is not None and after_stage >= stage:
+                    self.errors.append(f"Job '{j.internal_name}' (stage '{j.config.stage.name}') comes after job "
+                                       f"'{a.internal_name}' that is not in an earlier stage.")
+
+    def check_cycles(self):
+        # jobs without needs only depend on earlier stages and needs on later stages are reported already,
+        # so any cycle consists of 'needs' edges only
+        dependents = {}
+        in_degree = {}
+        for j, needed in self.needed.items():
+            in_degree[j] = len(needed)
+            for n in needed:
+                dependents.setdefault(n, []).append(j)
+        ready = deque(j for j in self.jobs if in_degree.get(j, 0) == 0)
+        visited = 0
+        while ready:
+            j = ready.popleft()
+            visited += 1
+            for d in dependents.get(j, []):
+                in_degree[d] -= 1
+                if in_degree[d] == 0:
+                    ready.append(d)
+        if visited != len(self.jobs):
+            cyclic = [j.internal_name for j in self.jobs if in_degree.get(j, 0) > 0]
+            self.errors.append(f"Jobs {cyclic} have cyclic dependencies.")
@@ -6,9 +6,11 @@
 from __future__ import annotations
 
 import re
+from collections.abc import Callable
 from .enum_string import EnumString
 from enum import Enum
 
+from . import generation
 from .overridable_yaml_object import OverridableYamlObject
 from .typed_store import TypedStore
 
@@ -48,6 +50,11 @@ class Variable(OverridableYamlObject):
         if self.options is not None and self.default_value not in self.options:
             raise ValueError(f"Variable '{self.name}': default value must be one of {self.options}")
 
+    def __setattr__(self, key, value):
+        if key == "name" and "name" in self.__dict__:
+            generation.invalidate()  # name is part of the yaml of conditions using this variable
+        object.__setattr__(self, key, value)
+
     def check_name(self):
         if self.name is None:
             raise RuntimeError("usage of variable before name was given")
@@ -156,6 +163,18 @@ class Condition:
         self.v = None  # variable
         self.t = None  # type
         self.s = None  # compare string
+        self._compiled = None  # (modification count, result of compile())
+
+    # incremented whenever a complete condition is modified, compiled conditions capture the compiled
+    # operands, so any modification invalidates all of them
+    _modifications = 0
+
+    def __setattr__(self, key, value):
+        # a condition is complete once its type is set, filling in a new condition does not affect any cached yaml
+        if key[0] != "_" and self.__dict__.get("t") is not None:
+            generation.invalidate()  # cached yaml of this condition (and of everything containing it) is outdated
+            Condition._modifications += 1
+        object.__setattr__(self, key, value)
 
     @staticmethod
     def equal(v: Variable, s: Variable | str) -> Condition:
@@ -240,36 +259,236 @@ class Condition:
     def eval(self) -> bool:
         if self.t is None:
             raise RuntimeError("Type not set")
+        match self.t:
+            case self.Type.AND:
+                return self.a.eval() and self.b.eval()
+            case self.Type.OR:
+                return self.a.eval() or self.b.eval()
+            case _:
+                return self._eval_leaf(self.v.value, self.s.value if isinstance(self.s, Variable) else self.s)
+
+    def _eval_leaf(self, value: str | None, s: str | None) -> bool:
+        """
+        :param value: value of the variable
+        :param s: compare string (value of the compared variable)
+        """
+        match self.t:
+            case self.Type.EQUAL:
+                return value == s
+            case self.Type.NOT_EQUAL:
+                return value != s
+            case self.Type.DEFINED_AND_NOT_EMPTY:
+                return bool(value)
+            case self.Type.NOT_DEFINED_OR_EMPTY:
+                return not bool(value)
+            case self.Type.FULL_MATCH:
+                if value is None:
+                    return False
+                return re.fullmatch(s, value) is not None
+            case _:
+                raise RuntimeError("Invalid type")
+
+    def __bool__(self) -> bool:
+        return self.eval()
+
+    def operands(self) -> list[Condition]:
+        """
+        :return: operands of this AND/OR condition, nested conditions of the same type are flattened into a single list
+        """
+        if self.t not in (Condition.Type.AND, Condition.Type.OR):
+            return [self]
+        ops = []
+        for c in (self.a, self.b):
+            if c.t == self.t:
+                ops.extend(c.operands())
+            else:
+                ops.append(c)
+        return ops
+
+    def key(self) -> tuple:
+        """
+        :return: structural identity of this condition, conditions with equal keys generate the same (flattened) yaml
+        """
+        if self.t in (Condition.Type.AND, Condition.Type.OR):
+            return self.t.value, tuple(c.key() for c in self.operands())
+
+        def name(v: Variable):
+            return v.name if v.name is not None else id(v)
+
+        return self.t.value, name(self.v), ("$", name(self.s)) if isinstance(self.s, Variable) else self.s
+
+    def _fold(self, fixed_values: dict[str, str | None]) -> Condition | bool:
+        """
+        :return: result of this (non-boolean) condition if all its variables are fixed, otherwise the condition itself
+        """
+        if self.v.name not in fixed_values:
+            return self
+        if isinstance(self.s, Variable):
+            if self.s.name not in fixed_values:
+                return self
+            return self._eval_leaf(fixed_values[self.v.name], fixed_values[self.s.name])
+        return self._eval_leaf(fixed_values[self.v.name], self.s)
+
+    def _complement_key(self) -> tuple | None:
+        """
+        :return: key of the condition that is true exactly if this one is false (only for simple conditions)
+        """
+        complements = {
+            Condition.Type.EQUAL: Condition.Type.NOT_EQUAL,
+            Condition.Type.NOT_EQUAL: Condition.Type.EQUAL,
+            Condition.Type.DEFINED_AND_NOT_EMPTY: Condition.Type.NOT_DEFINED_OR_EMPTY,
+            Condition.Type.NOT_DEFINED_OR_EMPTY: Condition.Type.DEFINED_AND_NOT_EMPTY,
+        }
+        complement = complements.get(self.t)
+        if complement is None:
+            return None
+        return (complement.value,) + self.key()[1:]
+
+    def simplify(self, fixed_values: dict[str, str | None] | None = None) -> Condition | bool:
+        """
+        Normalize this condition:
+          - nested AND/OR conditions are flattened and duplicate operands removed
+          - absorption: 'A && (A || B)' -> 'A', 'A || (A && B)' -> 'A'
+          - redundant checks: '$A == 'x' && $A defined' -> '$A == 'x'', '$A == 'x' || $A defined' -> '$A defined'
+          - contradictions/tautologies: '$A == 'x' && $A != 'x'' -> False, '$A == 'x' && $A == 'y'' -> False, ...
+          - conditions on variables with known values are folded to constants
+        This condition is not modified, unchanged parts are shared with the result.
+        :param fixed_values: values of variables (by name) that are known in advance
+        :return: simplified condition, or True/False if the condition is constant
+        """
+        if self.t is None:
+            raise RuntimeError("Type not set")
+        if self.t not in (Condition.Type.AND, Condition.Type.OR):
+            return self._fold(fixed_values) if fixed_values else self
+
+        is_and = self.t == Condition.Type.AND
+        ops = []
+        for c in self.operands():
+            c = c.simplify(fixed_values)
+            if isinstance(c, bool):
+                if c != is_and:
+                    return c  # False in AND, True in OR
+                continue
+            ops.extend(c.operands() if c.t == self.t else [c])
+
+        unique = {}
+        for c in ops:
+            unique.setdefault(c.key(), c)
+        ops = list(unique.values())
+        keys = set(unique.keys())
+
+        # contradictions (AND) and tautologies (OR)
+        same = Condition.Type.EQUAL if is_and else Condition.Type.NOT_EQUAL
+        compared = {}
+        for c in ops:
+            if c._complement_key() in keys:
+                return not is_and
+            if c.t == same and not isinstance(c.s, Variable):
+                # variable can't be equal to two different strings at once
+                previous = compared.setdefault(c.key()[1], c.s)
+                if previous != c.s:
+                    return not is_and
+
+        # absorption
+        inner = Condition.Type.OR if is_and else Condition.Type.AND
+        ops = [c for c in ops if not (c.t == inner and any(o.key() in keys for o in c.operands()))]
+
+        # equality to a non-empty string implies the variable is defined and not empty
+        equal_vars = set(c.key()[1] for c in ops if c.t == Condition.Type.EQUAL and isinstance(c.s, str) and c.s)
+        defined_vars = set(c.key()[1] for c in ops if c.t == Condition.Type.DEFINED_AND_NOT_EMPTY)
+        if is_and:
+            ops = [c for c in ops if not (c.t == Condition.Type.DEFINED_AND_NOT_EMPTY and c.key()[1] in equal_vars)]
+        else:
+            ops = [c for c in ops if not (c.t == Condition.Type.EQUAL and isinstance(c.s, str) and c.s
+                                          and c.key()[1] in defined_vars)]
+
+        if not ops:
+            return is_and
+        result = ops[0]
+        for c in ops[1:]:
+            result = Condition.b_and(result, c) if is_and else Condition.b_or(result, c)
+        return result
+
+    def compile(self) -> Callable[[], bool]:
+        """
+        Compile this condition into a single callable that evaluates it with the current variable values.
+        The condition is simplified first (see simplify()), regular expressions are compiled once.
+        The result is cached until any condition is modified.
+        :return: callable returning the same as eval()
+        """
+        if self._compiled is None or self._compiled[0] != Condition._modifications:
+            simplified = self.simplify()
+            if isinstance(simplified, bool):
+                compiled = lambda: simplified
+            else:
+                compiled = simplified._compile()
+            self._compiled = (Condition._modifications, compiled)
+        return self._compiled[1]
+
+    def _compile(self) -> Callable[[], bool]:
+        if self.t is None:
+            raise RuntimeError("Type not set")
+        v = self.v
         match self.t:
             case self.Type.EQUAL:
                 if isinstance(self.s, Variable):
-                    return self.v.value == self.s.value
-                else:
-                    return self.v.value == self.s
+                    other = self.s
+                    return lambda: v.value == other.value
+                s = self.s
+                return lambda: v.value == s
             case self.Type.NOT_EQUAL:
                 if isinstance(self.s, Variable):
-                    return self.v.value != self.s.value
-                else:
-                    return self.v.value != self.s
+                    other = self.s
+                    return lambda: v.value != other.value
+                s = self.s
+                return lambda: v.value != s
             case self.Type.DEFINED_AND_NOT_EMPTY:
-                return bool(self.v.value)
+                return lambda: bool(v.value)
             case self.Type.NOT_DEFINED_OR_EMPTY:
-                return not bool(self.v.value)
+                return lambda: not v.value
             case self.Type.FULL_MATCH:
-                if self.v.value is None:
-                    return False
-                return re.fullmatch(self.s, self.v.value) is not None
+                fullmatch = re.compile(self.s).fullmatch
+                return lambda: v.value is not None and fullmatch(v.value) is not None
             case self.Type.AND:
-                return self.a.eval() and self.b.eval()
+                ops = [c._compile() for c in self.operands()]
+                if len(ops) == 2:
+                    a, b = ops
+                    return lambda: a() and b()
+
+                def all_true() -> bool:
+                    for op in ops:
+                        if not op():
+                            return False
+                    return True
+
+                return all_true
             case self.Type.OR:
-                return self.a.eval() or self.b.eval()
+                ops = [c._compile() for c in self.operands()]
+                if len(ops) == 2:
+                    a, b = ops
+                    return lambda: a() or b()
+
+                def any_true() -> bool:
+                    for op in ops:
+                        if op():
+                            return True
+                    return False
+
+                return any_true
             case _:
                 raise RuntimeError("Invalid type")
 
-    def __bool__(self) -> bool:
-        return self.eval()
+    def to_yaml(self, flatten: bool = False) -> str:
+        """
+        :param flatten: write nested AND/OR conditions of the same type as a single list, e.g. '(A && B && C)'
+        """
+        if flatten and self.t in (Condition.Type.AND, Condition.Type.OR):
+            op = " && " if self.t == Condition.Type.AND else " || "
+            return "(" + op.join(c.to_yaml(flatten=True) for c in self.operands()) + ")"
+        # conditions are shared by many rules and jobs, only generate their yaml once per generation
+        return generation.lookup(self, self._to_yaml)
 
-    def to_yaml(self) -> str:
+    def _to_yaml(self) -> str:
         if self.t is None:
             raise RuntimeError("Type not set")
         match self.t:
@@ -0,0 +1,477 @@
+import re
+
+# Streaming YAML emitter for the generated pipeline.
+# The output is identical to yaml.dump(data, stream, indent=2, sort_keys=False) (PyYAML),
+# but only the types produced by the to_yaml() functions are supported:
+# dict, list, str, bool, int and None.
+# The scalar analysis and writing functions closely follow PyYAML's emitter (yaml/emitter.py).
+
+_BREAKS = "\n\x85\u2028\u2029"
+_WHITESPACE = "\0 \t\r\n\x85\u2028\u2029"
+
+# implicit resolvers of PyYAML (yaml/resolver.py),
+# a string matching one of these has to be quoted so it is not read as another type
+_IMPLICIT_RESOLVERS = [
+    (re.compile(r'''^(?:yes|Yes|YES|no|No|NO
+                    |true|True|TRUE|false|False|FALSE
+                    |on|On|ON|off|Off|OFF)$''', re.X), "yYnNtTfFoO"),
+    (re.compile(r'''^(?:[-+]?(?:[0-9][0-9_]*)\.[0-9_]*(?:[eE][-+][0-9]+)?
+                    |\.[0-9][0-9_]*(?:[eE][-+][0-9]+)?
+                    |[-+]?[0-9][0-9_]*(?::[0-5]?[0-9])+\.[0-9_]*
+                    |[-+]?\.(?:inf|Inf|INF)
+                    |\.(?:nan|NaN|NAN))$''', re.X), "-+0123456789."),
+    (re.compile(r'''^(?:[-+]?0b[0-1_]+
+                    |[-+]?0[0-7_]+
+                    |[-+]?(?:0|[1-9][0-9_]*)
+                    |[-+]?0x[0-9a-fA-F_]+
+                    |[-+]?[1-9][0-9_]*(?::[0-5]?[0-9])+)$''', re.X), "-+0123456789"),
+    (re.compile(r'^(?:<<)$'), "<"),
+    (re.compile(r'''^(?: ~
+                    |null|Null|NULL
+                    | )$''', re.X), "~nN"),
+    (re.compile(r'''^(?:[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]
+                    |[0-9][0-9][0-9][0-9] -[0-9][0-9]? -[0-9][0-9]?
+                     (?:[Tt]|[ \t]+)[0-9][0-9]?
+                     :[0-9][0-9] :[0-9][0-9] (?:\.[0-9]*)?
+                     (?:[ \t]*(?:Z|[-+][0-9][0-9]?(?::[0-9][0-9])?))?)$''', re.X), "0123456789"),
+    (re.compile(r'^(?:=)$'), "="),
+    (re.compile(r'^(?:!|&|\*)$'), "!&*"),
+]
+
+_ESCAPE_REPLACEMENTS = {
+    "\0": "0",
+    "\x07": "a",
+    "\x08": "b",
+    "\x09": "t",
+    "\x0A": "n",
+    "\x0B": "v",
+    "\x0C": "f",
+    "\x0D": "r",
+    "\x1B": "e",
+    "\"": "\"",
+    "\\": "\\",
+    "\x85": "N",
+    "\xA0": "_",
+    "\u2028": "L",
+    "\u2029": "P",
+}
+
+_DOUBLE_QUOTED_ESCAPE = re.compile("[^\x20-\x7E]|[\"\\\\]")
+
+# length of the (not written) tag, counts towards the maximum length of a simple key
+_TAG_LENGTH = {
+    str: len("!!str"),
+    bool: len("!!bool"),
+    int: len("!!int"),
+    type(None): len("!!null"),
+}
+
+
+class YamlEmitter:
+    """
+    Writes a YAML document directly to a stream.
+    """
+
+    class Unsupported(Exception):
+        """
+        Raised (before anything is written) if the data contains something this emitter can not write.
+        """
+        pass
+
+    def __init__(self, stream, indent: int = 2, width: int = 80):
+        self.stream = stream
+        self.best_indent = indent
+        self.best_width = width
+        self.styles = {}  # str -> chosen scalar style ('', "'" or '"')
+        self.anchors = {}  # id of list/dict -> anchor name (only for objects that appear more than once)
+        self.emitted = set()  # ids of anchored objects that have been written already
+        self.indents = []
+        self.indent = None
+        self.column = 0
+        self.whitespace = True
+        self.indention = True
+
+    def dump(self, data):
+        """
+        Write a document containing the given data.
+        """
+        if type(data) not in (dict, list):
+            raise YamlEmitter.Unsupported(f"document root of type '{type(data).__name__}'")
+        self.prepare(data)
+        self.node(data)
+        self.write_indent()
+        if hasattr(self.stream, "flush"):
+            self.stream.flush()
+
+    # preparation
+
+    def prepare(self, data):
+        """
+        Check that all values are supported and find objects that need an anchor
+        (same order as PyYAML's serializer).
+        """
+        seen = set()
+        anchor_count = 0
+        stack = [data]
+        while stack:
+            d = stack.pop()
+            t = type(d)
+            if t is dict or t is list:
+                i = id(d)
+                if i in seen:
+                    if i not in self.anchors:
+                        anchor_count += 1
+                        self.anchors[i] = "id%03d" % anchor_count
+                    continue
+                seen.add(i)
+                if t is dict:
+                    children = []
+                    for k, v in d.items():
+                        if type(k) not in _TAG_LENGTH:
+                            raise YamlEmitter.Unsupported(f"key of type '{type(k).__name__}'")
+                        children.append(v)
+                    stack.extend(reversed(children))
+                else:
+                    stack.extend(reversed(d))
+            elif t not in _TAG_LENGTH:
+                raise YamlEmitter.Unsupported(f"value of type '{t.__name__}'")
+
+    # nodes
+
+    def node(self, data, mapping: bool = False):
+        t = type(data)
+        if t is dict or t is list:
+            anchor = self.anchors.get(id(data))
+            if anchor is not None:
+                if id(data) in self.emitted:
+                    self.write_indicator("*" + anchor, True)
+                    return
+                self.emitted.add(id(data))
+                self.write_indicator("&" + anchor, True)
+
+            if not data:
+                self.write_indicator("[" if t is list else "{", True, whitespace=True)
+                self.write_indicator("]" if t is list else "}", False)
+            elif t is dict:
+                self.block_mapping(data)
+            else:
+                self.block_sequence(data, mapping)
+        else:
+            self.scalar(data)
+
+    def increase_indent(self, indentless: bool = False):
+        self.indents.append(self.indent)
+        if self.indent is None:
+            self.indent = 0
+        elif not indentless:
+            self.indent += self.best_indent
+
+    def block_sequence(self, data: list, mapping: bool):
+        self.increase_indent(indentless=(mapping and not self.indention))
+        for item in data:
+            self.write_indent()
+            self.write_indicator("-", True, indention=True)
+            self.node(item)
+        self.indent = self.indents.pop()
+
+    def block_mapping(self, data: dict):
+        self.increase_indent()
+        for k, v in data.items():
+            self.write_indent()
+            if self.is_simple_key(k):
+                self.scalar(k, simple_key=True)
+                self.write_indicator(":", False)
+            else:
+                self.write_indicator("?", True, indention=True)
+                self.scalar(k)
+                self.write_indent()
+                self.write_indicator(":", True, indention=True)
+            self.node(v, mapping=True)
+        self.indent = self.indents.pop()
+
+    # scalars
+
+    def is_simple_key(self, k) -> bool:
+        """
+        :return: False if key has to be written as complex key ('? key')
+        """
+        s = self.scalar_text(k)
+        return bool(s) and len(s) + _TAG_LENGTH[type(k)] < 128 and not any(ch in _BREAKS for ch in s)
+
+    @staticmethod
+    def scalar_text(value) -> str:
+        t = type(value)
+        if t is str:
+            return value
+        elif t is bool:
+            return "true" if value else "false"
+        elif value is None:
+            return "null"
+        else:
+            return str(value)
+
+    def scalar(self, value, simple_key: bool = False):
+        self.indents.append(self.indent)
+        self.indent = self.best_indent if self.indent is None else self.indent + self.best_indent
+        text = self.scalar_text(value)
+        style = self.styles.get(text) if type(value) is str else ""
+        if style is None:
+            style = self.choose_style(text)
+            self.styles[text] = style
+        split = not simple_key
+        if style == "":
+            self.write_plain(text, split)
+        elif style == "'":
+            self.write_single_quoted(text, split)
+        else:
+            self.write_double_quoted(text, split)
+        self.indent = self.indents.pop()
+
+    @staticmethod
+    def resolves_implicitly(text: str) -> bool:
+        """
+        :return: True if the plain string would be read as something other than a string (e.g. 'true' or '42')
+        """
+        first = text[0] if text else ""
+        if not first:
+            return True  # null
+        for regex, first_chars in _IMPLICIT_RESOLVERS:
+            if first in first_chars and regex.match(text):
+                return True
+        return False
+
+    @staticmethod
+    def choose_style(text: str) -> str:
+        """
+        Choose scalar style for a string (PyYAML's Emitter.analyze_scalar() and Emitter.choose_scalar_style()).
+        Keys are never empty or multiline, so the style does not depend on the context.
+        :return: '' for plain, "'" for single quoted, '"' for double quoted
+        """
+        if not text:
+            return "'"
+
+        block_indicators = False
+        line_breaks = False
+        special_characters = False
+        leading_space = False
+        leading_break = False
+        trailing_space = False
+        trailing_break = False
+        break_space = False
+        space_break = False
+
+        if text.startswith("---") or text.startswith("..."):
+            block_indicators = True
+
+        preceded_by_whitespace = True
+        followed_by_whitespace = len(text) == 1 or text[1] in _WHITESPACE
+        previous_space = False
+        previous_break = False
+        last = len(text) - 1
+        index = 0
+        while index < len(text):
+            ch = text[index]
+            if index == 0:
+                if ch in "#,[]{}&*!|>'\"%@`":
+                    block_indicators = True
+                if ch in "?:" and followed_by_whitespace:
+                    block_indicators = True
+                if ch == "-" and followed_by_whitespace:
+                    block_indicators = True
+            else:
+                if ch == ":" and followed_by_whitespace:
+                    block_indicators = True
+                if ch == "#" and preceded_by_whitespace:
+                    block_indicators = True
+
+            if ch in _BREAKS:
+                line_breaks = True
+            if not (ch == "\n" or "\x20" <= ch <= "\x7E"):
+                special_characters = True
+
+            if ch == " ":
+                if index == 0:
+                    leading_space = True
+                if index == last:
+                    trailing_space = True
+                if previous_break:
+                    break_space = True
+                previous_space = True
+                previous_break = False
+            elif ch in _BREAKS:
+                if index == 0:
+                    leading_break = True
+                if index == last:
+                    trailing_break = True
+                if previous_space:
+                    space_break = True
+                previous_space = False
+                previous_break = True
+            else:
+                previous_space = False
+                previous_break = False
+
+            index += 1
+            preceded_by_whitespace = ch in _WHITESPACE
+            followed_by_whitespace = index + 1 >= len(text) or text[index + 1] in _WHITESPACE
+
+        allow_block_plain = True
+        allow_single_quoted = True
+        if leading_space or leading_break or trailing_space or trailing_break:
+            allow_block_plain = False
+        if break_space:
+            allow_block_plain = allow_single_quoted = False
+        if space_break or special_characters:
+            allow_block_plain = allow_single_quoted = False
+        if line_breaks or block_indicators:
+            allow_block_plain = False
+
+        if allow_block_plain and not YamlEmitter.resolves_implicitly(text):
+            return ""
+        if allow_single_quoted:
+            return "'"
+        return '"'
+
+    # writers
+
+    def write(self, data: str):
+        self.column += len(data)
+        self.stream.write(data)
+
+    def write_indicator(self, indicator: str, need_whitespace: bool, whitespace: bool = False,
+                        indention: bool = False):
+        if self.whitespace or not need_whitespace:
+            data = indicator
+        else:
+            data = " " + indicator
+        self.whitespace = whitespace
+        self.indention = self.indention and indention
+        self.write(data)
+
+    def write_indent(self):
+        indent = self.indent or 0
+        if not self.indention or self.column > indent or (self.column == indent and not self.whitespace):
+            self.write_line_break()
+        if self.column < indent:
+            self.whitespace = True
+            self.write(" " * (indent - self.column))
+
+    def write_line_break(self, data: str = "\n"):
+        self.whitespace = True
+        self.indention = True
+        self.column = 0
+        self.stream.write(data)
+
+    def write_breaks(self, breaks: str):
+        if breaks[0] == "\n":
+            self.write_line_break()
+        for br in breaks:
+            self.write_line_break(br)
+        self.write_indent()
+
+    def write_plain(self, text: str, split: bool = True):
+        if not text:
+            return
+        if not self.whitespace:
+            self.write(" ")
+        self.whitespace = False
+        self.indention = False
+        if not split or self.column + len(text) <= self.best_width or " " not in text:
+            # fast path: no line is folded
+            self.write(text)
+            return
+        spaces = False
+        start = end = 0
+        while end <= len(text):
+            ch = text[end] if end < len(text) else None
+            if spaces:
+                if ch != " ":
+                    if start + 1 == end and self.column > self.best_width:
+                        self.write_indent()
+                        self.whitespace = False
+                        self.indention = False
+                    else:
+                        self.write(text[start:end])
+                    start = end
+            elif ch is None or ch == " ":
+                self.write(text[start:end])
+                start = end
+            if ch is not None:
+                spaces = ch == " "
+            end += 1
+
+    def write_single_quoted(self, text: str, split: bool = True):
+        self.write_indicator("'", True)
+        spaces = False
+        breaks = False
+        start = end = 0
+        while end <= len(text):
+            ch = text[end] if end < len(text) else None
+            if spaces:
+                if ch is None or ch != " ":
+                    if start + 1 == end and self.column > self.best_width and split \
+                            and start != 0 and end != len(text):
+                        self.write_indent()
+                    else:
+                        self.write(text[start:end])
+                    start = end
+            elif breaks:
+                if ch is None or ch not in _BREAKS:
+                    self.write_breaks(text[start:end])
+                    start = end
+            else:
+                if ch is None or ch in " \n\x85\u2028\u2029" or ch == "'":
+                    if start < end:
+                        self.write(text[start:end])
+                        start = end
+            if ch == "'":
+                self.write("''")
+                start = end + 1
+            if ch is not None:
+                spaces = ch == " "
+                breaks = ch in _BREAKS
+            end += 1
+        self.write_indicator("'", False)
+
+    @staticmethod
+    def escape(ch: str) -> str:
+        if ch in _ESCAPE_REPLACEMENTS:
+            return "\\" + _ESCAPE_REPLACEMENTS[ch]
+        elif ch <= "\xFF":
+            return "\\x%02X" % ord(ch)
+        elif ch <= "\uFFFF":
+            return "\\u%04X" % ord(ch)
+        else:
+            return "\\U%08X" % ord(ch)
+
+    def write_double_quoted(self, text: str, split: bool = True):
+        self.write_indicator('"', True)
+        escaped = _DOUBLE_QUOTED_ESCAPE.sub(lambda m: self.escape(m.group()), text)
+        if not split or self.column + len(escaped) <= self.best_width:
+            # fast path: no line is folded
+            self.write(escaped)
+            self.write_indicator('"', False)
+            return
+        start = end = 0
+        while end <= len(text):
+            ch = text[end] if end < len(text) else None
+            if ch is None or ch in '"\\\x85\u2028\u2029\uFEFF' or not ("\x20" <= ch <= "\x7E"):
+                if start < end:
+                    self.write(text[start:end])
+                    start = end
+                if ch is not None:
+                    self.write(self.escape(ch))
+                    start = end + 1
+            if 0 < end < len(text) - 1 and (ch == " " or start >= end) \
+                    and self.column + (end - start) > self.best_width and split:
+                data = text[start:end] + "\\"
+                if start < end:
+                    start = end
+                self.write(data)
+                self.write_indent()
+                self.whitespace = False
+                self.indention = False
+                if text[start] == " ":
+                    self.write("\\")
+            end += 1
+        self.write_indicator('"', False)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+import os
+
+from spycilab import *
+
+stages = StageStore()
+stages.build = Stage("Build")
+stages.test = Stage("Test")
+stages.deploy = Stage("Deploy")
+
+binaries = Artifacts(paths=["out/"])
+
+jobs = JobStore()
+
+
+def write(path: str, content: str):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def read(path: str) -> str | None:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read()
+
+
+def build():
+    write("out/app.bin", "binary")
+    return True
+
+
+def scratch():
+    write("out/scratch.txt", "scratch")
+    write("src.txt", "modified by scratch")
+    return True
+
+
+def test():
+    print(f"test: app={read('out/app.bin')} scratch={read('out/scratch.txt')} src={read('src.txt')}")
+    return read("out/app.bin") == "binary"
+
+
+def package():
+    print(f"package: app={read('out/app.bin')} scratch={read('out/scratch.txt')}")
+    return read("out/app.bin") == "binary"
+
+
+jobs.build = Job("Build", JobConfig(stage=stages.build, artifacts=binaries, work=build))
+jobs.scratch = Job("Scratch", JobConfig(stage=stages.build, work=scratch))
+jobs.test = Job("Test", JobConfig(stage=stages.test, needs=binaries, work=test))
+jobs.package = Job("Package", JobConfig(stage=stages.deploy, dependencies=binaries, work=package))
+
+if __name__ == "__main__":
+    Pipeline(stages=stages, jobs=jobs).main()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+
+from spycilab import *
+
+stages = StageStore()
+stages.build = Stage("Build")
+stages.test = Stage("Test")
+stages.deploy = Stage("Deploy")
+
+variables = VariableStore()
+variables.fail_build = BoolVariable(False, description="Let the build job fail.")
+
+binaries = Artifacts(paths=["bin"])
+
+jobs = JobStore()
+
+jobs.build = Job("Build", JobConfig(stage=stages.build, artifacts=binaries,
+                                    work=lambda: print("building...") or not variables.fail_build))
+jobs.lint = Job("Lint", JobConfig(stage=stages.build, allow_failure=True, work=lambda: print("linting...") or False))
+jobs.unit = Job("Unit", JobConfig(stage=stages.test, needs=binaries, work=lambda: print("unit testing...") or True))
+jobs.docs = Job("Docs", JobConfig(stage=stages.test, needs=[], work=lambda: print("building docs...") or True))
+jobs.disabled = Job("Disabled", JobConfig(stage=stages.test, rules=Rule(when=When.never)))
+jobs.deploy = Job("Deploy", JobConfig(stage=stages.deploy, work=lambda: print("deploying...") or True))
+jobs.manual = Job("Manual", JobConfig(stage=stages.deploy, when=When.manual))
+jobs.cleanup = Job("Cleanup", JobConfig(stage=stages.deploy, rules=Rule(when=When.on_failure),
+                                        work=lambda: print("cleaning up...") or True))
+
+if __name__ == "__main__":
+    Pipeline(stages=stages, jobs=jobs, variables=variables).main()
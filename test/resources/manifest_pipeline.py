@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+
+from spycilab import *
+import manifest_work
+
+stages = StageStore()
+stages.build = Stage("Build")
+
+variables = VariableStore()
+variables.target = Variable("x86", options=["x86", "arm", "broken"], show=True)
+
+jobs = JobStore()
+jobs.build = Job("Build", JobConfig(stage=stages.build, work=manifest_work.build, standalone=True))
+jobs.shared = Job("Shared", JobConfig(stage=stages.build, work=manifest_work.shared))
+jobs.nothing = Job("Nothing", JobConfig(stage=stages.build))
+jobs.inline = Job("Inline", JobConfig(stage=stages.build, work=lambda: print(f"inline {variables.target}") or True))
+
+if __name__ == "__main__":
+    Pipeline(stages=stages, jobs=jobs, variables=variables).main()
@@ -0,0 +1,12 @@
+import os
+import sys
+
+
+def build():
+    print(f"building {os.environ.get('target')} as '{os.environ.get('CI_JOB_NAME')}' (pipeline loaded: {'spycilab.pipeline' in sys.modules})")
+    return os.environ.get("target") != "broken"
+
+
+def shared():
+    print(f"shared (pipeline loaded: {'spycilab.pipeline' in sys.modules})")
+    return True
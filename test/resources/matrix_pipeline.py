@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+import os
+
+from spycilab import *
+
+stages = StageStore()
+stages.build = Stage("Build")
+stages.deploy = Stage("Deploy")
+
+variables = VariableStore()
+variables.target = Variable("x86", options=["x86", "arm", "riscv"])
+
+jobs = JobStore()
+
+
+def build():
+    print(f"building {variables.target} {os.environ['MODE']} ({os.environ['CI_NODE_INDEX']}/{os.environ['CI_NODE_TOTAL']})")
+    return True
+
+
+jobs.build = Job("Build", JobConfig(stage=stages.build, work=build, parallel_matrix=[
+    {"target": ["x86", "arm"], "MODE": ["debug", "release"]},
+    {"target": "riscv", "MODE": "debug"},
+]))
+jobs.deploy = Job("Deploy", JobConfig(stage=stages.deploy, needs=jobs.build, work=lambda: print("deploying...") or True))
+
+if __name__ == "__main__":
+    Pipeline(stages=stages, jobs=jobs, variables=variables).main()
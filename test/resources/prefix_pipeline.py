@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+import os
+
+from spycilab import *
+
+stages = StageStore()
+stages.build = Stage("Build")
+
+jobs = JobStore()
+jobs.build = Job("Build", JobConfig(stage=stages.build, run_prefix="env SPYCILAB_TEST_PREFIX=yes",
+                                    work=lambda: print(f"building (prefix: {os.environ.get('SPYCILAB_TEST_PREFIX')})") or True,
+                                    parallel_matrix={"MODE": ["debug", "release"]}))
+jobs.cached = Job("Cached", JobConfig(stage=stages.build, run_prefix="env", cache_inputs=[],
+                                      work=lambda: print("running cached job") or True))
+
+if __name__ == "__main__":
+    p = Pipeline(stages=stages, jobs=jobs)
+    p.run_script = os.path.abspath(__file__)  # jobs are run from other directories in tests
+    p.main()
@@ -0,0 +1,111 @@
+import json
+
+from spycilab import Variable, VariableStore, Job, JobConfig, JobStore, Stage, StageStore, Rule, When, Pipeline, Artifacts
+from spycilab.analyze import DurationAnalyzer
+
+
+def create_pipeline():
+    stages = StageStore()
+    stages.build = Stage("Build", preserve_order=True)
+    stages.test = Stage("Test")
+    stages.deploy = Stage("Deploy")
+    v = VariableStore()
+    v.docs = Variable("no")
+    binaries = Artifacts(["bin"])
+    jobs = JobStore()
+    jobs.build = Job("Build", JobConfig(stage=stages.build, artifacts=binaries))
+    jobs.lint = Job("Lint", JobConfig(stage=stages.build))
+    jobs.unit = Job("Unit", JobConfig(stage=stages.test, needs=binaries, parallel_matrix={"OS": ["linux", "windows"]}))
+    jobs.docs = Job("Docs", JobConfig(stage=stages.test, rules=Rule(v.docs.equal_to("yes"))))
+    jobs.slow = Job("Slow Check", JobConfig(stage=stages.test))
+    jobs.deploy = Job("Deploy", JobConfig(stage=stages.deploy, dependencies=binaries, after=jobs.unit))
+    jobs.manual = Job("Manual", JobConfig(stage=stages.deploy, when=When.manual))
+    p = Pipeline(jobs=jobs, stages=stages, variables=v)
+    p.jobs.update_jobs()
+    return p
+
+
+def write_samples(tmp_path):
+    reports = tmp_path / "reports"
+    reports.mkdir()
+    # reports of 'run --report'
+    (reports / "build.json").write_text(json.dumps({"job": "build", "name": "Build", "wall_time": 100.0}))
+    (reports / "lint.json").write_text(json.dumps({"job": "lint", "name": "Lint", "wall_time": 30.0}))
+    (reports / "lint_failed.json").write_text(json.dumps({"job": "lint", "name": "Lint", "wall_time": 900.0, "return_code": 1}))
+    # reports of matrix jobs ('run-all --report-dir')
+    (reports / "unit_1.json").write_text(json.dumps({"job": "unit", "name": "Unit: [linux]", "wall_time": 60.0, "return_code": 0}))
+    (reports / "unit_2.json").write_text(json.dumps({"job": "unit", "name": "Unit: [windows]", "wall_time": 80.0, "return_code": 0}))
+    # GitLab export (names with ordering prefix and matrix suffix)
+    gitlab = tmp_path / "jobs.json"
+    gitlab.write_text(json.dumps([
+        {"name": "\u200bBuild", "duration": 120.0, "status": "success"},
+        {"name": "\u200bBuild", "duration": 110.0, "status": "success"},
+        {"name": "Unit: [linux]", "duration": 50.0},
+        {"name": "Unit: [windows]", "duration": 80.0},
+        {"name": "Unit: [windows]", "duration": None},
+        {"name": "Deploy", "duration": 10.0},
+        {"name": "Deploy", "duration": 500.0, "status": "failed"},
+        {"name": "Deploy", "duration": 600.0, "status": "canceled"},
+    ]))
+    csv = tmp_path / "jobs.csv"
+    csv.write_text("name,duration,status\nslow,300,success\nDocs,1000,\nLint,,\nslow,10,failed\n")
+    return [str(reports), str(gitlab), str(csv)]
+
+
+def test_load_samples(tmp_path):
+    samples = DurationAnalyzer.load_samples(write_samples(tmp_path))
+    assert samples["Build"] == [100.0]
+    assert samples["\u200bBuild"] == [120.0, 110.0]
+    assert samples["Unit: [windows]"] == [80.0, 80.0]
+    assert samples["Unit: [linux]"] == [60.0, 50.0]
+    # failed and canceled runs are skipped
+    assert samples["Deploy"] == [10.0]
+    assert samples["slow"] == [300.0]
+    assert "Lint" in samples and samples["Lint"] == [30.0]
+
+
+def test_analyze(tmp_path, capsys):
+    p = create_pipeline()
+    samples = DurationAnalyzer.load_samples(write_samples(tmp_path))
+    a = DurationAnalyzer(p, samples)
+    assert p.jobs.docs not in a.durations  # disabled by rules
+    assert a.skipped == {p.jobs.docs: When.never, p.jobs.manual: When.manual}
+    assert a.durations[p.jobs.build] == 110.0  # median of all sources
+    assert a.durations[p.jobs.unit] == 80.0  # longest matrix job
+    assert a.durations[p.jobs.slow] == 300.0  # by internal name
+    assert a.unknown == []
+
+    # stage order: build (110) -> slow (300) -> deploy (10)
+    total, path = a.graph.critical_path(a.durations)
+    assert total == 420.0
+    assert path == [p.jobs.build, p.jobs.slow, p.jobs.deploy]
+    impact = a.impact()
+    assert impact[0] == (p.jobs.slow, 150.0, 220.0)  # build -> unit -> deploy takes 200 s
+    assert (p.jobs.build, 55.0, 80.0) in impact  # lint (30 s) is in the same stage
+
+    # derived needs: slow check no longer waits for the build
+    dag = DurationAnalyzer(p, samples, dag=True)
+    assert dag.graph.critical_path(dag.durations) == (300.0, [p.jobs.slow])
+    assert dag.impact() == [(p.jobs.slow, 100.0, 100.0)]
+
+    # scenario and unknown durations
+    p.vars.docs.value = "yes"
+    del samples["Docs"]
+    a = DurationAnalyzer(p, samples, default_duration=5.0)
+    assert a.unknown == [p.jobs.docs]
+    assert a.durations[p.jobs.docs] == 5.0
+    a.report()
+    out = capsys.readouterr().out
+    assert "Estimated wall-clock time: 420.0 s" in out
+    assert "No durations for 1 job(s), assuming 5.0 s: docs" in out
+    assert "manual (manual)" in out
+
+
+def test_analyze_cli(tmp_path, capsys):
+    p = create_pipeline()
+    files = write_samples(tmp_path)
+    p.main(["--no-config", "--no-input-env", "--no-forward-env", "analyze", *files, "--dag", "-v", "docs=yes", "--top", "1"])
+    out = capsys.readouterr().out
+    assert "Estimated wall-clock time: 1000.0 s" in out
+    assert "Critical path:\n  docs " in out
+    assert out.rstrip().endswith("docs                               500.0 s      700.0 s")
@@ -0,0 +1,40 @@
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+
+package_dir = pathlib.Path(__file__).parent.parent / "spycilab"
+pipeline_script = pathlib.Path(__file__).parent / "resources" / "artifact_pipeline.py"
+
+
+def test_isolated_run_all(tmp_path):
+    shutil.copy(pipeline_script, tmp_path / "pipeline.py")
+    os.symlink(package_dir, tmp_path / "spycilab")
+    (tmp_path / "src.txt").write_text("source")
+
+    r = subprocess.run([sys.executable, "pipeline.py", "--no-config", "run-all", "-j", "2", "--isolate"],
+                       cwd=tmp_path, capture_output=True, text=True)
+    assert r.returncode == 0, r.stdout + r.stderr
+    # artifacts are passed to jobs needing them, files of other jobs are not visible
+    assert "test: app=binary scratch=None src=source" in r.stdout
+    # jobs without 'needs' get artifacts of all jobs in earlier stages
+    assert "package: app=binary scratch=None" in r.stdout
+
+    # nothing was written to the source tree
+    assert (tmp_path / "src.txt").read_text() == "source"
+    assert not (tmp_path / "out").exists()
+
+    store = tmp_path / ".spycilab"
+    assert (store / "artifacts" / "build" / "out" / "app.bin").read_text() == "binary"
+    assert not (store / "artifacts" / "scratch").exists()
+    assert (store / "work" / "scratch" / "src.txt").read_text() == "modified by scratch"
+    # artifacts are linked, not copied (unless the file system supports neither)
+    app = store / "work" / "test" / "out" / "app.bin"
+    assert app.stat().st_nlink > 1 or "0 hardlinked" not in r.stdout
+
+    # working directories of previous runs are removed
+    r = subprocess.run([sys.executable, "pipeline.py", "--no-config", "run-all", "--isolate"],
+                       cwd=tmp_path, capture_output=True, text=True)
+    assert r.returncode == 0
+    assert "test: app=binary scratch=None src=source" in r.stdout
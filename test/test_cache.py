@@ -0,0 +1,129 @@
+import os
+import pathlib
+import subprocess
+import time
+
+from spycilab import Job, JobConfig, Stage, Artifacts, Variable, VariableStore
+from spycilab.cache import ResultCache
+
+prefix_pipeline_script = str(pathlib.Path(__file__).parent / "resources" / "prefix_pipeline.py")
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def read(path):
+    with open(path, "r") as f:
+        return f.read()
+
+
+def build():
+    write("out/result.txt", read("input.txt").upper())
+    return True
+
+
+def test_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    variables = VariableStore()
+    variables.mode = Variable("debug")
+    variables.update_variable_names()
+    j = Job("Build", JobConfig(stage=Stage("build"), work=build, artifacts=Artifacts(paths=["out"]),
+                               cache_inputs=["input.txt"]))
+    j.internal_name = "build"
+    cache = ResultCache(directory="cache")
+
+    write("input.txt", "hello")
+    key = cache.key(j, variables)
+    assert not cache.restore(j, key)
+    j.run()
+    assert cache.store(j, key)
+
+    # hit restores artifact paths
+    os.remove("out/result.txt")
+    assert cache.key(j, variables) == key
+    assert cache.restore(j, key)
+    assert read("out/result.txt") == "HELLO"
+
+    # key changes with inputs and variables
+    write("input.txt", "bye")
+    assert cache.key(j, variables) != key
+    write("input.txt", "hello")
+    variables.mode.value = "release"
+    assert cache.key(j, variables) != key
+    variables.mode.value = "debug"
+    assert cache.key(j, variables) == key
+    # run specific CI variables are not part of the key (results are reused across commits)
+    variables.CI_COMMIT_SHA.value = "0123abcd"
+    variables.CI_JOB_URL.value = "https://example.com/jobs/1"
+    assert cache.key(j, variables) == key
+    # refs and pipeline source are
+    for v, value in [(variables.CI_COMMIT_BRANCH, "release"), (variables.CI_COMMIT_TAG, "v1.0"),
+                     (variables.CI_PIPELINE_SOURCE, "merge_request_event")]:
+        v.value = value
+        assert cache.key(j, variables) != key
+        v.value = None
+    assert cache.key(j, variables) == key
+
+    # eviction by age
+    cache.max_age = 60
+    old = time.time() - 120
+    os.utime(os.path.join("cache", key, ResultCache.META_FILE), (old, old))
+    cache.evict()
+    assert not cache.restore(j, key)
+
+    # eviction by size (least recently used first)
+    cache.max_age = None
+    j.run()
+    cache.store(j, key)
+    write("input.txt", "other")
+    other_key = cache.key(j, variables)
+    j.run()
+    cache.store(j, other_key)
+    cache.max_size = 7
+    cache.evict()
+    assert not os.path.isdir(os.path.join("cache", key))
+    assert os.path.isdir(os.path.join("cache", other_key))
+
+
+def test_cache_paths_outside_project():
+    try:
+        ResultCache.expand_paths(["../outside"])
+        assert False, "should have thrown"
+    except RuntimeError as e:
+        assert "inside the project" in str(e)
+
+
+def test_cache_key_matrix(monkeypatch):
+    variables = VariableStore()
+    variables.update_variable_names()
+    j = Job("Test", JobConfig(stage=Stage("test"), parallel_matrix={"OS": ["linux", "windows"]}, cache_inputs=[]))
+    j.internal_name = "test"
+    cache = ResultCache(directory="cache")
+    monkeypatch.setenv("OS", "linux")
+    linux = cache.key(j, variables)
+    monkeypatch.setenv("OS", "windows")
+    assert cache.key(j, variables) != linux
+
+
+def test_no_cache_with_prefix(tmp_path):
+    def run(*args):
+        r = subprocess.run([prefix_pipeline_script, "--no-config", "run", "cached", "--with-prefix", *args],
+                           capture_output=True, text=True, cwd=tmp_path, check=True)
+        return r.stdout
+
+    assert "running cached job" in run("--no-cache")
+    assert not (tmp_path / ".spycilab-cache").exists()
+    assert "running cached job" in run()
+    assert "restored from cache" in run()
+    assert "running cached job" in run("--no-cache")
+
+
+def test_run_all_cache_config(tmp_path):
+    # job processes don't load the config file, but use its cache settings
+    (tmp_path / ".spycilab.yaml").write_text("cache:\n  directory: results\n  max_age_days: 1\n")
+    subprocess.run([prefix_pipeline_script, "run-all"], capture_output=True, cwd=tmp_path, check=True)
+    assert len(os.listdir(tmp_path / "results")) == 1
+    assert not (tmp_path / ".spycilab-cache").exists()
@@ -17,6 +17,7 @@ def pipeline_yaml():
     subprocess.run([pipeline_script, "generate", "--output", output_file], check=True)
     yield output_file
     os.remove(output_file)
+    os.remove(output_file + ".fingerprint")
 
 @pytest.fixture
 def pipeline_yaml_with_custom_run_script():
@@ -27,6 +28,7 @@ def pipeline_yaml_with_custom_run_script():
     subprocess.run([pipeline_script, "generate", "--output", output_file, "--run-script", "./my_script.py"], check=True)
     yield output_file
     os.remove(output_file)
+    os.remove(output_file + ".fingerprint")
 
 def create_config(file:str, content:dict):
     with open(file, "w") as f:
@@ -73,6 +75,27 @@ def test_generate_with_custom_run_script(pipeline_yaml_with_custom_run_script):
 
     assert p_yaml["Unit Tests"]["script"] == "./my_script.py run test"
 
+def test_generate_unchanged(pipeline_yaml):
+    def generate(*args):
+        r = subprocess.run([pipeline_script, "generate", "--output", pipeline_yaml, *args], check=True, capture_output=True)
+        return r.stdout.decode()
+
+    mtime = os.path.getmtime(pipeline_yaml)
+    assert "is up to date" in generate()
+    assert os.path.getmtime(pipeline_yaml) == mtime
+
+    # output modified by someone else
+    with open(pipeline_yaml, "a") as f:
+        f.write("# changed\n")
+    assert "writing generated gitlab-ci yaml" in generate()
+    with open(pipeline_yaml, "r") as f:
+        assert "# changed" not in f.read()
+
+    # pipeline changed
+    assert "writing generated gitlab-ci yaml" in generate("--run-script", "./other.py")
+
+    assert "writing generated gitlab-ci yaml" in generate("--run-script", "./other.py", "--force")
+
 @pytest.fixture
 def env_var():
     os.environ["test_variable"] = "set from env"
@@ -1,4 +1,5 @@
-from spycilab import Variable, BoolVariable, Condition
+from spycilab import Variable, BoolVariable, Condition, Rule, When
+from spycilab import generation
 
 def test_simple():
     var_a = Variable()
@@ -134,3 +135,192 @@ def test_compound():
     var_a.value = "branch_A"
     var_b.value = "branch_B"
     assert c.eval() == True
+
+def test_compile():
+    var_a = Variable()
+    var_a.name = "a"
+    var_b = Variable()
+    var_b.name = "b"
+    var_c = BoolVariable(False)
+    var_c.name = "c"
+
+    conditions = [
+        var_a.equal_to("x"),
+        var_a.not_equal_to("x"),
+        var_a.equal_to(var_b),
+        var_a.not_equal_to(var_b),
+        var_a.defined_and_not_empty(),
+        var_a.not_defined_or_empty(),
+        var_a.full_match("x|y.*"),
+        var_c.is_true(),
+        var_c.is_false(),
+        var_a.equal_to("x") & var_b.equal_to("y"),
+        var_a.equal_to("x") | var_b.equal_to("y"),
+        var_a.equal_to("x") & var_b.defined_and_not_empty() & var_c.is_true(),
+        (var_a.equal_to("x") | var_b.full_match("y+")) & (var_c.is_true() | var_a.equal_to(var_b) | var_b.equal_to("")),
+    ]
+    for a in [None, "", "x", "y", "yy"]:
+        for b in [None, "", "x", "y", "yy"]:
+            for c in [True, False]:
+                var_a.value = a
+                var_b.value = b
+                var_c.set(c)
+                for cond in conditions:
+                    assert cond.compile()() == cond.eval(), f"{cond.to_yaml()} with a={a}, b={b}, c={c}"
+
+    # compiled result is cached
+    c = conditions[-1]
+    assert c.compile() is c.compile()
+
+    # modifying a nested condition recompiles the conditions containing it
+    var_a.value = "x"
+    var_b.value = None
+    var_c.set(True)
+    inner = var_a.equal_to("x")
+    outer = inner & var_c.is_true()
+    rule = Rule(outer)
+    assert rule.eval()
+    inner.s = "y"
+    assert not outer.compile()()
+    assert not rule.eval()
+    inner.s = "x"
+    assert rule.eval()
+
+    # nested conditions of the same type are flattened
+    assert len(conditions[11].operands()) == 3
+    assert len(conditions[12].operands()) == 2
+    assert len(conditions[12].b.operands()) == 3
+
+
+def test_yaml_memo():
+    var_a = Variable()
+    var_a.name = "a"
+    var_b = Variable()
+    var_b.name = "b"
+    inner = var_a.equal_to("x")
+    c = inner | var_b.defined_and_not_empty()
+    r = Rule(c, when=When.never)
+    calls = []
+    original = Condition._to_yaml
+
+    def counting(self):
+        calls.append(self)
+        return original(self)
+
+    Condition._to_yaml = counting
+    try:
+        with generation.Generation():
+            assert c.to_yaml() == "(($a == 'x') || ($b != null && $b != ''))"
+            count = len(calls)
+            assert c.to_yaml() == c.to_yaml()
+            assert r.to_yaml() == {"if": c.to_yaml(), "when": "never"}
+            assert len(calls) == count  # generated once per generation
+
+            # rule yaml is a copy
+            r.to_yaml()["when"] = "always"
+            assert r.to_yaml()["when"] == "never"
+
+            # mutation invalidates cached yaml
+            inner.s = "y"
+            assert c.to_yaml() == "(($a == 'y') || ($b != null && $b != ''))"
+            assert r.to_yaml()["if"] == c.to_yaml()
+            var_b.name = "B"
+            assert c.to_yaml() == "(($a == 'y') || ($B != null && $B != ''))"
+            r.when = When.always
+            assert r.to_yaml()["when"] == "always"
+
+        # nothing is cached outside of generation
+        count = len(calls)
+        c.to_yaml()
+        c.to_yaml()
+        assert len(calls) == count + 6
+    finally:
+        Condition._to_yaml = original
+
+
+def test_simplify():
+    var_a = Variable()
+    var_a.name = "a"
+    var_b = Variable()
+    var_b.name = "b"
+    var_c = BoolVariable(False)
+    var_c.name = "c"
+    a_x = var_a.equal_to("x")
+    b_y = var_b.equal_to("y")
+
+    # flatten and remove duplicates
+    c = (a_x & b_y) & (var_a.equal_to("x") & var_c.is_true())
+    assert c.to_yaml() == "((($a == 'x') && ($b == 'y')) && (($a == 'x') && ($c == 'yes')))"
+    assert c.simplify().to_yaml(flatten=True) == "(($a == 'x') && ($b == 'y') && ($c == 'yes'))"
+
+    # absorption
+    assert (a_x & (a_x | b_y)).simplify() is a_x
+    assert (a_x | (b_y & var_a.equal_to("x"))).simplify() is a_x
+
+    # redundant checks
+    assert (var_a.defined_and_not_empty() & a_x).simplify() is a_x
+    d = var_a.defined_and_not_empty()
+    assert (a_x | d).simplify() is d
+    assert (var_a.defined_and_not_empty() & var_a.equal_to("")).simplify().t == Condition.Type.AND
+
+    # contradictions and tautologies
+    assert (a_x & var_a.not_equal_to("x")).simplify() is False
+    assert (a_x & var_a.equal_to("z")).simplify() is False
+    assert (var_a.not_equal_to("x") | var_a.not_equal_to("z")).simplify() is True
+    assert (var_a.defined_and_not_empty() | var_a.not_defined_or_empty()).simplify() is True
+    assert ((a_x & var_a.not_equal_to("x")) | b_y).simplify() is b_y
+
+    # constant folding
+    assert (var_c.is_true() & a_x).simplify({"c": "no"}) is False
+    assert (var_c.is_true() & a_x).simplify({"c": "yes"}) is a_x
+    assert (var_c.is_false() | a_x).simplify({"c": "no"}) is True
+    assert var_a.equal_to(var_b).simplify({"a": "x"}).t == Condition.Type.EQUAL
+    assert var_a.equal_to(var_b).simplify({"a": "x", "b": "x"}) is True
+
+    # rules emit simplified conditions
+    assert Rule(c).to_yaml() == {"if": "(($a == 'x') && ($b == 'y') && ($c == 'yes'))"}
+    assert Rule(var_a.not_equal_to("x") | var_a.not_equal_to("z"), when=When.manual).to_yaml() == {"when": "manual"}
+    assert Rule(a_x & var_a.not_equal_to("x")).to_yaml() == {"if": "(($a == 'x') && ($a != 'x'))"}
+
+
+def test_simplify_equivalence():
+    import random
+    rnd = random.Random(42)
+    variables = [Variable(), Variable()]
+    variables[0].name = "a"
+    variables[1].name = "b"
+    values = [None, "", "x", "y"]
+
+    def random_condition(depth: int) -> Condition:
+        if depth == 0 or rnd.random() < 0.3:
+            v = rnd.choice(variables)
+            match rnd.randrange(6):
+                case 0:
+                    return v.equal_to(rnd.choice(["", "x", "y"]))
+                case 1:
+                    return v.not_equal_to(rnd.choice(["", "x", "y"]))
+                case 2:
+                    return v.defined_and_not_empty()
+                case 3:
+                    return v.not_defined_or_empty()
+                case 4:
+                    return v.full_match("x|")
+                case _:
+                    return v.equal_to(variables[0] if v is variables[1] else variables[1])
+        if rnd.random() < 0.5:
+            return random_condition(depth - 1) & random_condition(depth - 1)
+        return random_condition(depth - 1) | random_condition(depth - 1)
+
+    for _ in range(300):
+        c = random_condition(4)
+        simplified = c.simplify()
+        for a in values:
+            for b in values:
+                variables[0].value = a
+                variables[1].value = b
+                expected = c.eval()
+                result = simplified if isinstance(simplified, bool) else simplified.eval()
+                assert result == expected, f"{c.to_yaml()} -> {simplified} with a={a}, b={b}"
+                assert c.compile()() == expected
+                fixed = c.simplify({"a": a})
+                assert (fixed if isinstance(fixed, bool) else fixed.eval()) == expected
@@ -0,0 +1,110 @@
+from spycilab import Variable, VariableStore, Job, JobConfig, JobStore, Stage, StageStore, Rule, Pipeline, Artifacts
+from spycilab.graph import JobGraph, NeedsInference
+
+
+def create_pipeline():
+    stages = StageStore()
+    stages.prepare = Stage("Prepare")
+    stages.build = Stage("Build")
+    stages.test = Stage("Test")
+    stages.deploy = Stage("Deploy")
+    v = VariableStore()
+    v.nightly = Variable("no")
+    binaries = Artifacts(["bin"])
+    docs = Artifacts(["docs"])
+    jobs = JobStore()
+    jobs.prepare = Job("Prepare", JobConfig(stage=stages.prepare))
+    jobs.build = Job("Build", JobConfig(stage=stages.build, artifacts=binaries, after=jobs.prepare))
+    jobs.docs = Job("Docs", JobConfig(stage=stages.build, artifacts=docs, rules=Rule(v.nightly.equal_to("yes"))))
+    jobs.lint = Job("Lint", JobConfig(stage=stages.test))
+    jobs.unit = Job("Unit", JobConfig(stage=stages.test, dependencies=binaries))
+    jobs.explicit = Job("Explicit", JobConfig(stage=stages.test, needs=jobs.prepare))
+    jobs.deploy = Job("Deploy", JobConfig(stage=stages.deploy, dependencies=binaries, after=[jobs.unit, jobs.build]))
+    jobs.report = Job("Report", JobConfig(stage=stages.deploy, after=[jobs.unit, jobs.prepare, jobs.docs]))
+    jobs.legacy = Job("Legacy", JobConfig(stage=stages.deploy, dependencies=False))
+    p = Pipeline(jobs=jobs, stages=stages, variables=v)
+    p.jobs.update_jobs()
+    return p
+
+
+def test_infer_needs():
+    p = create_pipeline()
+    stage_yaml = p.to_yaml()
+    assert all("needs" not in stage_yaml[j.name] for j in p.jobs.all() if j is not p.jobs.explicit)
+
+    p.dag = True
+    y = p.to_yaml()
+    assert y["Prepare"]["needs"] == []
+    assert y["Build"]["needs"] == [{"job": "Prepare", "artifacts": False}]
+    assert y["Lint"]["needs"] == []
+    assert y["Unit"]["needs"] == ["Build"]
+    assert y["Unit"]["dependencies"] == ["Build"]
+    assert y["Explicit"]["needs"] == [{"job": "Prepare", "artifacts": False}]
+    # 'after' jobs implied by other needs are left out
+    assert y["Deploy"]["needs"] == ["Build", {"job": "Unit", "artifacts": False}]
+    # job with different rules might not exist
+    assert y["Report"]["needs"] == [{"job": "Unit", "artifacts": False}, {"job": "Docs", "artifacts": False, "optional": True}]
+    # downloads artifacts of all earlier stages
+    assert "needs" not in y["Legacy"]
+    assert "dependencies" not in y["Legacy"]
+
+    # the model is not modified
+    assert all(j.config.needs is None for j in p.jobs.all() if j is not p.jobs.explicit)
+    p.dag = False
+    assert p.to_yaml() == stage_yaml
+
+    # too many needs keep the stage order
+    inference = NeedsInference(p.jobs.all(), p.stages, max_needs=1)
+    needs = inference.infer()
+    assert inference.stage_order == [p.jobs.legacy, p.jobs.deploy, p.jobs.report]
+    assert p.jobs.deploy not in needs
+
+
+def test_infer_needs_optional():
+    stages = StageStore()
+    stages.prepare = Stage("Prepare")
+    stages.build = Stage("Build")
+    stages.deploy = Stage("Deploy")
+    v = VariableStore()
+    v.nightly = Variable("no")
+    nightly = Rule(v.nightly.equal_to("yes"))
+    jobs = JobStore()
+    jobs.prepare = Job("Prepare", JobConfig(stage=stages.prepare))
+    jobs.check = Job("Check", JobConfig(stage=stages.build, after=jobs.prepare, rules=nightly))
+    jobs.build = Job("Build", JobConfig(stage=stages.build, after=jobs.prepare))
+    jobs.deploy = Job("Deploy", JobConfig(stage=stages.deploy, after=[jobs.prepare, jobs.check, jobs.build]))
+    jobs.report = Job("Report", JobConfig(stage=stages.deploy, after=[jobs.prepare, jobs.check]))
+    jobs.nightly_deploy = Job("Nightly Deploy", JobConfig(stage=stages.deploy, after=[jobs.prepare, jobs.check], rules=nightly))
+    p = Pipeline(jobs=jobs, stages=stages, variables=v)
+    p.jobs.update_jobs()
+    needs = NeedsInference(p.jobs.all(), p.stages).infer()
+    # 'prepare' is implied by 'build' (same rules), not by the optional 'check'
+    assert needs[p.jobs.deploy] == [(p.jobs.check, False, True), (p.jobs.build, False, False)]
+    # 'check' might not exist, so 'prepare' has to be waited for directly
+    assert needs[p.jobs.report] == [(p.jobs.prepare, False, False), (p.jobs.check, False, True)]
+    # 'check' exists whenever 'nightly_deploy' does
+    assert needs[p.jobs.nightly_deploy] == [(p.jobs.check, False, False)]
+
+
+def test_critical_path(capsys):
+    p = create_pipeline()
+    needs = NeedsInference(p.jobs.all(), p.stages).infer()
+    stage_graph = JobGraph(p.jobs.all(), p.stages)
+    dag_graph = JobGraph(p.jobs.all(), p.stages, {j: [n for n, _, _ in x] for j, x in needs.items()})
+
+    length, path = stage_graph.critical_path()
+    assert length == 4
+    assert path[0] is p.jobs.prepare and path[-1].config.stage is p.stages.deploy
+    assert dag_graph.critical_path() == (4, [p.jobs.prepare, p.jobs.build, p.jobs.unit, p.jobs.deploy])
+
+    # long job without inputs no longer delays later stages
+    durations = {j: 1 for j in p.jobs.all()}
+    durations[p.jobs.lint] = 10
+    assert stage_graph.critical_path(durations)[0] == 13
+    assert dag_graph.critical_path(durations) == (11, [p.jobs.lint, p.jobs.legacy])  # legacy keeps the stage order
+
+    p.print_dag_report()
+    out = capsys.readouterr().out
+    assert "Derived needs of 7 job(s), 3 without inputs start immediately." in out
+    assert "Keeping stage order: legacy" in out
+    assert "Critical path (needs): 4 job(s): prepare -> build -> unit -> deploy" in out
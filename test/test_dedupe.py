@@ -0,0 +1,96 @@
+import io
+
+import yaml
+
+from spycilab import Variable, VariableStore, Job, JobConfig, JobStore, Stage, StageStore, Rule, When, Pipeline, Artifacts
+from spycilab.yaml_emitter import YamlEmitter
+
+
+def create_pipeline():
+    stages = StageStore()
+    stages.build = Stage("Build")
+    stages.test = Stage("Test")
+    v = VariableStore()
+    v.target = Variable("x86")
+    rules = [Rule(v.target.equal_to("arm"), when=When.never), Rule(when=When.always)]
+    base = JobConfig(tags=["docker"], yaml_override={"retry": 2, "variables": {"GIT_DEPTH": "1"}})
+    jobs = JobStore()
+    for i in range(3):
+        out = Artifacts([f"bin/{i}"])
+        jobs.add(f"build_{i}", Job(f"Build {i}", JobConfig(stage=stages.build, rules=rules, artifacts=out, extends=base,
+                                                           yaml_override={})))
+        jobs.add(f"test_{i}", Job(f"Test {i}", JobConfig(stage=stages.test, rules=rules, needs=out,
+                                                         yaml_override={"retry": 2, "variables": {"GIT_DEPTH": "1"}})))
+    # structurally identical rules, but different objects
+    jobs.lint = Job("Lint", JobConfig(stage=stages.test, rules=[Rule(v.target.equal_to("arm"), when=When.never),
+                                                                Rule(when=When.always)]))
+    jobs.unique = Job("Unique", JobConfig(stage=stages.test, rules=Rule(when=When.manual),
+                                          yaml_override={"extends": [".custom"], "retry": 2}))
+    p = Pipeline(jobs=jobs, stages=stages, variables=v)
+    p.jobs.update_jobs(p.run_script)
+    return p
+
+
+def expand_extends(y: dict) -> dict:
+    """
+    Resolve 'extends' of jobs referencing '.spycilab-*' templates like GitLab does (deep merge, job has precedence).
+    """
+
+    def merge(a: dict, b: dict) -> dict:
+        result = dict(a)
+        for k, v in b.items():
+            result[k] = merge(result[k], v) if isinstance(result.get(k), dict) and isinstance(v, dict) else v
+        return result
+
+    expanded = {}
+    for k, v in y.items():
+        if k.startswith(".spycilab-"):
+            continue
+        if isinstance(v, dict) and any(t.startswith(".spycilab-") for t in v.get("extends", [])):
+            job = {}
+            for t in v["extends"]:
+                job = merge(job, y[t])
+            expanded[k] = merge(job, {jk: jv for jk, jv in v.items() if jk != "extends"})
+        else:
+            expanded[k] = v
+    return expanded
+
+
+def test_dedupe():
+    p = create_pipeline()
+    original = p.to_yaml()
+    p.dedupe = True
+    y = p.to_yaml()
+
+    templates = [k for k in y if k.startswith(".spycilab-")]
+    assert len(templates) == 2
+    # templates come before the first job
+    keys = list(y.keys())
+    assert keys.index(templates[-1]) < keys.index("Build 0")
+    assert keys[:2] == ["variables", "stages"]
+
+    assert y["Build 0"]["extends"] == y["Test 0"]["extends"]
+    assert y["Lint"]["extends"] == y["Build 0"]["extends"][:1]
+    assert "rules" not in y["Build 0"]
+    assert "retry" not in y["Test 1"]
+    assert y["Build 1"]["artifacts"] == {"paths": ["bin/1"]}  # not shared
+    assert y["Unique"] == original["Unique"]  # extends on its own
+
+    # template names only depend on their content
+    assert y["Build 0"]["extends"] == create_pipeline_deduped()["Build 0"]["extends"]
+
+    # GitLab's view of the pipeline is unchanged
+    assert expand_extends(y) == original
+
+    # output is valid yaml written by the built-in emitter
+    f = io.StringIO()
+    YamlEmitter(f).dump(y)
+    assert yaml.safe_load(f.getvalue()) == y
+
+
+def create_pipeline_deduped() -> dict:
+    p = create_pipeline()
+    p.jobs.extra = Job("Extra", JobConfig(stage=p.stages.test, rules=Rule(when=When.on_failure)))
+    p.jobs.update_jobs(p.run_script)
+    p.dedupe = True
+    return p.to_yaml()
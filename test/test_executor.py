@@ -0,0 +1,98 @@
+import subprocess
+import pathlib
+import sys
+
+import pytest
+
+from spycilab import Job, JobConfig, JobStore, Stage, StageStore, Pipeline
+from spycilab.executor import LocalExecutor
+
+pipeline_dir = pathlib.Path(__file__).parent / "resources"
+pipeline_script = str(pipeline_dir / "dag_pipeline.py")
+
+
+def run_all(additional_params: list[str] | None = None) -> subprocess.CompletedProcess:
+    params = [pipeline_script, "run-all"]
+    if additional_params is not None:
+        params.extend(additional_params)
+    return subprocess.run(params, capture_output=True)
+
+
+def test_run_all():
+    r = run_all(["--jobs", "2"])
+    output = r.stdout.decode()
+    assert r.returncode == 0
+    assert "Build (build): success" in output
+    assert "Lint (lint): failed (allowed to fail)" in output
+    assert "Unit (unit): success" in output
+    assert "Docs (docs): success" in output
+    assert "Deploy (deploy): success" in output
+    assert "Manual (manual): skipped (manual job)" in output
+    assert "Cleanup (cleanup): skipped" in output
+    assert "Disabled" not in output
+
+    # dependencies have to finish before a job starts
+    assert output.index("Job 'Build' (build) success") < output.index("Starting job 'Unit' (unit)")
+    assert output.index("Job 'Unit' (unit) success") < output.index("Starting job 'Deploy' (deploy)")
+    assert output.index("Job 'Docs' (docs) success") < output.index("Starting job 'Deploy' (deploy)")
+
+
+def test_run_all_failure():
+    r = run_all(["-j", "4", "-v", "fail_build=yes"])
+    output = r.stdout.decode()
+    assert r.returncode == 1
+    assert "Build (build): failed" in output
+    assert "Unit (unit): skipped" in output
+    assert "Docs (docs): success" in output
+    assert "Deploy (deploy): skipped" in output
+    assert "cleaning up..." in output
+    assert "Cleanup (cleanup): success" in output
+
+
+def test_run_all_logs(tmp_path):
+    log_dir = tmp_path / "logs"
+    r = run_all(["-j", "3", "--log-dir", str(log_dir)])
+    output = r.stdout.decode()
+    assert r.returncode == 0
+    assert "Build (build): success" in output
+
+    # output of jobs is prefixed with job name and streamed line by line
+    lines = output.splitlines()
+    assert any(line.endswith("build   | building...") for line in lines)
+    assert any(line.endswith("docs    | building docs...") for line in lines)
+
+    with open(log_dir / "build.log") as f:
+        build_log = f.read()
+    assert "| building..." in build_log
+    assert "Job finished successfully" in build_log
+    assert "building docs" not in build_log
+    assert not (log_dir / "manual.log").exists()
+
+
+def test_job_command(monkeypatch):
+    stages = StageStore()
+    stages.build = Stage("Build")
+    jobs = JobStore()
+    jobs.build = Job("Build", JobConfig(stage=stages.build))
+    p = Pipeline(jobs=jobs, stages=stages)
+    p.jobs.update_jobs()
+    executor = LocalExecutor(p, script=pipeline_script)
+    assert executor.job_command(p.jobs.build) == [sys.executable, pipeline_script, "--no-config", "run", "build"]
+    with pytest.raises(RuntimeError):
+        LocalExecutor(p, script=str(pipeline_dir / "missing.py"))
+
+    # by default jobs are run with the running program
+    import __main__
+    monkeypatch.setattr(__main__, "__spec__", None)
+    monkeypatch.setattr(__main__, "__file__", pipeline_script)
+    assert LocalExecutor(p).command == [sys.executable, pipeline_script]
+    monkeypatch.delattr(__main__, "__file__")
+    with pytest.raises(RuntimeError) as e:
+        LocalExecutor(p)
+    assert "not started from a script file" in str(e.value)
+
+
+def test_run_all_module():
+    r = subprocess.run([sys.executable, "-m", "dag_pipeline", "run-all"], capture_output=True, text=True, cwd=pipeline_dir)
+    assert r.returncode == 0
+    assert "Deploy (deploy): success" in r.stdout
@@ -44,17 +44,86 @@ def test_preserve_order_in_stage():
     p.jobs.update_jobs(p.run_script)
     p_yaml = p.to_yaml()
     assert p_yaml.get("\u200BC") is not None
-    assert p_yaml.get("\u200B\u200BB") is not None
-    assert p_yaml.get("\u200B\u200B\u200BA") is not None
-    a_needs = p_yaml.get("\u200B\u200B\u200BA")["needs"]
-    assert a_needs == [{"artifacts": False, "job": "\u200B\u200BB"}]
+    assert p_yaml.get("\u200CB") is not None
+    assert p_yaml.get("\u2060A") is not None
+    a_needs = p_yaml.get("\u2060A")["needs"]
+    assert a_needs == [{"artifacts": False, "job": "\u200CB"}]
 
     # test whether order-preserving hack works in theory
-    l = ["\u200B\u200BA", "\u200BB"]
+    l = ["\u200CA", "\u200BB"]
     l.sort()
     assert l[0] == "\u200BB"
 
 
+def test_generation_side_effect_free():
+    s = StageStore()
+    s.stuff = Stage("stuff", preserve_order=True)
+    s.other = Stage("other")
+    v = VariableStore()
+    v.mode = Variable("debug")
+
+    j = JobStore()
+    release = Rule(v.mode.equal_to("release"))
+    j.C = Job("C", JobConfig(stage=s.stuff, rules=release))
+    j.B = Job("B", JobConfig(stage=s.stuff, rules=release))
+    j.A = Job("A", JobConfig(stage=s.other, rules=release, needs=j.B))
+
+    p = Pipeline(jobs=j, stages=s, variables=v)
+    first = p.to_yaml()
+    # generating again gives the same output, jobs are not modified
+    assert p.to_yaml() == first
+    assert [x.name for x in j.all()] == ["C", "B", "A"]
+    assert all(x.run_script is None for x in j.all())
+    assert first["\u200CB"]["script"] == "./pipeline.py run B"
+    assert first["A"]["needs"] == [{"job": "\u200CB", "artifacts": False}]
+
+    # variants share the model
+    variant = p.variant(run_script="python3 pipeline.py")
+    assert variant.to_yaml()["A"]["script"] == "python3 pipeline.py run A"
+    assert p.to_yaml() == first
+    try:
+        p.variant(unknown=True)
+        assert False
+    except AttributeError:
+        pass
+
+    # concurrent generation of different variants
+    from concurrent.futures import ThreadPoolExecutor
+    scripts = [f"./pipeline_{i}.py" for i in range(8)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda r: [p.variant(run_script=r).to_yaml() for _ in range(20)], scripts))
+    for script, outputs in zip(scripts, results):
+        for y in outputs:
+            assert y["A"]["script"] == f"{script} run A"
+            assert y["\u200BC"]["rules"] == first["\u200BC"]["rules"]
+
+
+def test_order_prefixes():
+    import random
+    rnd = random.Random(1)
+    base = len(Stage.ORDER_DIGITS)
+    for count in [0, 1, 2, base, base + 1, base ** 2, base ** 2 + 1, 800]:
+        prefixes = Stage.order_prefixes(count)
+        assert len(prefixes) == count
+        # fixed width, logarithmic in the number of jobs
+        width = 1
+        while base ** width < count:
+            width += 1
+        assert all(len(p) == width for p in prefixes)
+        assert all(c in Stage.ORDER_DIGITS for p in prefixes for c in p)
+
+        # sorting by name keeps the order of jobs, no matter their names
+        # (compared by code point, UTF-8 bytes and UTF-16 code units)
+        alphabet = "aAzZ09 _-\u00fc\u200b\u4e2d\U0001F600"
+        names = [p + "".join(rnd.choice(alphabet) for _ in range(rnd.randrange(6))) for p in prefixes]
+        assert sorted(names) == names
+        assert sorted(names, key=lambda n: n.encode("utf-8")) == names
+        assert sorted(names, key=lambda n: n.encode("utf-16-be")) == names
+
+    # total size of prefixes is O(n log n)
+    assert sum(len(p) for p in Stage.order_prefixes(800)) == 800 * 4
+
+
 def test_variable():
     # simple variable
     v = Variable(default_value="A", description="This is a normal variable", options=["A", "B"])
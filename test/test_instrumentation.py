@@ -0,0 +1,76 @@
+import json
+import pathlib
+import pstats
+import subprocess
+import sys
+import xml.etree.ElementTree as ElementTree
+
+pipeline_dir = pathlib.Path(__file__).parent / "resources"
+pipeline_script = str(pipeline_dir / "pipeline.py")
+dag_pipeline_script = str(pipeline_dir / "dag_pipeline.py")
+prefix_pipeline_script = str(pipeline_dir / "prefix_pipeline.py")
+matrix_pipeline_script = str(pipeline_dir / "matrix_pipeline.py")
+
+
+def test_report(tmp_path):
+    report = tmp_path / "report.json"
+    profile = tmp_path / "job.prof"
+    r = subprocess.run([pipeline_script, "run", "fail", "--report", str(report), "--profile", str(profile)],
+                       capture_output=True)
+    assert r.returncode == 1
+    data = json.loads(report.read_text())
+    assert data["job"] == "fail"
+    assert data["return_code"] == 1
+    assert data["wall_time"] >= 0
+    assert data["cpu_time"] >= 0
+    if sys.platform != "win32":
+        assert data["peak_rss_bytes"] > 0
+        assert set(data["children"].keys()) == {"user_time", "system_time", "peak_rss_bytes"}
+    assert pstats.Stats(str(profile)).total_calls > 0
+
+
+def test_junit(tmp_path):
+    junit = tmp_path / "report.xml"
+    junit.write_text('<testsuite name="own"><testcase name="a"/></testsuite>')
+    subprocess.run([pipeline_script, "run", "fail", "--junit", str(junit)], capture_output=True)
+    root = ElementTree.parse(junit).getroot()
+    assert root.tag == "testsuites"
+    suites = root.findall("testsuite")
+    assert [s.get("name") for s in suites] == ["own", "spycilab.fail"]
+    properties = {p.get("name"): p.get("value") for p in suites[1].iter("property")}
+    assert properties["return_code"] == "1"
+    assert "wall_time" in properties
+    assert suites[1].find("testcase/failure") is not None
+
+
+def test_run_all_report_dir(tmp_path):
+    subprocess.run([sys.executable, dag_pipeline_script, "--no-config", "run-all", "--report-dir", str(tmp_path)],
+                   capture_output=True, cwd=tmp_path)
+    assert sorted(p.name for p in tmp_path.glob("*.json")) == ["build.json", "deploy.json", "docs.json", "lint.json", "unit.json"]
+
+
+def test_report_with_prefix(tmp_path):
+    # options are passed on to the job started with its run prefix
+    report = tmp_path / "report.json"
+    r = subprocess.run([prefix_pipeline_script, "--no-config", "run", "build", "--with-prefix", "--matrix-index", "2",
+                        "--report", str(report)], capture_output=True, text=True, cwd=tmp_path)
+    assert r.returncode == 0
+    assert "building (prefix: yes)" in r.stdout
+    data = json.loads(report.read_text())
+    assert data["job"] == "build"
+    assert data["return_code"] == 0
+
+    reports = tmp_path / "reports"
+    subprocess.run([sys.executable, prefix_pipeline_script, "--no-config", "run-all", "--with-prefix", "--report-dir", str(reports)],
+                   capture_output=True, cwd=tmp_path)
+    assert sorted(p.name for p in reports.glob("*.json")) == ["build_1.json", "build_2.json", "cached.json"]
+
+
+def test_report_matrix(tmp_path):
+    # every job of a matrix is reported under its own name (like GitLab names it)
+    subprocess.run([sys.executable, matrix_pipeline_script, "--no-config", "run-all", "--report-dir", str(tmp_path)],
+                   capture_output=True, cwd=tmp_path)
+    names = {p.name: json.loads(p.read_text())["name"] for p in tmp_path.glob("build_*.json")}
+    assert names == {"build_1.json": "Build: [x86, debug]", "build_2.json": "Build: [x86, release]",
+                     "build_3.json": "Build: [arm, debug]", "build_4.json": "Build: [arm, release]",
+                     "build_5.json": "Build: [riscv, debug]"}
@@ -44,6 +44,7 @@ def test_complex_job():
     assert j_yaml["rules"][0] == {"if": "($var == 'test')", "when": "always", "allow_failure": True, "changes": None}
     assert j_yaml["artifacts"] == {"paths": ["out.txt"], "when": "on_success"}
     assert j_yaml["needs"] == ["first", {"job": "second", "artifacts": False}]
+    assert j_yaml["dependencies"] == ["first"]
     assert j_yaml["tags"] == ["my_tag"]
     assert j_yaml["script"] == "PREFIX run.py"
     assert j_yaml["additional_keyword"] == ["test1", "test2"]
@@ -122,6 +123,36 @@ def test_extend():
     assert j.yaml_override["C"] == "C base2 job"
 
 
+def test_dependencies():
+    build = Stage("build")
+    test = Stage("test")
+    binaries = Artifacts(["bin/"])
+    docs = Artifacts(["docs/"])
+    producer = Job("Build", JobConfig(stage=build, artifacts=binaries))
+    doc_producer = Job("Docs", JobConfig(stage=build, artifacts=docs))
+    no_download = JobConfig(dependencies=False)
+
+    def dependencies(config: JobConfig):
+        j = Job("Consumer", config)
+        j.internal_name = "consumer"
+        j.run_script = "run"
+        return j.to_yaml().get("dependencies")
+
+    # derived from artifacts needed, jobs needed without artifacts are not included
+    assert dependencies(JobConfig(stage=test, needs=[binaries, doc_producer])) == ["Build"]
+    # nothing needed, nothing downloaded
+    assert dependencies(JobConfig(stage=test)) == []
+    # explicit artifacts (e.g. job without needs)
+    assert dependencies(JobConfig(stage=test, dependencies=[docs, binaries, docs])) == ["Docs", "Build"]
+    # download everything, also inherited
+    assert dependencies(JobConfig(stage=test, dependencies=False)) is None
+    assert dependencies(JobConfig(extends=no_download, stage=test, needs=binaries)) is None
+    assert dependencies(JobConfig(extends=no_download, stage=test, dependencies=True)) == []
+    # trigger jobs don't download artifacts
+    assert dependencies(JobConfig(stage=test, trigger=Trigger(include="child.yml"))) is None
+    assert producer.dependency_jobs() == []
+
+
 def test_trigger_job():
     stage = Stage("Testing")
     # some basic trigger job
@@ -0,0 +1,35 @@
+import pathlib
+import subprocess
+import sys
+
+package_dir = pathlib.Path(__file__).parent.parent
+
+# modules that are slow to import and must only be imported when actually needed
+HEAVY_MODULES = ["argparse", "subprocess", "yaml", "spycilab.validation", "spycilab.yaml_emitter"]
+
+
+def run_python(code: str, *options: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *options, "-c", code], cwd=package_dir, capture_output=True, text=True,
+                          check=True)
+
+
+def imported_modules(code: str) -> set[str]:
+    r = run_python(f"{code}\nimport sys\nprint(' '.join(sys.modules.keys()))")
+    return set(r.stdout.split())
+
+
+def test_lazy_package():
+    modules = imported_modules("import spycilab")
+    assert not [m for m in modules if m.startswith("spycilab.")]
+
+    modules = imported_modules("from spycilab import Job")
+    assert "spycilab.job" in modules
+    assert "spycilab.pipeline" not in modules
+
+    modules = imported_modules("from spycilab import *\nassert Pipeline and Job and Variable")
+    for m in HEAVY_MODULES:
+        assert m not in modules, f"module '{m}' should not be imported by 'from spycilab import *'"
+
+    r = run_python("import spycilab\ntry:\n    spycilab.DoesNotExist\nexcept AttributeError:\n    print('ok')")
+    assert r.stdout.strip() == "ok"
+
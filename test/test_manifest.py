@@ -0,0 +1,68 @@
+import json
+import os
+import pathlib
+import subprocess
+import sys
+
+import yaml
+
+pipeline_dir = pathlib.Path(__file__).parent / "resources"
+pipeline_script = str(pipeline_dir / "manifest_pipeline.py")
+
+
+def launcher(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-m", "spycilab.launcher", "--manifest", "manifest.json", *args],
+                          cwd=pipeline_dir, capture_output=True, text=True)
+
+
+def test_manifest():
+    try:
+        subprocess.run([pipeline_script, "--no-config", "generate", "--output", "manifest_test.yml", "--manifest", "manifest.json",
+                        "--run-script", "./manifest_pipeline.py"],
+                       cwd=pipeline_dir, check=True, capture_output=True)
+        with open(pipeline_dir / "manifest.json") as f:
+            manifest = json.load(f)
+        assert manifest["variables"]["target"] == {"default": "x86", "options": ["x86", "arm", "broken"], "show": True}
+        assert manifest["jobs"]["build"]["work"] == "manifest_work:build"
+        assert manifest["jobs"]["build"]["fast"]
+        assert manifest["jobs"]["nothing"]["fast"]
+        # not marked as standalone, might read Variable objects
+        assert not manifest["jobs"]["shared"]["fast"]
+        assert not manifest["jobs"]["inline"]["fast"]
+
+        with open(pipeline_dir / "manifest_test.yml") as f:
+            p_yaml = yaml.safe_load(f)
+        assert p_yaml["Build"]["script"] == "python3 -m spycilab.launcher --manifest manifest.json run build"
+        assert p_yaml["Inline"]["script"] == "./manifest_pipeline.py run inline"
+        assert p_yaml["Shared"]["script"] == "./manifest_pipeline.py run shared"
+
+        # only the work's module is imported
+        r = launcher("run", "build", "-v", "target=arm")
+        assert r.returncode == 0
+        assert "building arm as 'Build' (pipeline loaded: False)" in r.stdout
+        assert "target: 'arm'" in r.stdout
+        assert "Job finished successfully" in r.stdout
+
+        r = launcher("run", "build", "-v", "target=broken")
+        assert r.returncode == 1
+        assert "Job FAILED" in r.stdout
+
+        r = launcher("run", "build", "-v", "target=invalid")
+        assert r.returncode != 0
+
+        # work can't be referenced, run through pipeline script
+        r = launcher("run", "inline", "-v", "target=arm")
+        assert r.returncode == 0
+        assert "inline arm" in r.stdout
+
+        r = launcher("run", "shared")
+        assert r.returncode == 0
+        assert "shared (pipeline loaded: True)" in r.stdout
+
+        r = launcher("run", "nothing")
+        assert r.returncode == 0
+        assert "Nothing to do." in r.stdout
+    finally:
+        for f in ["manifest.json", "manifest_test.yml", "manifest_test.yml.fingerprint"]:
+            if os.path.exists(pipeline_dir / f):
+                os.remove(pipeline_dir / f)
@@ -0,0 +1,72 @@
+import pathlib
+import subprocess
+
+import pytest
+
+from spycilab import Job, JobConfig, JobStore, Stage, StageStore, Pipeline
+
+pipeline_script = str(pathlib.Path(__file__).parent / "resources" / "matrix_pipeline.py")
+
+
+def run(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([pipeline_script, "--no-config", *args], capture_output=True, text=True)
+
+
+def test_matrix_yaml():
+    stages = StageStore()
+    stages.build = Stage("Build")
+    jobs = JobStore()
+    matrix = [{"TARGET": ["x86", "arm"], "MODE": "debug"}, {"TARGET": "riscv", "MODE": ["debug", "release"]}]
+    jobs.build = Job("Build", JobConfig(stage=stages.build, parallel_matrix=matrix))
+    jobs.single = Job("Single", JobConfig(stage=stages.build, parallel_matrix={"TARGET": ["a", "b"]}))
+    p = Pipeline(jobs=jobs, stages=stages)
+    p.jobs.update_jobs(p.run_script)
+    y = p.to_yaml()
+    assert y["Build"]["parallel"] == {"matrix": matrix}
+    assert y["Build"]["script"] == "./pipeline.py run build"
+    assert y["Single"]["parallel"] == {"matrix": [{"TARGET": ["a", "b"]}]}
+
+    assert jobs.build.config.matrix_combinations() == [
+        {"TARGET": "x86", "MODE": "debug"},
+        {"TARGET": "arm", "MODE": "debug"},
+        {"TARGET": "riscv", "MODE": "debug"},
+        {"TARGET": "riscv", "MODE": "release"},
+    ]
+    # inherited through extends
+    assert JobConfig(extends=jobs.single.config).parallel_matrix == [{"TARGET": ["a", "b"]}]
+
+
+def test_matrix_invalid():
+    with pytest.raises(ValueError):
+        JobConfig(parallel_matrix={"not valid": "x"})
+    with pytest.raises(ValueError):
+        JobConfig(parallel_matrix={"A": []})
+    with pytest.raises(ValueError):
+        JobConfig(parallel_matrix={"A": [1, 2]})
+    with pytest.raises(ValueError):
+        JobConfig(parallel_matrix={"A": [str(i) for i in range(20)], "B": [str(i) for i in range(11)]})
+
+
+def test_run_matrix_index():
+    r = run("run", "build", "--matrix-index", "2")
+    assert r.returncode == 0
+    assert "# Matrix job 2/5: target=x86, MODE=release" in r.stdout
+    assert "building x86 release (2/5)" in r.stdout
+
+    r = run("run", "build", "--matrix-index", "5", "--with-prefix")
+    assert r.returncode == 0
+    assert "building riscv debug (5/5)" in r.stdout
+
+    r = run("run", "build", "--matrix-index", "6")
+    assert r.returncode != 0
+    r = run("run", "deploy", "--matrix-index", "1")
+    assert r.returncode != 0
+
+
+def test_run_all_matrix():
+    r = run("run-all")
+    assert r.returncode == 0
+    for line in ["building x86 debug (1/5)", "building x86 release (2/5)", "building arm debug (3/5)",
+                 "building arm release (4/5)", "building riscv debug (5/5)", "Build (build): success",
+                 "Deploy (deploy): success"]:
+        assert line in r.stdout
@@ -0,0 +1,51 @@
+import os
+import pathlib
+import re
+import subprocess
+
+from spycilab import section
+
+pipeline_script = str(pathlib.Path(__file__).parent / "resources" / "dag_pipeline.py")
+
+
+def test_section_local(monkeypatch, capsys):
+    monkeypatch.delenv("GITLAB_CI", raising=False)
+    with section("Compiling") as s:
+        print("compiling...")
+    assert capsys.readouterr().out == "compiling...\n"
+    assert s.duration >= 0
+
+
+def test_section_gitlab(monkeypatch, capsys):
+    monkeypatch.setenv("GITLAB_CI", "true")
+    with section("Compiling (debug)", collapsed=True) as s:
+        print("compiling...")
+    lines = capsys.readouterr().out.split("\n")[:-1]
+    assert len(lines) == 3
+    start = re.fullmatch(r"\x1b\[0Ksection_start:(\d+):(compiling_debug_\d+)\[collapsed=true\]\r\x1b\[0KCompiling \(debug\)",
+                         lines[0])
+    assert start is not None
+    assert lines[1] == "compiling..."
+    end = re.fullmatch(r"\x1b\[0Ksection_end:(\d+):(\S+)\r\x1b\[0K", lines[2])
+    assert end is not None
+    assert end.group(2) == start.group(2) == s.name
+    assert int(end.group(1)) >= int(start.group(1))
+
+
+def test_run_sections():
+    env = dict(os.environ, GITLAB_CI="true")
+    r = subprocess.run([pipeline_script, "run", "build"], env=env, capture_output=True, text=True)
+    assert r.returncode == 0
+    output = r.stdout
+    assert "# Starting job 'Build' (build)" in output
+    assert "# Job finished successfully." in output
+    assert output.count("section_start:") == output.count("section_end:")
+    for name in ["spycilab_variables", "spycilab_work"]:
+        assert re.search(rf"section_start:\d+:{name}", output)
+        assert re.search(rf"section_end:\d+:{name}", output)
+    # work output is inside the work section
+    assert output.index(":spycilab_work") < output.index("building...") < output.rindex(":spycilab_work")
+
+    env.pop("GITLAB_CI")
+    r = subprocess.run([pipeline_script, "run", "build"], env=env, capture_output=True, text=True)
+    assert "section_start" not in r.stdout
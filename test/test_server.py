@@ -0,0 +1,55 @@
+import os
+import pathlib
+import subprocess
+import sys
+import time
+
+import pytest
+
+pipeline_dir = pathlib.Path(__file__).parent / "resources"
+pipeline_script = str(pipeline_dir / "dag_pipeline.py")
+
+
+@pytest.fixture
+def server(tmp_path):
+    socket_path = str(tmp_path / "pipeline.sock")
+    p = subprocess.Popen([sys.executable, pipeline_script, "serve", "--socket", socket_path], cwd=pipeline_dir)
+    for _ in range(100):
+        if os.path.exists(socket_path):
+            break
+        time.sleep(0.05)
+    yield socket_path
+    p.terminate()
+    p.wait()
+
+
+def client(socket_path: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-m", "spycilab.client", "--socket", socket_path, *args],
+                          cwd=pipeline_dir, capture_output=True, text=True)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_serve(server):
+    r = client(server, "list")
+    assert r.returncode == 0
+    assert "Build (build): always" in r.stdout
+
+    r = client(server, "run", "build")
+    assert r.returncode == 0
+    assert "building..." in r.stdout
+
+    # variables of one request must not leak into the next one
+    r = client(server, "run", "build", "-v", "fail_build=yes")
+    assert r.returncode == 1
+    r = client(server, "run", "build")
+    assert r.returncode == 0
+
+    r = client(server, "run", "does_not_exist")
+    assert r.returncode == 1
+    assert "does not exist" in r.stderr
+
+
+def test_client_no_server(tmp_path):
+    r = client(str(tmp_path / "missing.sock"), "list")
+    assert r.returncode == 1
+    assert "Could not connect" in r.stderr
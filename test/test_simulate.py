@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from spycilab import Variable, BoolVariable, VariableStore, Job, JobConfig, JobStore, Stage, StageStore, Rule, When, Pipeline
+from spycilab.simulate import RuleSimulator
+
+
+def create_pipeline():
+    stages = StageStore()
+    stages.test = Stage("Test")
+    v = VariableStore()
+    v.kind = Variable("a", options=["a", "b", "c"])
+    v.branch = Variable(None)
+    v.other = Variable("")
+    jobs = JobStore()
+    shared = Rule(v.kind.equal_to("a") & v.branch.defined_and_not_empty())
+    jobs.always = Job("Always", JobConfig(stage=stages.test))
+    jobs.shared1 = Job("Shared 1", JobConfig(stage=stages.test, rules=[shared]))
+    jobs.shared2 = Job("Shared 2", JobConfig(stage=stages.test, rules=[shared]))
+    jobs.complex = Job("Complex", JobConfig(stage=stages.test, rules=[
+        Rule(v.branch.full_match("release/.*"), when=When.manual),
+        Rule(v.branch.equal_to(v.other) | v.kind.not_equal_to("c"), when=When.on_success),
+        Rule(v.other.not_defined_or_empty() & v.kind.not_equal_to("b")),
+    ]))
+    workflow = [Rule(v.kind.equal_to("c"), when=When.never), Rule()]
+    return Pipeline(jobs=jobs, stages=stages, variables=v, workflow=workflow)
+
+
+def test_simulate_matches_eval():
+    p = create_pipeline()
+    p.jobs.update_jobs("pipeline.py")
+    rand = random.Random(42)
+    scenarios = []
+    for i in range(200):
+        s = {"kind": rand.choice(["a", "b", "c"]),
+             "branch": rand.choice([None, "", "main", "release/1.0", "release"]),
+             "other": rand.choice([None, "", "main"])}
+        scenarios.append((f"s{i}", s))
+
+    simulator = RuleSimulator(p, scenarios, use_numpy=False)
+    matrix = simulator.job_matrix()
+    enabled = simulator.workflow()
+    for i, (_, s) in enumerate(scenarios):
+        for k, value in s.items():
+            p.vars.get(k).value = value
+        p.check_workflow()
+        assert enabled[i] == p.pipeline_enabled
+        for j, when in matrix:
+            assert when[i] == j.eval_when(), f"job {j.internal_name} in scenario {s}"
+
+
+def test_simulate_errors():
+    p = create_pipeline()
+    with pytest.raises(RuntimeError):
+        RuleSimulator(p, [("x", {"unknown": "a"})], use_numpy=False)
+    with pytest.raises(ValueError):
+        RuleSimulator(p, [("x", {"kind": "d"})], use_numpy=False)
+
+
+def test_load_scenarios(tmp_path):
+    csv_file = tmp_path / "s.csv"
+    csv_file.write_text("scenario,kind,branch\npush,a,main\n,b,\n")
+    assert RuleSimulator.load_scenarios(str(csv_file)) == [("push", {"kind": "a", "branch": "main"}),
+                                                          ("#2", {"kind": "b"})]
+    yaml_file = tmp_path / "s.yaml"
+    yaml_file.write_text("tag:\n  kind: c\n  branch: null\n")
+    assert RuleSimulator.load_scenarios(str(yaml_file)) == [("tag", {"kind": "c", "branch": None})]
+    # values are not converted by YAML (unquoted yes/no/on/1.0 stay strings)
+    yaml_file.write_text("on:\n  flag: yes\n  version: 1.0\n  branch: ~\noff:\n  flag: no\n")
+    scenarios = RuleSimulator.load_scenarios(str(yaml_file))
+    assert scenarios == [("on", {"flag": "yes", "version": "1.0", "branch": None}), ("off", {"flag": "no"})]
+    v = VariableStore()
+    v.flag = BoolVariable(False)
+    v.version = Variable("0.1")
+    v.branch = Variable(None)
+    stages = StageStore()
+    stages.test = Stage("Test")
+    jobs = JobStore()
+    jobs.flagged = Job("Flagged", JobConfig(stage=stages.test, rules=Rule(v.flag.is_true())))
+    flag_pipeline = Pipeline(jobs=jobs, stages=stages, variables=v)
+    flag_pipeline.jobs.update_jobs("pipeline.py")
+    rows = RuleSimulator(flag_pipeline, scenarios, use_numpy=False).table()
+    assert ["Flagged (flagged)", "always", "never"] in rows
+
+    p = create_pipeline()
+    p.jobs.update_jobs("pipeline.py")
+    rows = RuleSimulator(p, RuleSimulator.load_scenarios(str(csv_file)), use_numpy=False).table()
+    assert rows[0] == ["job", "push", "#2"]
+    assert rows[1] == ["(workflow)", "enabled", "enabled"]
+    assert ["Shared 1 (shared1)", "always", "never"] in rows
@@ -0,0 +1,87 @@
+import pytest
+
+from spycilab import Variable, VariableStore, Job, JobConfig, JobStore, Stage, StageStore, Rule, When, Pipeline, Artifacts
+from spycilab.split import PipelineSplitter
+
+
+def create_pipeline():
+    stages = StageStore()
+    stages.build = Stage("Build")
+    stages.test = Stage("Test")
+    stages.deploy = Stage("Deploy")
+    v = VariableStore()
+    v.target = Variable("x86")
+    jobs = JobStore()
+    arm = Rule(v.target.equal_to("arm"))
+    binaries = Artifacts(["bin"])
+    jobs.build = Job("Build", JobConfig(stage=stages.build, artifacts=binaries))
+    jobs.test = Job("Test", JobConfig(stage=stages.test, needs=binaries))
+    jobs.arm_build = Job("ARM Build", JobConfig(stage=stages.build, needs=[], rules=[arm]))
+    jobs.arm_test = Job("ARM Test", JobConfig(stage=stages.test, needs=jobs.arm_build, rules=[arm]))
+    jobs.deploy = Job("Deploy", JobConfig(stage=stages.deploy))
+    jobs.never = Job("Never", JobConfig(stage=stages.deploy, rules=[Rule(v.target.equal_to("x"), when=When.never), Rule(when=When.never)]))
+    p = Pipeline(jobs=jobs, stages=stages, variables=v)
+    p.jobs.update_jobs(p.run_script)
+    return p
+
+
+def test_split_by_needs():
+    p = create_pipeline()
+    parent, children = PipelineSplitter(p, "needs", "children").split()
+    assert [c.output for c in children] == ["children/arm_build.yml", "children/main.yml"]
+    assert set(children[0].jobs.all_identifier()) == {"arm_build", "arm_test"}
+    assert set(children[1].jobs.all_identifier()) == {"build", "test", "deploy", "never"}
+    assert children[1].stages.all_names() == ["Build", "Test", "Deploy"]
+
+    y = parent.to_yaml()
+    assert y["stages"] == ["Build"]
+    assert y["variables"]["target"] == "x86"
+    arm = y["arm_build pipeline"]
+    assert arm["trigger"]["include"] == "children/arm_build.yml"
+    assert arm["trigger"]["strategy"] == "depend"
+    assert arm["needs"] == []
+    assert arm["rules"] == [{"if": "($target == 'arm')"}]
+    main = y["main pipeline"]
+    # main contains jobs relying on stage order, so it has to wait for jobs in earlier stages
+    assert main["needs"] == [{"job": "arm_build pipeline", "optional": True}]
+    assert "rules" not in main
+
+    child = children[1].to_yaml()
+    assert "variables" not in child
+    assert child["Test"]["needs"] == ["Build"]
+
+
+def test_split_by_stage():
+    p = create_pipeline()
+    with pytest.raises(RuntimeError):
+        PipelineSplitter(p, "stage", "children").split()
+
+    p.jobs.test.config.needs = None
+    p.jobs.arm_test.config.needs = None
+    # artifacts can't be passed to another child pipeline
+    p.jobs.test.config.dependencies = [p.jobs.build.config.artifacts]
+    with pytest.raises(RuntimeError) as e:
+        PipelineSplitter(p, "stage", "children").split()
+    assert "depends on artifacts of job 'build'" in str(e.value)
+
+    p.jobs.test.config.dependencies = None
+    parent, children = PipelineSplitter(p, "stage", "children").split()
+    assert [c.output for c in children] == ["children/build.yml", "children/test.yml", "children/deploy.yml"]
+    y = parent.to_yaml()
+    assert y["stages"] == ["Build", "Test", "Deploy"]
+    assert y["Deploy pipeline"]["stage"] == "Deploy"
+    assert "needs" not in y["Deploy pipeline"]
+    assert "rules" not in y["Build pipeline"]
+
+    # trigger only if any job can run
+    p.jobs.deploy.config.rules = [Rule(when=When.never)]
+    rules = PipelineSplitter.trigger_rules([p.jobs.deploy, p.jobs.never])
+    assert [r.to_yaml() for r in rules] == [{"when": "never"}]
+
+
+def test_split_pipeline_source():
+    p = create_pipeline()
+    p.jobs.deploy.config.rules = [Rule(p.vars.target.equal_to("x86") & p.vars.is_merge_request(), when=When.never), Rule()]
+    with pytest.raises(RuntimeError) as e:
+        PipelineSplitter(p, "needs", "children").split()
+    assert "rules of job 'deploy' check CI_PIPELINE_SOURCE" in str(e.value)
@@ -0,0 +1,63 @@
+import pytest
+
+from spycilab import Job, JobConfig, JobStore, Stage, StageStore, Artifacts, Pipeline
+from spycilab.validation import PipelineValidator
+
+
+def test_validation_collects_all_problems():
+    stages = StageStore()
+    stages.build = Stage("Build")
+    stages.test = Stage("Test")
+    unknown_stage = Stage("Unknown")
+
+    jobs = JobStore()
+    outside = Job("Outside", JobConfig(stage=stages.build))
+    jobs.a = Job("Same", JobConfig(stage=stages.build))
+    jobs.b = Job("Same", JobConfig(stage=stages.build))
+    jobs.later = Job("Later", JobConfig(stage=stages.test))
+    jobs.early = Job("Early", JobConfig(stage=stages.build, needs=[jobs.later, outside]))
+    jobs.c1 = Job("Cycle 1", JobConfig(stage=stages.test))
+    jobs.c2 = Job("Cycle 2", JobConfig(stage=stages.test, needs=jobs.c1))
+    jobs.c1.config.needs = [jobs.c2]
+    jobs.lost = Job("Lost", JobConfig(stage=unknown_stage))
+    binaries = Artifacts(["bin"])
+    docs = Artifacts(["docs"])
+    jobs.producer = Job("Producer", JobConfig(stage=stages.build, artifacts=binaries))
+    jobs.docs = Job("Docs", JobConfig(stage=stages.build, artifacts=docs))
+    jobs.same_stage = Job("Same Stage", JobConfig(stage=stages.build, dependencies=binaries))
+    jobs.not_needed = Job("Not Needed", JobConfig(stage=stages.test, needs=docs, dependencies=[docs, binaries]))
+    jobs.after_later = Job("After Later", JobConfig(stage=stages.build, after=jobs.later))
+    jobs.after_needs = Job("After Needs", JobConfig(stage=stages.test, needs=[], after=jobs.producer))
+    jobs.update_jobs()
+
+    validator = PipelineValidator(jobs, stages)
+    errors = validator.validate()
+    assert len(errors) == 9
+    assert "Job 'a' and 'b' have the same name ('Same')" in errors
+    assert any("'early'" in e and "later stage" in e for e in errors)
+    assert any("'Outside' that is not part of the pipeline" in e for e in errors)
+    assert any("cyclic" in e and "c1" in e and "c2" in e for e in errors)
+    assert any("'lost'" in e and "stage store" in e for e in errors)
+    assert any("'same_stage'" in e and "not in an earlier stage" in e for e in errors)
+    assert any("'not_needed'" in e and "['bin']" in e and "without needing it" in e for e in errors)
+    assert any("'after_later'" in e and "'later' that is not in an earlier stage" in e for e in errors)
+    assert any("'after_needs' has 'needs' and 'after'" in e for e in errors)
+    assert set(validator.timings.keys()) == {"index", "names", "needs", "dependencies", "cycles"}
+
+    with pytest.raises(RuntimeError) as e:
+        Pipeline(jobs=jobs, stages=stages).check_jobs()
+    assert "9 problems" in str(e.value)
+
+
+def test_validation_many_jobs():
+    stages = StageStore()
+    stages.build = Stage("Build")
+    stages.test = Stage("Test")
+    jobs = JobStore()
+    for i in range(20000):
+        a = Artifacts([f"out{i}"])
+        jobs.add(f"build{i}", Job(f"Build {i}", JobConfig(stage=stages.build, artifacts=a)))
+        jobs.add(f"test{i}", Job(f"Test {i}", JobConfig(stage=stages.test, needs=a)))
+    jobs.update_jobs()
+
+    assert PipelineValidator(jobs, stages).validate() == []
@@ -0,0 +1,129 @@
+import io
+import random
+
+import yaml
+
+from spycilab import VariableStore, Pipeline, Variable, StageStore, JobStore, Stage, Job, JobConfig, Rule, When, \
+    Artifacts
+from spycilab.yaml_emitter import YamlEmitter
+
+
+def emit(data) -> str:
+    s = io.StringIO()
+    YamlEmitter(s).dump(data)
+    return s.getvalue()
+
+
+def reference(data) -> str:
+    return yaml.dump(data, indent=2, sort_keys=False)
+
+
+def check(data):
+    assert emit(data) == reference(data)
+
+
+def test_scalars():
+    strings = ["", " ", "a", "a b", " leading", "trailing ", "true", "True", "yes", "no", "on", "OFF", "null", "~",
+               "42", "-1", "0x1F", "0o7", "1.5", ".5", "1e3", "1.0e+3", ".inf", "2024-11-17", "2024-11-17 12:00:00",
+               "<<", "=", "!", "&", "*", "-", "- a", "-a", "?", "? a", ":", ": a", "a:", "a: b", "a:b", "#", "a #b",
+               "a#b", "[a]", "{a}", "a,b", "'quoted'", "it's", "\"double\"", "%", "@", "`", "|", ">", "---", "...",
+               "a\nb", "a\n", "\na", "a \nb", "a\n b", "tab\there", "back\\slash", "\x00", "\x07", "\x1b", "\x85",
+               "\xa0", "\u2028", "\u200B", "\u200BJob", "\u200B\u200BJob Name", "\u00FC", "\uFEFF", "\U0001F600",
+               "$VAR", "($A == 'x')", "($A != null && $A != '')", "$A =~ /^release-.*$/", "a'b'c", "''"]
+    for s in strings:
+        check({"k": s})
+        check({s or "empty": "v"} if s.strip() and "\n" not in s else {"k": [s]})
+        check([s])
+    check({"t": True, "f": False, "n": None, "i": 0, "neg": -12, "big": 12345678901234567890})
+    check({True: 1, None: 2, 3: 4})
+
+    # complex keys
+    check({"": 1, "a\nb": [1], "x" * 122: {"y": 1}, "x" * 123: "z", "\u200B" * 130 + "Job": None,
+           " ".join(["word"] * 40): 2})
+
+
+def test_line_folding():
+    for length in range(60, 130, 7):
+        words = " ".join(f"w{i}" for i in range(length // 3))
+        check({"plain": words})
+        check({"single": f"'{words}"})
+        check({"double": f"\u200B{words}"})
+        check({"nested": {"deeper": [{"if": f"(($A == 'x') && ({words}))", "when": "never"}]}})
+        check({"spaces": "a " + " " * length + " b"})
+        check({"single_spaces": "'a " + " " * length + " b"})
+
+
+def test_collections():
+    check({})
+    check([])
+    check({"a": [], "b": {}, "c": [[]], "d": [{}]})
+    check([[1, [2, [3]]], {"a": {"b": {"c": [1, 2]}}}])
+    check({"a": [{"x": [1, 2], "y": {"z": None}}, [{"w": 1}]]})
+
+    # shared objects get anchors
+    shared_list = ["x", "y"]
+    shared_dict = {"k": shared_list}
+    empty = []
+    check({"a": shared_list, "b": shared_list, "c": [shared_dict, shared_dict], "d": empty, "e": empty,
+           "f": {"g": shared_dict}})
+
+
+def random_string(rnd: random.Random) -> str:
+    alphabet = "abcAB01 _-.:#'\"$&|=()[]{}!?,\n\\\u200B"
+    return "".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 100)))
+
+
+def random_tree(rnd: random.Random, depth: int, shared: list):
+    r = rnd.random()
+    if depth > 0 and r < 0.3:
+        d = {}
+        for _ in range(rnd.randint(0, 4)):
+            d[random_string(rnd)] = random_tree(rnd, depth - 1, shared)
+        return d
+    elif depth > 0 and r < 0.5:
+        return [random_tree(rnd, depth - 1, shared) for _ in range(rnd.randint(0, 4))]
+    elif shared and r < 0.55:
+        return rnd.choice(shared)
+    elif r < 0.65:
+        return rnd.choice([True, False, None, rnd.randint(-1000, 1000)])
+    return random_string(rnd)
+
+
+def test_random():
+    rnd = random.Random(42)
+    shared = [["shared"], {"shared": "dict"}, []]
+    for _ in range(500):
+        check({"root": random_tree(rnd, 4, shared)})
+
+
+def test_pipeline():
+    s = StageStore()
+    s.build = Stage("Build")
+    s.ordered = Stage("Ordered", preserve_order=True)
+    v = VariableStore()
+    v.mode = Variable("debug", description="build mode", options=["debug", "release"])
+    v.name = Variable("some name")
+    j = JobStore()
+    long_condition = v.mode.equal_to("release") & v.CI_COMMIT_TAG.full_match("release-[0-9]+\\.[0-9]+") | \
+        (v.is_merge_request() & v.CI_OPEN_MERGE_REQUESTS.defined_and_not_empty())
+    rules = [Rule(long_condition, when=When.always), Rule(when=When.never)]
+    tags = ["docker", "linux"]
+    out = Artifacts(paths=["out/"], lifetime="1 week")
+    j.build = Job("Build App", JobConfig(stage=s.build, rules=rules, tags=tags, artifacts=out))
+    for i in range(12):
+        j.add(f"job_{i}", Job(f"Ordered Job {i}", JobConfig(stage=s.ordered, rules=rules, tags=tags, needs=out,
+                                                            yaml_override={"retry": 2, "image": "python:3.11"})))
+    p = Pipeline(jobs=j, stages=s, variables=v, workflow=[Rule(v.is_tag()), Rule(when=When.never)])
+    p.jobs.update_jobs(p.run_script)
+    check(p.to_yaml())
+
+
+def test_unsupported():
+    for data in [{"float": 1.5}, {"tuple": (1, 2)}, {("a",): 1}, {"a": {"b": [object()]}}, "root"]:
+        s = io.StringIO()
+        try:
+            YamlEmitter(s).dump(data)
+            assert False, f"should have thrown for {data}"
+        except YamlEmitter.Unsupported:
+            pass
+        assert s.getvalue() == ""